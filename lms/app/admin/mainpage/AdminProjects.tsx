@@ -69,6 +69,8 @@ const AdminProjects = () => {
   const [error, setError] = useState<string | null>(null);
   const [searchQuery, setSearchQuery] = useState('');
   const [statusFilter, setStatusFilter] = useState<'all' | 'active' | 'completed'>('all');
+  const [nextPage, setNextPage] = useState<string | null>(null);
+  const [isLoadingMore, setIsLoadingMore] = useState(false);
 
   const fetchProjects = useCallback(async () => {
     try {
@@ -85,6 +87,7 @@ const AdminProjects = () => {
 
       if (response.data.status === 'success') {
         setProjects(response.data.projects);
+        setNextPage(response.data.next || null);
       } else {
         throw new Error(response.data.message || 'Failed to fetch projects');
       }
@@ -98,6 +101,31 @@ const AdminProjects = () => {
 
   useEffect(() => { fetchProjects(); }, [fetchProjects]);
 
+  // The list is paged by cursor: `next` already carries the search and filter
+  const loadMoreProjects = useCallback(async () => {
+    if (!nextPage || isLoadingMore || loading || refreshing) return;
+    try {
+      setIsLoadingMore(true);
+      const accessToken = await AsyncStorage.getItem('accessToken');
+      if (!accessToken) throw new Error('Authentication required');
+
+      const response = await axios.get(nextPage, {
+        headers: { 'Authorization': `Bearer ${accessToken}` }
+      });
+
+      if (response.data.status === 'success') {
+        setProjects(prev => [...prev, ...response.data.projects]);
+        setNextPage(response.data.next || null);
+      } else {
+        throw new Error(response.data.message || 'Failed to fetch projects');
+      }
+    } catch (err) {
+      setError(err instanceof Error ? err.message : 'Failed to fetch projects');
+    } finally {
+      setIsLoadingMore(false);
+    }
+  }, [nextPage, isLoadingMore, loading, refreshing]);
+
   const onRefresh = useCallback(() => {
     setRefreshing(true);
     fetchProjects();
@@ -410,6 +438,19 @@ const AdminProjects = () => {
                 tintColor="#6a11cb"
               />
             }
+            onEndReached={loadMoreProjects}
+            onEndReachedThreshold={0.5}
+            ListFooterComponent={
+              isLoadingMore ? (
+                <View style={styles.footer}>
+                  <ActivityIndicator size="small" color="#6a11cb" />
+                </View>
+              ) : nextPage ? (
+                <View style={styles.footer}>
+                  <Text style={styles.footerText}>Swipe up to load more</Text>
+                </View>
+              ) : null
+            }
           />
         )}
       </LinearGradient>
@@ -514,6 +555,15 @@ const styles = StyleSheet.create({
     paddingHorizontal: 16,
     paddingBottom: 80,
   },
+  footer: {
+    padding: 16,
+    justifyContent: 'center',
+    alignItems: 'center',
+  },
+  footerText: {
+    fontSize: 14,
+    color: Colors.light.textSecondary,
+  },
   projectCard: {
     borderRadius: 12,
     overflow: 'hidden',
@@ -27,6 +27,7 @@ import * as Haptics from 'expo-haptics';
 import * as FileSystem from 'expo-file-system';
 import ButtonPageTabs from '@/components/custom/ButtonPageTabs';
 import API_BASE_URL from '@/constants/config/api';
+import fetchAllPages from '@/constants/config/pagination';
 
 type Project = {
   id: string;
@@ -203,12 +204,7 @@ const Dashboard = () => {
     const accessToken = await AsyncStorage.getItem('accessToken');
     if (!accessToken) throw new Error('Authentication required');
 
-    const response = await fetch(`${API_BASE_URL}/projects/`, {
-      headers: { Authorization: `Bearer ${accessToken}` },
-    });
-
-    if (!response.ok) throw new Error('Failed to fetch projects');
-    return response.json();
+    return fetchAllPages(`${API_BASE_URL}/projects/?page_size=100`, accessToken);
   };
 
   const fetchRewardPoints = async () => {
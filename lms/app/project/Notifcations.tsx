@@ -4,8 +4,8 @@ import AsyncStorage from '@react-native-async-storage/async-storage';
 import * as Notifications from 'expo-notifications';
 import * as BackgroundFetch from 'expo-background-fetch';
 import * as TaskManager from 'expo-task-manager';
-import axios from 'axios';
 import API_BASE_URL from '@/constants/config/api';
+import fetchAllPages from '@/constants/config/pagination';
 
 // Configure notifications
 Notifications.setNotificationHandler({
@@ -184,17 +184,7 @@ const NotificationsComponent = () => {
         throw new Error('Authentication required');
       }
 
-      const response = await axios.get(`${API_BASE_URL}/projects/`, {
-        headers: {
-          Authorization: `Bearer ${accessToken}`,
-        },
-      });
-
-      if (response.status !== 200) {
-        throw new Error('Failed to fetch projects');
-      }
-
-      const data = response.data;
+      const data = await fetchAllPages(`${API_BASE_URL}/projects/?page_size=100`, accessToken);
       await AsyncStorage.setItem(PROJECTS_CACHE_KEY, JSON.stringify(data));
       return data;
     } catch (error) {
@@ -51,6 +51,8 @@ const Projects = () => {
   const [activeTab, setActiveTab] = useState<'ongoing' | 'completed'>('ongoing');
   const [searchQuery, setSearchQuery] = useState('');
   const [refreshing, setRefreshing] = useState(false);
+  const [nextPage, setNextPage] = useState<string | null>(null);
+  const [isLoadingMore, setIsLoadingMore] = useState(false);
 
   const fetchProjects = useCallback(async () => {
     try {
@@ -73,7 +75,8 @@ const Projects = () => {
       }
 
       const data = response.data;
-      setProjects(data);
+      setProjects(data.results);
+      setNextPage(data.next || null);
     } catch (err) {
       setError(err.message || 'Failed to load projects');
       console.error('Error fetching projects:', err);
@@ -83,6 +86,32 @@ const Projects = () => {
     }
   }, []);
 
+  // The list is paged by cursor; `next` is the URL of the following page
+  const loadMoreProjects = useCallback(async () => {
+    if (!nextPage || isLoadingMore || loading || refreshing) return;
+    try {
+      setIsLoadingMore(true);
+      const accessToken = await AsyncStorage.getItem('accessToken');
+      if (!accessToken) {
+        throw new Error('Authentication required');
+      }
+
+      const response = await axios.get(nextPage, {
+        headers: {
+          Authorization: `Bearer ${accessToken}`,
+        },
+      });
+
+      setProjects(prevProjects => [...prevProjects, ...response.data.results]);
+      setNextPage(response.data.next || null);
+    } catch (err) {
+      setError(err.message || 'Failed to load projects');
+      console.error('Error fetching projects:', err);
+    } finally {
+      setIsLoadingMore(false);
+    }
+  }, [nextPage, isLoadingMore, loading, refreshing]);
+
   const onRefresh = useCallback(() => {
     Haptics.selectionAsync();
     setRefreshing(true);
@@ -136,6 +165,13 @@ const Projects = () => {
     });
   }, [projects, activeTab, searchQuery]);
 
+  // Nothing loaded so far matches the tab or search: look further
+  useEffect(() => {
+    if (filteredProjects.length === 0 && nextPage) {
+      loadMoreProjects();
+    }
+  }, [filteredProjects, nextPage, loadMoreProjects]);
+
   const calculateProjectProgress = useCallback((project: Project): number => {
     if (project.completed) return 100;
     const phases = project.phases || [];
@@ -369,7 +405,7 @@ const Projects = () => {
           <View style={styles.loadingContainer}>
             <ActivityIndicator size="large" color="#6a11cb" />
           </View>
-        ) : filteredProjects.length === 0 ? (
+        ) : filteredProjects.length === 0 && !nextPage ? (
           <View style={styles.emptyContainer}>
             <Ionicons name="folder-open" size={48} color="#adb5bd" />
             <Text style={styles.emptyText}>
@@ -390,6 +426,15 @@ const Projects = () => {
                 tintColor="#6a11cb"
               />
             }
+            onEndReached={loadMoreProjects}
+            onEndReachedThreshold={0.5}
+            ListFooterComponent={
+              isLoadingMore || nextPage ? (
+                <View style={styles.footer}>
+                  <ActivityIndicator size="small" color="#6a11cb" />
+                </View>
+              ) : null
+            }
           />
         )}
       </LinearGradient>
@@ -597,6 +642,11 @@ const styles = StyleSheet.create({
     justifyContent: 'center',
     alignItems: 'center',
   },
+  footer: {
+    padding: 16,
+    justifyContent: 'center',
+    alignItems: 'center',
+  },
   emptyContainer: {
     flex: 1,
     justifyContent: 'center',
@@ -16,6 +16,7 @@ import { CircularProgressBase } from 'react-native-circular-progress-indicator';
 import AsyncStorage from '@react-native-async-storage/async-storage';
 import { router } from 'expo-router';
 import API_BASE_URL from '@/constants/config/api';
+import fetchAllPages from '@/constants/config/pagination';
 import { BlurView } from 'expo-blur';
 import { LinearGradient } from 'expo-linear-gradient';
 
@@ -73,13 +74,7 @@ const TrackAllProjects = () => {
       const accessToken = await AsyncStorage.getItem('accessToken');
       if (!accessToken) throw new Error('Authentication required');
 
-      const response = await fetch(`${API_BASE_URL}/projects/`, {
-        headers: { Authorization: `Bearer ${accessToken}` }
-      });
-
-      if (!response.ok) throw new Error('Failed to fetch projects');
-      
-      const data = await response.json();
+      const data = await fetchAllPages(`${API_BASE_URL}/projects/?page_size=100`, accessToken);
       setProjects(data);
       calculateStats(data);
     } catch (error) {
@@ -0,0 +1,20 @@
+// Collects every result of a cursor-paginated list endpoint (for example
+// `${API_BASE_URL}/projects/`) by following its `next` links. Each request
+// returns one bounded page; use this only where the screen needs them all.
+const fetchAllPages = async (url: string, accessToken: string) => {
+  const results = [];
+  let next: string | null = url;
+  while (next) {
+    const response = await fetch(next, {
+      headers: { Authorization: `Bearer ${accessToken}` },
+    });
+    if (!response.ok) throw new Error('Failed to fetch projects');
+
+    const page = await response.json();
+    results.push(...page.results);
+    next = page.next;
+  }
+  return results;
+};
+
+export default fetchAllPages;
@@ -0,0 +1,78 @@
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from .models import ActivityEvent
+
+# (title prefix, description verb) per project event type
+PROJECT_EVENT_TEXT = {
+    ActivityEvent.PROJECT_CREATED: ('New project created', 'Created'),
+    ActivityEvent.PROJECT_UPDATED: ('Project updated', 'Updated'),
+    ActivityEvent.PROJECT_COMPLETED: ('Project completed', 'Completed'),
+}
+
+# Feed presentation per event type: (icon, suffix of the legacy item id)
+EVENT_DISPLAY = {
+    ActivityEvent.USER_SIGNUP: ('person-add', ''),
+    ActivityEvent.PROJECT_CREATED: ('folder', ''),
+    ActivityEvent.PROJECT_UPDATED: ('create', '_update'),
+    ActivityEvent.PROJECT_COMPLETED: ('checkmark-circle', '_complete'),
+}
+
+
+def signup_event(user):
+    return ActivityEvent(
+        event_type=ActivityEvent.USER_SIGNUP,
+        timestamp=user.date_joined,
+        title=f'New user registered: {user.email}',
+        description=f"User {user.get_full_name()} joined the system",
+        user_id=user.pk,
+    )
+
+
+def project_event(project, event_type, owner_email, timestamp=None):
+    prefix, verb = PROJECT_EVENT_TEXT[event_type]
+    return ActivityEvent(
+        event_type=event_type,
+        timestamp=timestamp or timezone.now(),
+        title=f'{prefix}: {project.title or "Untitled"}',
+        description=f"{verb} by {owner_email}",
+        user_id=project.user_id,
+        project_id=project.pk,
+    )
+
+
+def latest_updates_only(events):
+    """
+    Leave out PROJECT_UPDATED events followed by a later one for the same
+    project. Every save is logged, but the feed shows one "updated" item per
+    project, as it did before the log existed.
+    """
+    later_update = ActivityEvent.objects.filter(
+        event_type=ActivityEvent.PROJECT_UPDATED,
+        project_id=OuterRef('project_id'),
+        id__gt=OuterRef('id'),
+    )
+    return events.exclude(Exists(later_update), event_type=ActivityEvent.PROJECT_UPDATED)
+
+
+def to_feed_item(event, time_ago):
+    """Render an event in the shape the admin app already consumes"""
+    icon, id_suffix = EVENT_DISPLAY[event.event_type]
+    if event.project_id is not None:
+        item_id = f'project_{event.project_id}{id_suffix}'
+    else:
+        item_id = f'user_{event.user_id}'
+    item = {
+        'uuid': f'activity_{event.pk}',
+        'id': item_id,
+        'type': event.event_type,
+        'title': event.title,
+        'description': event.description,
+        'timestamp': event.timestamp.isoformat(),
+        'time_ago': time_ago,
+        'icon': icon,
+        'user_id': event.user_id,
+    }
+    if event.project_id is not None:
+        item['project_id'] = event.project_id
+    return item
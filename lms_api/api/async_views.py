@@ -0,0 +1,47 @@
+"""
+Async variant of DRF's APIView.
+
+DRF 3.15 only dispatches synchronously. AsyncAPIView keeps the usual request
+parsing, authentication, permissions and exception handling, but awaits
+async handlers, so slow non-database work (password hashing, see
+api.hashing) can be awaited without holding a worker thread. Authentication
+and permission checks may hit the database and run through `sync_to_async`;
+handlers must do the same for their own queries.
+
+All handlers of a subclass have to be `async def`.
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+from rest_framework.views import APIView
+
+
+class AsyncAPIView(APIView):
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+
+            response = handler(request, *args, **kwargs)
+            if asyncio.iscoroutine(response):
+                response = await response
+
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+    async def options(self, request, *args, **kwargs):
+        return await sync_to_async(super().options)(request, *args, **kwargs)
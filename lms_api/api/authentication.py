@@ -0,0 +1,114 @@
+"""
+JWT authentication without a user query on every request.
+
+SimpleJWT's JWTAuthentication loads the CustomUser row for each request.
+CachedJWTAuthentication keeps recently seen users in a small per-process LRU
+cache instead. Each entry is tagged with the user's version number, which is
+kept in the shared Django cache and bumped by `invalidate_user()` whenever
+the row changes: model saves and deletes through signals, and the direct
+`update()` calls at login, logout and reward grants. A bumped version makes
+every process reload the user on its next request, so deactivation and
+password changes take effect at once. Entries also expire after
+JWT_USER_CACHE_TTL seconds, which bounds staleness if the shared cache
+evicts a version key.
+
+A version bump only reaches other workers through a shared cache backend
+(see `caching.is_shared()`), which is why settings require one (Redis by
+default). A request then costs one cache read for the version instead of the
+user query. With a process-local backend every request loads the user as
+JWTAuthentication does.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from . import caching
+
+VERSION_KEY = 'auth_user_version:{}'
+
+
+class UserCache:
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id, version):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            entry_version, expires_at, user = entry
+            if entry_version != version or expires_at < time.monotonic():
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return user
+
+    def set(self, user_id, version, user):
+        with self._lock:
+            self._entries[user_id] = (version, time.monotonic() + settings.JWT_USER_CACHE_TTL, user)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > settings.JWT_USER_CACHE_SIZE:
+                self._entries.popitem(last=False)
+
+    def discard(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+user_cache = UserCache()
+
+
+def invalidate_user(user_id):
+    """Drop a user from the cache of every process"""
+    user_cache.discard(user_id)
+    cache.set(VERSION_KEY.format(user_id), time.time_ns(), None)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+
+    def get_user(self, validated_token):
+        if not caching.is_shared():
+            return super().get_user(validated_token)
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        version = cache.get(VERSION_KEY.format(user_id))
+        user = user_cache.get(user_id, version)
+        if user is None:
+            try:
+                user = self.user_model.objects.get(**{api_settings.USER_ID_FIELD: user_id})
+            except self.user_model.DoesNotExist:
+                raise AuthenticationFailed(_("User not found"), code="user_not_found")
+            user_cache.set(user_id, version, user)
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(
+                api_settings.REVOKE_TOKEN_CLAIM
+            ) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(
+                    _("The user's password has been changed."), code="password_changed"
+                )
+
+        # Views modify request.user (e.g. reward points), so each request
+        # gets its own copy rather than the shared cached instance
+        return copy.copy(user)
@@ -0,0 +1,116 @@
+"""
+Helpers for the benchmark management commands.
+
+`sample_projects()` builds unsaved projects with their phases and owners
+already attached, shaped like the rows of the project list endpoints, so
+serializers and renderers can be timed without a database.
+"""
+import decimal
+import random
+import time
+import uuid
+from datetime import date, datetime, time as dt_time, timedelta
+
+from django.utils import timezone
+
+from .models import CustomUser, Phase, Project
+
+CATEGORIES = ['Research', 'Development', 'Design', 'Marketing', 'Operations', None]
+WORDS = (
+    'plan review draft build test deploy report design meeting research '
+    'outline budget client feedback prototype launch revise summary'
+).split()
+
+
+def _text(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize()
+
+
+def sample_projects(count, users=20, seed=0):
+    """`count` projects spread over `users` owners, each with 0-10 phases"""
+    rng = random.Random(seed)
+    now = timezone.now().replace(microsecond=0)
+    owners = [
+        CustomUser(
+            id=user_id, username=f'user{user_id}', email=f'user{user_id}@example.com',
+            first_name=rng.choice(['Ada', 'Grace', 'Alan', 'Linus', '']),
+            last_name=rng.choice(['Lovelace', 'Hopper', 'Turing', 'Torvalds', '']),
+            profile_picture=rng.choice(['', f'profile_pics/ab/{user_id:064x}.jpg']),
+        )
+        for user_id in range(1, users + 1)
+    ]
+
+    projects = []
+    phase_id = 0
+    for project_id in range(1, count + 1):
+        owner = rng.choice(owners)
+        created_at = now - timedelta(days=rng.randint(0, 365), seconds=rng.randint(0, 86400))
+        start = created_at.date() + timedelta(days=rng.randint(0, 10))
+        end = start + timedelta(days=rng.randint(1, 90))
+        project = Project(
+            id=project_id,
+            title=_text(rng, rng.randint(2, 6)),
+            description=_text(rng, rng.randint(0, 80)) or None,
+            category=rng.choice(CATEGORIES),
+            start_date=start,
+            end_date=end,
+            start_time=rng.choice([None, dt_time(9, 0), dt_time(13, 30)]),
+            end_time=rng.choice([None, dt_time(17, 0), dt_time(23, 59)]),
+            completed=rng.random() < 0.3,
+            user=owner,
+            created_at=created_at,
+            updated_at=created_at + timedelta(hours=rng.randint(0, 500)),
+        )
+        project.deadline = project.compute_deadline()
+        if project.completed:
+            project.completed_at = project.updated_at
+
+        phases = []
+        for order in range(rng.randint(0, 10)):
+            phase_id += 1
+            phases.append(Phase(
+                id=phase_id,
+                project=project,
+                order=order,
+                name=_text(rng, rng.randint(1, 4)),
+                start_date=start + timedelta(days=order),
+                end_date=start + timedelta(days=order + rng.randint(1, 5)),
+                start_time=rng.choice([None, dt_time(9, 0)]),
+                end_time=rng.choice([None, dt_time(17, 0)]),
+                comment=_text(rng, rng.randint(0, 20)),
+                completed=rng.random() < 0.5,
+            ))
+        project._prefetched_objects_cache = {'phases': phases}
+        projects.append(project)
+    return projects
+
+
+def raw_values_payload(seed=0):
+    """A payload of the Python types views put into responses directly"""
+    rng = random.Random(seed)
+    return [
+        {
+            'id': uuid.UUID(int=rng.getrandbits(128)),
+            'at': timezone.now() - timedelta(seconds=rng.randint(0, 10 ** 6), microseconds=rng.randint(0, 999999)),
+            'naive': datetime(2025, 1, 1, 12, 30, rng.randint(0, 59), rng.randint(0, 999999)),
+            'day': date(2025, 1, 1) + timedelta(days=rng.randint(0, 365)),
+            'time': dt_time(rng.randint(0, 23), rng.randint(0, 59), 0, rng.choice([0, 123456])),
+            'duration': timedelta(seconds=rng.randint(0, 10 ** 5)),
+            'amount': decimal.Decimal(rng.randint(0, 10 ** 6)) / 100,
+            'ratio': rng.uniform(0.01, 1),
+            'label': 'caf\u00e9 \u2028 \u2029 \U0001F600',
+        }
+        for _ in range(200)
+    ]
+
+
+def best_of(func, repeat=5, number=1):
+    """Best wall-clock seconds of `repeat` runs of `number` calls"""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
@@ -0,0 +1,113 @@
+"""
+Shared-cache helpers for expensive read-mostly payloads.
+
+Values are stored with a generation number and a freshness deadline. Model
+signals bump the generation to invalidate, and recomputation is
+single-flighted with a cache lock: one worker rebuilds the value while the
+others keep serving the stale copy, or wait briefly if there is none yet.
+Only `add`, `get`, `set`, `incr` and `delete` are used, so the local-memory
+and file-based backends work without any external service.
+"""
+import logging
+import time
+
+from django.conf import settings
+from django.core import checks
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+DASHBOARD_STATS_KEY = 'dashboard_stats'
+
+# Backends whose entries only the writing process can see
+PROCESS_LOCAL_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def is_shared():
+    """Whether every worker sees the same cache, so a key set in one reaches all"""
+    return settings.CACHES['default']['BACKEND'] not in PROCESS_LOCAL_BACKENDS
+
+
+@checks.register(checks.Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    if not is_shared():
+        return [checks.Warning(
+            "The default cache is local to each process.",
+            hint="Caches that must see changes made by other workers are skipped and the database "
+                 "is read instead. Set CACHE_BACKEND to a shared backend such as Redis.",
+            id='api.W001',
+        )]
+    return []
+
+
+def _generation_key(key):
+    return f'{key}:generation'
+
+
+def _lock_key(key):
+    return f'{key}:lock'
+
+
+def invalidate(key):
+    """Mark the cached value stale; the next read triggers one recompute"""
+    generation_key = _generation_key(key)
+    cache.add(generation_key, 0, None)
+    try:
+        cache.incr(generation_key)
+    except ValueError:
+        # The key was evicted between add() and incr()
+        cache.set(generation_key, 1, None)
+
+
+def get_or_compute(key, compute, timeout, stale_timeout=300, lock_timeout=10, wait_interval=0.05):
+    """
+    Return the cached value for `key`, calling `compute()` when it is missing,
+    expired or invalidated. Stale values are kept for `stale_timeout` seconds
+    after they expire so concurrent readers have something to serve.
+    """
+    generation = cache.get(_generation_key(key), 0)
+    entry = cache.get(key)
+    if entry is not None and entry['generation'] == generation and entry['fresh_until'] > time.time():
+        return entry['value']
+
+    lock_key = _lock_key(key)
+    if cache.add(lock_key, True, lock_timeout):
+        try:
+            value = compute()
+            # Store under the generation read before computing: an invalidation
+            # that lands mid-compute leaves this value stale, as it should.
+            cache.set(key, {
+                'value': value,
+                'generation': generation,
+                'fresh_until': time.time() + timeout,
+            }, timeout + stale_timeout)
+            return value
+        finally:
+            cache.delete(lock_key)
+
+    # Another worker is recomputing
+    if entry is not None:
+        return entry['value']
+
+    deadline = time.monotonic() + lock_timeout
+    while time.monotonic() < deadline:
+        time.sleep(wait_interval)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry['value']
+        if cache.get(lock_key) is None:
+            break
+
+    logger.warning(f"Gave up waiting for {key} to be recomputed, computing it here")
+    return compute()
+
+
+def invalidate_dashboard_stats():
+    invalidate(DASHBOARD_STATS_KEY)
+
+
+def get_dashboard_stats(compute):
+    return get_or_compute(DASHBOARD_STATS_KEY, compute, settings.DASHBOARD_STATS_CACHE_TIMEOUT)
@@ -0,0 +1,103 @@
+"""
+Sparse fieldsets for read endpoints.
+
+`?fields=id,title,completed` returns only the listed fields and
+`?exclude=description,phases` everything but the listed ones; both take
+comma-separated names and can be combined. Unknown names are a 400.
+
+The selection also shapes the query. Columns no selected field reads are
+deferred, so large text such as descriptions is never read or decoded.
+Relations are only joined (select_related) or prefetched (prefetch_related)
+when a selected field shows them, so leaving out `phases` skips the phase
+query entirely.
+
+Serializers opt in with SparseFieldsMixin. A field is taken to read the
+column its source names; `field_columns` and `field_relations` declare what
+other fields, such as method fields, read.
+"""
+from rest_framework.exceptions import ValidationError
+
+
+class SparseFieldsMixin:
+    field_columns = {}
+    field_relations = {}
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name, field in list(self.fields.items()):
+                if name not in fields and not field.write_only:
+                    self.fields.pop(name)
+
+    @classmethod
+    def readable_field_names(cls):
+        return [name for name, field in cls().fields.items() if not field.write_only]
+
+    @classmethod
+    def field_sources(cls, names):
+        """The columns and relations the given fields read"""
+        fields = cls().fields
+        columns, relations = set(), set()
+        for name in names:
+            if name in cls.field_columns:
+                columns.update(cls.field_columns[name])
+            else:
+                columns.add(fields[name].source.split('.')[0])
+            relations.update(cls.field_relations.get(name, ()))
+        return columns, relations
+
+
+def requested_fields(request, available):
+    """
+    The names from `available` the request selects, in their order, or None
+    when it does not use ?fields= or ?exclude=
+    """
+    fields = request.query_params.get('fields')
+    exclude = request.query_params.get('exclude')
+    if fields is None and exclude is None:
+        return None
+
+    selected = list(available)
+    for param, value in (('fields', fields), ('exclude', exclude)):
+        if value is None:
+            continue
+        names = {name.strip() for name in value.split(',') if name.strip()}
+        unknown = names - set(available)
+        if unknown:
+            raise ValidationError({param: [f"Unknown field: {name}" for name in sorted(unknown)]})
+        if param == 'fields':
+            selected = [name for name in selected if name in names]
+        else:
+            selected = [name for name in selected if name not in names]
+    return selected
+
+
+def select(request, serializer_class, queryset, always=()):
+    """
+    Apply the request's field selection to a queryset without relations.
+    Returns the field names to pass to the serializer (None for all) and the
+    queryset with unread columns deferred and the needed relations loaded.
+    `always` names columns read outside the serializer, such as the
+    pagination ordering.
+    """
+    available = serializer_class.readable_field_names()
+    fields = requested_fields(request, available)
+    columns, relations = serializer_class.field_sources(available if fields is None else fields)
+    columns.update(always)
+
+    model = queryset.model
+    for relation in sorted(relations):
+        if model._meta.get_field(relation).many_to_one:
+            columns.add(relation)
+            queryset = queryset.select_related(relation)
+        else:
+            queryset = queryset.prefetch_related(relation)
+
+    if fields is not None:
+        deferred = [
+            field.name for field in model._meta.concrete_fields
+            if not field.primary_key and field.name not in columns
+        ]
+        if deferred:
+            queryset = queryset.defer(*deferred)
+    return fields, queryset
@@ -0,0 +1,111 @@
+"""
+Password hashing off the request thread.
+
+PBKDF2 costs tens of milliseconds of CPU per call. The async auth views hand
+it to a small dedicated thread pool so the event loop, and the thread that
+runs the sync views under ASGI, stay free for cheap requests. The pool has a
+fixed number of workers and a cap on queued calls: past the cap a request is
+turned away with 503 at once rather than waiting behind a long burst.
+
+Only pure hashing runs in the pool; callers do their database work through
+`sync_to_async` as usual. Sync views use `make_password_sync()`, which waits
+for the pool from the request thread, so their hashing is bounded the same way.
+"""
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import hashers
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+logger = logging.getLogger(__name__)
+
+
+class HasherBusy(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Too many sign-in requests right now, please try again shortly.'
+    default_code = 'hasher_busy'
+    wait = 1  # Sent as Retry-After by DRF's exception handler
+
+
+_executor = None
+_executor_lock = threading.Lock()
+_pending = 0
+_pending_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.PASSWORD_HASHER_WORKERS,
+                    thread_name_prefix='password-hasher',
+                )
+    return _executor
+
+
+def _submit(func, *args, **kwargs):
+    """Queue a hashing call in the pool, or raise HasherBusy when the queue is full"""
+    global _pending
+    with _pending_lock:
+        if _pending >= settings.PASSWORD_HASHER_QUEUE_LIMIT:
+            logger.warning(f"Password hasher queue full ({_pending} pending), rejecting request")
+            raise HasherBusy()
+        _pending += 1
+    try:
+        future = _get_executor().submit(func, *args, **kwargs)
+    except BaseException:
+        _finished(None)
+        raise
+    future.add_done_callback(_finished)
+    return future
+
+
+def _finished(future):
+    global _pending
+    with _pending_lock:
+        _pending -= 1
+
+
+async def run(func, *args, **kwargs):
+    """Run a hashing call in the pool, or raise HasherBusy when the queue is full"""
+    return await asyncio.wrap_future(_submit(func, *args, **kwargs))
+
+
+def run_sync(func, *args, **kwargs):
+    """`run()` for sync code: blocks the calling thread until the pool is done"""
+    return _submit(func, *args, **kwargs).result()
+
+
+def pending():
+    """Number of hashing calls queued or running in this process"""
+    return _pending
+
+
+def _verify(password, encoded):
+    upgrade = []
+    valid = hashers.check_password(password, encoded, setter=upgrade.append)
+    # The setter fires when the stored hash uses outdated parameters; the
+    # replacement is computed here too so the caller only has to store it
+    return valid, hashers.make_password(password) if valid and upgrade else None
+
+
+async def verify_password(password, encoded):
+    """
+    Check a raw password against a stored hash. Returns (valid, new_hash),
+    where new_hash is set when the stored hash should be upgraded.
+    """
+    return await run(_verify, password, encoded)
+
+
+async def make_password(password):
+    return await run(hashers.make_password, password)
+
+
+def make_password_sync(password):
+    return run_sync(hashers.make_password, password)
@@ -0,0 +1,108 @@
+"""
+Profile picture thumbnails.
+
+Uploads are stored as sent and then decoded once, off the request path, by
+a small per-process worker pool. The pool writes WebP copies in a few fixed
+sizes and records their storage names in `CustomUser.profile_thumbnails`.
+Serializers ask `picture_url()` for the size their endpoint needs, and get
+the original until its thumbnails are ready.
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, transaction
+from PIL import Image, ImageOps
+
+from .authentication import invalidate_user
+
+logger = logging.getLogger(__name__)
+
+# Longest edge in pixels for each size
+SIZES = {
+    'avatar': 96,   # Rows of the admin project list
+    'list': 256,    # User lists
+    'full': 1024,   # Profile screens
+}
+THUMBNAIL_DIR = 'profile_pics/thumbs/'
+WEBP_QUALITY = 80
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.IMAGE_WORKERS,
+                    thread_name_prefix='image-worker',
+                )
+    return _executor
+
+
+def schedule(user_id):
+    """Generate the user's thumbnails in the pool once the current transaction commits"""
+    transaction.on_commit(lambda: _get_executor().submit(_run, user_id))
+
+
+def _run(user_id):
+    try:
+        process_profile_picture(user_id)
+    except Exception:
+        logger.exception(f"Thumbnail generation failed for user {user_id}")
+    finally:
+        close_old_connections()
+
+
+def process_profile_picture(user_id):
+    """
+    Write the thumbnails of the user's current picture and record them.
+    Returns the new {size: name} map, or None when there is nothing to do.
+    """
+    User = get_user_model()
+    user = User.objects.filter(pk=user_id).only('profile_picture', 'profile_thumbnails').first()
+    if user is None or not user.profile_picture:
+        return None
+
+    name = user.profile_picture.name
+    storage = user.profile_picture.storage
+    with storage.open(name, 'rb') as f:
+        image = Image.open(f)
+        # Lets JPEG decode at a reduced scale instead of full resolution
+        image.draft('RGB', (max(SIZES.values()),) * 2)
+        image = ImageOps.exif_transpose(image)
+        image = image.convert('RGBA' if 'A' in image.getbands() or 'transparency' in image.info else 'RGB')
+
+    thumbnails = {}
+    for size, edge in SIZES.items():
+        resized = image.copy()
+        resized.thumbnail((edge, edge), Image.LANCZOS)
+        buffer = BytesIO()
+        resized.save(buffer, 'WEBP', quality=WEBP_QUALITY)
+        # Content-addressed storage names the file after its bytes
+        thumbnails[size] = storage.save(f'{THUMBNAIL_DIR}{size}.webp', ContentFile(buffer.getvalue()))
+
+    # Only record them if the picture was not replaced in the meantime.
+    # Files left unreferenced are removed by prune_media.
+    if not User.objects.filter(pk=user_id, profile_picture=name).update(profile_thumbnails=thumbnails):
+        return None
+    invalidate_user(user_id)
+    logger.info(f"Generated profile picture thumbnails for user {user_id}")
+    return thumbnails
+
+
+def picture_url(user, size):
+    """URL of the user's picture at `size`, falling back to the original"""
+    if not user.profile_picture:
+        return None
+    name = (user.profile_thumbnails or {}).get(size)
+    if name:
+        return user.profile_picture.storage.url(name)
+    return user.profile_picture.url
@@ -0,0 +1,64 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from api.activity import project_event, signup_event
+from api.models import ActivityEvent, CustomUser, Project
+
+UPDATE_THRESHOLD = timedelta(seconds=1)
+
+
+class Command(BaseCommand):
+    help = "Populate the activity event log from existing users and projects"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--clear', action='store_true',
+            help="Delete existing events before backfilling",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+
+        if ActivityEvent.objects.exists():
+            if not options['clear']:
+                raise CommandError("Activity events already exist; rerun with --clear to rebuild them")
+            deleted, _ = ActivityEvent.objects.all().delete()
+            self.stdout.write(f"Deleted {deleted} existing events")
+
+        total = 0
+        batch = []
+
+        def flush():
+            nonlocal total, batch
+            with transaction.atomic():
+                ActivityEvent.objects.bulk_create(batch)
+            total += len(batch)
+            batch = []
+
+        for user in CustomUser.objects.order_by('pk').iterator(chunk_size=batch_size):
+            batch.append(signup_event(user))
+            if len(batch) >= batch_size:
+                flush()
+
+        projects = (
+            Project.objects.select_related('user')
+            .only('id', 'title', 'user_id', 'user__email', 'created_at', 'updated_at', 'completed', 'completed_at')
+            .order_by('pk')
+        )
+        for project in projects.iterator(chunk_size=batch_size):
+            email = project.user.email
+            batch.append(project_event(project, ActivityEvent.PROJECT_CREATED, email, timestamp=project.created_at))
+            # auto_now/auto_now_add differ by microseconds on creation
+            if project.updated_at - project.created_at > UPDATE_THRESHOLD:
+                batch.append(project_event(project, ActivityEvent.PROJECT_UPDATED, email, timestamp=project.updated_at))
+            if project.completed and project.completed_at:
+                batch.append(project_event(project, ActivityEvent.PROJECT_COMPLETED, email, timestamp=project.completed_at))
+            if len(batch) >= batch_size:
+                flush()
+
+        if batch:
+            flush()
+        self.stdout.write(self.style.SUCCESS(f"Created {total} activity events"))
@@ -0,0 +1,55 @@
+from io import BytesIO
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from api import benchmarks
+from api.parsers import ORJSONParser
+from api.renderers import ORJSONRenderer, orjson
+from api.serializers import AdminProjectSerializer, ProjectSerializer
+
+
+class Command(BaseCommand):
+    help = "Compare the orjson renderer and parser with DRF's JSON classes on sample project payloads"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--projects', type=int, default=500, help="Projects per payload")
+        parser.add_argument('--repeat', type=int, default=5, help="Runs per measurement (best is reported)")
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            raise CommandError("orjson is not installed")
+
+        projects = benchmarks.sample_projects(options['projects'])
+        payloads = {
+            'project list': ProjectSerializer(projects, many=True).data,
+            'admin project list': {'projects': AdminProjectSerializer(projects, many=True).data},
+            'raw values': benchmarks.raw_values_payload(),
+        }
+
+        self.stdout.write(f"{'payload':<20}{'size':>10}{'render json':>14}{'orjson':>10}{'speedup':>9}"
+                          f"{'parse json':>13}{'orjson':>10}{'speedup':>9}")
+        for name, data in payloads.items():
+            expected = JSONRenderer().render(data)
+            rendered = ORJSONRenderer().render(data)
+            if rendered != expected:
+                raise CommandError(f"{name}: orjson output differs from JSONRenderer")
+
+            render_json = benchmarks.best_of(lambda: JSONRenderer().render(data), options['repeat'])
+            render_orjson = benchmarks.best_of(lambda: ORJSONRenderer().render(data), options['repeat'])
+            parse_json = benchmarks.best_of(lambda: self.parse(JSONParser(), expected), options['repeat'])
+            parse_orjson = benchmarks.best_of(lambda: self.parse(ORJSONParser(), expected), options['repeat'])
+            if self.parse(ORJSONParser(), expected) != self.parse(JSONParser(), expected):
+                raise CommandError(f"{name}: orjson parse result differs from JSONParser")
+
+            self.stdout.write(
+                f"{name:<20}{len(expected) // 1024:>8}KB"
+                f"{render_json * 1000:>12.2f}ms{render_orjson * 1000:>8.2f}ms{render_json / render_orjson:>8.1f}x"
+                f"{parse_json * 1000:>11.2f}ms{parse_orjson * 1000:>8.2f}ms{parse_json / parse_orjson:>8.1f}x"
+            )
+        self.stdout.write("Output is byte-identical for every payload")
+
+    @staticmethod
+    def parse(parser, body):
+        return parser.parse(BytesIO(body))
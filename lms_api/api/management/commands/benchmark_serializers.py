@@ -0,0 +1,40 @@
+from unittest import mock
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from api import benchmarks
+from api.serializers import AdminProjectListSerializer, AdminProjectSerializer
+
+
+class Command(BaseCommand):
+    help = "Compare AdminProjectSerializer with AdminProjectListSerializer on sample project pages"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--projects', type=int, default=500, help="Projects per page")
+        parser.add_argument('--users', type=int, default=20, help="Distinct project owners")
+        parser.add_argument('--repeat', type=int, default=5, help="Runs per measurement (best is reported)")
+
+    def handle(self, *args, **options):
+        projects = benchmarks.sample_projects(options['projects'], users=options['users'])
+        request = RequestFactory().get('/api/admin/projects/')
+
+        def serialize(serializer_class):
+            return serializer_class(projects, many=True, context={'request': request}).data
+
+        # time_remaining depends on the clock, so compare at a fixed instant
+        with mock.patch('django.utils.timezone.now', return_value=timezone.now()):
+            if JSONRenderer().render(serialize(AdminProjectListSerializer)) != JSONRenderer().render(serialize(AdminProjectSerializer)):
+                raise CommandError("AdminProjectListSerializer output differs from AdminProjectSerializer")
+
+        rows = len(projects)
+        self.stdout.write(f"{'serializer':<30}{'time':>10}{'rows/sec':>12}")
+        results = {}
+        for serializer_class in (AdminProjectSerializer, AdminProjectListSerializer):
+            elapsed = benchmarks.best_of(lambda: serialize(serializer_class), options['repeat'])
+            results[serializer_class] = elapsed
+            self.stdout.write(f"{serializer_class.__name__:<30}{elapsed * 1000:>8.2f}ms{rows / elapsed:>12,.0f}")
+        speedup = results[AdminProjectSerializer] / results[AdminProjectListSerializer]
+        self.stdout.write(f"Output is byte-identical; {speedup:.1f}x faster")
@@ -0,0 +1,24 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from api import images
+
+
+class Command(BaseCommand):
+    help = "Generate profile picture thumbnails for users that have none"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help="Regenerate thumbnails for every user with a picture")
+
+    def handle(self, *args, **options):
+        users = get_user_model().objects.exclude(profile_picture='').exclude(profile_picture__isnull=True)
+        if not options['all']:
+            users = users.filter(profile_thumbnails={})
+        generated = 0
+        for user_id in users.values_list('pk', flat=True).iterator():
+            try:
+                if images.process_profile_picture(user_id):
+                    generated += 1
+            except Exception as e:
+                self.stderr.write(f"User {user_id}: {e}")
+        self.stdout.write(f"Generated thumbnails for {generated} users")
@@ -0,0 +1,44 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = "Delete uploaded media files that no user refers to any more"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--grace', type=int, default=3600,
+            help="Keep unreferenced files younger than GRACE seconds (uploads still in flight)",
+        )
+        parser.add_argument('--dry-run', action='store_true', help="Only list the files that would be deleted")
+
+    def handle(self, *args, **options):
+        referenced = set()
+        for picture, thumbnails in get_user_model().objects.values_list('profile_picture', 'profile_thumbnails').iterator():
+            if picture:
+                referenced.add(picture)
+            referenced.update((thumbnails or {}).values())
+
+        cutoff = time.time() - options['grace']
+        deleted = 0
+        for name in self.walk('profile_pics'):
+            if name in referenced or default_storage.get_modified_time(name).timestamp() > cutoff:
+                continue
+            if options['dry_run']:
+                self.stdout.write(name)
+            else:
+                default_storage.delete(name)
+            deleted += 1
+        self.stdout.write(f"{'Would delete' if options['dry_run'] else 'Deleted'} {deleted} unreferenced files")
+
+    def walk(self, directory):
+        if not default_storage.exists(directory):
+            return
+        directories, files = default_storage.listdir(directory)
+        for name in files:
+            yield f'{directory}/{name}'
+        for name in directories:
+            yield from self.walk(f'{directory}/{name}')
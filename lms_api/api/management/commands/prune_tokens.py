@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api import tokens
+
+
+class Command(BaseCommand):
+    help = "Delete expired outstanding and blacklisted refresh tokens"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None, help="Tokens deleted per batch")
+        parser.add_argument(
+            '--interval', type=int, default=0,
+            help="Keep running and prune every INTERVAL seconds (default: prune once)",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            deleted = tokens.prune_expired(batch_size=options['batch_size'])
+            self.stdout.write(f"Pruned {deleted} expired tokens")
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
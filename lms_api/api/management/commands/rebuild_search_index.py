@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from django.db import connections, transaction
+
+from api import search
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text index used by the admin project search"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default', help="Database alias to rebuild")
+
+    def handle(self, *args, **options):
+        conn = connections[options['database']]
+        if not search.is_supported(conn):
+            self.stdout.write(self.style.WARNING(
+                f"No full-text index for the '{conn.vendor}' backend; nothing to rebuild"
+            ))
+            return
+
+        with transaction.atomic(using=options['database']):
+            search.create_index(conn)
+            total = search.rebuild(conn)
+        self.stdout.write(self.style.SUCCESS(f"Indexed {total} projects"))
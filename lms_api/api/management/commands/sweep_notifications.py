@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api import notifications
+
+
+class Command(BaseCommand):
+    help = "Create due-soon, overdue and phase deadline notifications"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None, help="Users per batch")
+        parser.add_argument(
+            '--interval', type=int, default=0,
+            help="Keep running and sweep every INTERVAL seconds (default: sweep once)",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            submitted = notifications.sweep(batch_size=options['batch_size'])
+            self.stdout.write(f"Swept {submitted} candidate notifications")
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
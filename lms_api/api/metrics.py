@@ -0,0 +1,254 @@
+"""
+Per-route request metrics in the Prometheus text format.
+
+MetricsMiddleware records every request under the route it resolved to (the
+URL pattern: several routes share a URL name) and its method:
+- wall time;
+- number of database queries and the time spent in them, counted by an
+  execute wrapper installed on every connection;
+- time spent building `serializer.data`, in the list views that go
+  through `serialize()` (including queries a lazy queryset runs then);
+- time spent rendering the response body (ORJSONRenderer);
+- response size, for non-streaming responses;
+- a request count per status code.
+
+Each process keeps its histograms in memory. With METRICS_DIR set it also
+writes them to its own file in that directory, at most every
+METRICS_FLUSH_INTERVAL seconds and at exit, and `render()` sums the files of
+all workers. Files are named by process id and start time, so a new process
+that gets a stopped worker's pid does not overwrite its counts. A file whose
+process is no longer running is deleted when the metrics are next read, so
+the directory does not grow with every restart; its counts drop out of the
+totals, which Prometheus treats like any counter reset.
+"""
+import atexit
+import contextvars
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+PREFIX = 'lms_'
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+HISTOGRAMS = {
+    'request_duration_seconds': ("Request wall time", LATENCY_BUCKETS),
+    'db_queries': ("Database queries per request", (0, 1, 2, 5, 10, 20, 50, 100)),
+    'db_duration_seconds': ("Time spent in database queries per request", LATENCY_BUCKETS),
+    'serialize_duration_seconds': ("Time spent building serializer data", LATENCY_BUCKETS),
+    'render_duration_seconds': ("Time spent rendering the response body", LATENCY_BUCKETS),
+    'response_bytes': ("Response body size", (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)),
+}
+
+_current = contextvars.ContextVar('request_metrics', default=None)
+
+# Tells this process's file apart from one left by an earlier process with the same pid
+STARTED_AT = time.time_ns()
+
+
+class RequestStats:
+    __slots__ = ('queries', 'db_time', 'serialize_time', 'render_time')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.serialize_time = 0.0
+        self.render_time = 0.0
+
+
+@contextmanager
+def collecting():
+    """Collect the stats of the code run inside, including in sync_to_async threads"""
+    stats = RequestStats()
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def rendering():
+    stats = _current.get()
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        if stats is not None:
+            stats.render_time += time.perf_counter() - started
+
+
+def serialize(serializer):
+    """`serializer.data`, timed"""
+    stats = _current.get()
+    started = time.perf_counter()
+    try:
+        return serializer.data
+    finally:
+        if stats is not None:
+            stats.serialize_time += time.perf_counter() - started
+
+
+def record_query(execute, sql, params, many, context):
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.queries += 1
+        stats.db_time += time.perf_counter() - started
+
+
+@receiver(connection_created)
+def install_query_recorder(sender, connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+class Registry:
+    def __init__(self):
+        self._histograms = {}  # (name, route, method) -> [per-bucket counts..., +Inf count, sum]
+        self._requests = {}  # (route, method, status) -> count
+        self._lock = threading.Lock()
+        self._flushed_at = time.monotonic()
+        self._atexit_registered = False
+
+    def record(self, route, method, status, duration, stats, size=None):
+        values = {
+            'request_duration_seconds': duration,
+            'db_queries': stats.queries,
+            'db_duration_seconds': stats.db_time,
+            'serialize_duration_seconds': stats.serialize_time,
+            'render_duration_seconds': stats.render_time,
+        }
+        if size is not None:
+            values['response_bytes'] = size
+        with self._lock:
+            for name, value in values.items():
+                buckets = HISTOGRAMS[name][1]
+                series = self._histograms.get((name, route, method))
+                if series is None:
+                    series = self._histograms[(name, route, method)] = [0] * (len(buckets) + 1) + [0.0]
+                index = next((i for i, bound in enumerate(buckets) if value <= bound), len(buckets))
+                series[index] += 1
+                series[-1] += value
+            key = (route, method, str(status))
+            self._requests[key] = self._requests.get(key, 0) + 1
+        if settings.METRICS_DIR and time.monotonic() - self._flushed_at >= settings.METRICS_FLUSH_INTERVAL:
+            self.flush()
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'histograms': [[*key, list(series)] for key, series in self._histograms.items()],
+                'requests': [[*key, count] for key, count in self._requests.items()],
+            }
+
+    def flush(self):
+        """Write this process's metrics to its file in METRICS_DIR"""
+        self._flushed_at = time.monotonic()
+        if not self._atexit_registered:
+            self._atexit_registered = True
+            atexit.register(self.flush)
+        os.makedirs(settings.METRICS_DIR, exist_ok=True)
+        path = os.path.join(settings.METRICS_DIR, f'{os.getpid()}-{STARTED_AT}.json')
+        temporary = f'{path}.{threading.get_ident()}.tmp'
+        with open(temporary, 'w') as f:
+            json.dump(self.snapshot(), f)
+        os.replace(temporary, path)
+
+
+registry = Registry()
+
+
+def _is_running(pid):
+    if os.name == 'nt':  # No signal 0 to probe with; keep every file
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:  # Alive, under another user
+        return True
+    return True
+
+
+def _stopped(filename):
+    """Whether a metrics file was left by a process that no longer runs"""
+    try:
+        pid = int(filename.split('-', 1)[0])
+    except ValueError:
+        return False
+    return pid != os.getpid() and not _is_running(pid)
+
+
+def collect():
+    """Metrics of every worker, summed"""
+    if not settings.METRICS_DIR:
+        snapshots = [registry.snapshot()]
+    else:
+        registry.flush()
+        snapshots = []
+        for filename in os.listdir(settings.METRICS_DIR):
+            if not filename.endswith('.json'):
+                continue
+            path = os.path.join(settings.METRICS_DIR, filename)
+            if _stopped(filename):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+                continue
+            try:
+                with open(path) as f:
+                    snapshots.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+
+    histograms, requests = {}, {}
+    for snapshot in snapshots:
+        for name, route, method, series in snapshot['histograms']:
+            total = histograms.setdefault((name, route, method), [0] * len(series))
+            for i, value in enumerate(series):
+                total[i] += value
+        for route, method, status, count in snapshot['requests']:
+            requests[(route, method, status)] = requests.get((route, method, status), 0) + count
+    return histograms, requests
+
+
+def _labels(**labels):
+    def escape(value):
+        return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return '{' + ','.join(f'{key}="{escape(value)}"' for key, value in labels.items()) + '}'
+
+
+def render():
+    """The metrics of every worker in the Prometheus text format"""
+    histograms, requests = collect()
+    lines = []
+    for name, (description, buckets) in HISTOGRAMS.items():
+        metric = PREFIX + name
+        lines += [f'# HELP {metric} {description}', f'# TYPE {metric} histogram']
+        for (series_name, route, method), series in sorted(histograms.items()):
+            if series_name != name:
+                continue
+            cumulative = 0
+            for bound, count in zip([*buckets, '+Inf'], series[:-1]):
+                cumulative += count
+                lines.append(f'{metric}_bucket{_labels(route=route, method=method, le=bound)} {cumulative}')
+            lines.append(f'{metric}_sum{_labels(route=route, method=method)} {series[-1]}')
+            lines.append(f'{metric}_count{_labels(route=route, method=method)} {cumulative}')
+
+    metric = PREFIX + 'requests_total'
+    lines += [f'# HELP {metric} Requests by route, method and status', f'# TYPE {metric} counter']
+    for (route, method, status), count in sorted(requests.items()):
+        lines.append(f'{metric}{_labels(route=route, method=method, status=status)} {count}')
+    return '\n'.join(lines) + '\n'
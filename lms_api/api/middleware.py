@@ -0,0 +1,84 @@
+"""
+Project middleware.
+"""
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from rest_framework.permissions import SAFE_METHODS
+
+from . import metrics
+from .routers import pin_to_primary, replica_configured
+
+
+class MetricsMiddleware:
+    """Record per-route request metrics (see api/metrics.py)"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        started = time.perf_counter()
+        with metrics.collecting() as stats:
+            response = self.get_response(request)
+        self.record(request, response, time.perf_counter() - started, stats)
+        return response
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        # Views run through sync_to_async still see the stats: the context is copied
+        with metrics.collecting() as stats:
+            response = await self.get_response(request)
+        self.record(request, response, time.perf_counter() - started, stats)
+        return response
+
+    def record(self, request, response, duration, stats):
+        match = getattr(request, 'resolver_match', None)
+        route = match.route if match is not None else 'unresolved'
+        size = None if response.streaming else len(response.content)
+        metrics.registry.record(route, request.method, response.status_code, duration, stats, size)
+
+
+class ReplicaPinMiddleware:
+    """
+    After a successful write by an authenticated user, keep that user's
+    reads on the primary database for a while (see api/routers.py).
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        response = self.get_response(request)
+        if self.should_pin(request, response):
+            self.pin(request)
+        return response
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        if self.should_pin(request, response):
+            # request.user may still be a lazy session user, loaded on access
+            await sync_to_async(self.pin)(request)
+        return response
+
+    def should_pin(self, request, response):
+        return request.method not in SAFE_METHODS and response.status_code < 400 and replica_configured()
+
+    def pin(self, request):
+        # DRF views set request.user once they have authenticated
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            pin_to_primary(user.pk)
@@ -0,0 +1,57 @@
+from django.db import migrations
+
+# The SQL is copied from api/search.py as it stood when this migration was
+# written, so later changes to that module cannot alter what it does.
+
+SQLITE_CREATE = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS api_project_search USING fts5("
+    "title, description, category, email, first_name, last_name, "
+    "tokenize = 'unicode61 remove_diacritics 2')",
+    "DELETE FROM api_project_search",
+    "INSERT INTO api_project_search "
+    "(rowid, title, description, category, email, first_name, last_name) "
+    "SELECT p.id, p.title, p.description, p.category, u.email, u.first_name, u.last_name "
+    "FROM api_project p JOIN api_customuser u ON u.id = p.user_id",
+]
+
+POSTGRESQL_CREATE = [
+    "CREATE TABLE IF NOT EXISTS api_project_search ("
+    "project_id bigint PRIMARY KEY REFERENCES api_project(id) "
+    "ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, "
+    "document tsvector NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS api_project_search_document_idx "
+    "ON api_project_search USING GIN (document)",
+    "INSERT INTO api_project_search (project_id, document) "
+    "SELECT p.id, "
+    "setweight(to_tsvector('simple', coalesce(p.title, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(p.category, '')), 'B') || "
+    "setweight(to_tsvector('simple', regexp_replace(u.email, '[@._+-]', ' ', 'g') "
+    "|| ' ' || u.first_name || ' ' || u.last_name), 'C') || "
+    "setweight(to_tsvector('simple', coalesce(p.description, '')), 'D') "
+    "FROM api_project p JOIN api_customuser u ON u.id = p.user_id "
+    "ON CONFLICT (project_id) DO UPDATE SET document = EXCLUDED.document",
+]
+
+CREATE = {'sqlite': SQLITE_CREATE, 'postgresql': POSTGRESQL_CREATE}
+
+
+def create_search_index(apps, schema_editor):
+    statements = CREATE.get(schema_editor.connection.vendor, [])
+    for sql in statements:
+        schema_editor.execute(sql)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor in CREATE:
+        schema_editor.execute("DROP TABLE IF EXISTS api_project_search")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_admin_project_list_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,46 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """
+    First step of the typed date/time conversion: add nullable typed columns
+    next to the old string ones. Adding nullable columns does not rewrite the
+    table, and the string columns keep serving reads until 0007 swaps them.
+    """
+
+    dependencies = [
+        ('api', '0004_project_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='typed_start_date',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='typed_end_date',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='typed_start_time',
+            field=models.TimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='typed_end_time',
+            field=models.TimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='typed_completed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='deadline',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+    ]
@@ -0,0 +1,109 @@
+import logging
+from datetime import datetime, time
+
+from django.db import migrations, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime, parse_time
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 1000
+DEFAULT_END_TIME = time(23, 59)
+
+
+def _to_date(value):
+    if not value:
+        return None
+    try:
+        # Accept both "YYYY-MM-DD" and full ISO datetimes
+        return parse_date(value.strip()[:10])
+    except ValueError:
+        return None
+
+
+def _to_time(value):
+    if not value:
+        return None
+    try:
+        return parse_time(value.strip())
+    except ValueError:
+        return None
+
+
+def _to_datetime(value):
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        parsed = parse_datetime(value)
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        # Older rows were stored as "%Y-%m-%d %H:%M"
+        try:
+            parsed = datetime.strptime(value, "%Y-%m-%d %H:%M")
+        except ValueError:
+            return None
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def backfill_typed_dates(apps, schema_editor):
+    """
+    Copy the string date/time columns into the typed ones in primary key
+    order, one short transaction per batch, so a large table is never held
+    locked for the whole run.
+    """
+    Project = apps.get_model('api', 'Project')
+    db_alias = schema_editor.connection.alias
+    last_pk = 0
+    skipped = 0
+
+    while True:
+        batch = list(
+            Project.objects.using(db_alias)
+            .filter(pk__gt=last_pk)
+            .order_by('pk')
+            .only('pk', 'start_date', 'end_date', 'start_time', 'end_time', 'completed_at')[:BATCH_SIZE]
+        )
+        if not batch:
+            break
+
+        for project in batch:
+            project.typed_start_date = _to_date(project.start_date)
+            project.typed_end_date = _to_date(project.end_date)
+            project.typed_start_time = _to_time(project.start_time)
+            project.typed_end_time = _to_time(project.end_time)
+            project.typed_completed_at = _to_datetime(project.completed_at)
+            project.deadline = (
+                timezone.make_aware(datetime.combine(
+                    project.typed_end_date, project.typed_end_time or DEFAULT_END_TIME
+                ))
+                if project.typed_end_date else None
+            )
+            if project.end_date and project.typed_end_date is None:
+                skipped += 1
+
+        with transaction.atomic(using=db_alias):
+            Project.objects.using(db_alias).bulk_update(batch, [
+                'typed_start_date', 'typed_end_date', 'typed_start_time',
+                'typed_end_time', 'typed_completed_at', 'deadline',
+            ])
+        last_pk = batch[-1].pk
+
+    if skipped:
+        logger.warning(f"{skipped} projects had an unparseable end_date and were left without one")
+
+
+class Migration(migrations.Migration):
+    # Each batch commits on its own instead of wrapping the whole backfill
+    atomic = False
+
+    dependencies = [
+        ('api', '0005_project_typed_date_columns'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_typed_dates, migrations.RunPython.noop),
+    ]
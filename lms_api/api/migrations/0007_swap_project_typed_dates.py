@@ -0,0 +1,37 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """
+    Last step of the typed date/time conversion: drop the string columns,
+    give the typed ones their names and index the deadline lookups.
+    """
+
+    dependencies = [
+        ('api', '0006_backfill_project_typed_dates'),
+    ]
+
+    operations = [
+        migrations.RemoveField(model_name='project', name='start_date'),
+        migrations.RemoveField(model_name='project', name='end_date'),
+        migrations.RemoveField(model_name='project', name='start_time'),
+        migrations.RemoveField(model_name='project', name='end_time'),
+        migrations.RemoveField(model_name='project', name='completed_at'),
+        migrations.RenameField(model_name='project', old_name='typed_start_date', new_name='start_date'),
+        migrations.RenameField(model_name='project', old_name='typed_end_date', new_name='end_date'),
+        migrations.RenameField(model_name='project', old_name='typed_start_time', new_name='start_time'),
+        migrations.RenameField(model_name='project', old_name='typed_end_time', new_name='end_time'),
+        migrations.RenameField(model_name='project', old_name='typed_completed_at', new_name='completed_at'),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(fields=['completed', 'end_date'], name='project_completed_end_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(fields=['user', 'end_date'], name='project_user_end_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(fields=['completed', 'deadline'], name='project_completed_deadline_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.1.6 on 2026-10-17 04:22
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_swap_project_typed_dates'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ActivityEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event_type', models.CharField(choices=[('user_signup', 'User signup'), ('project_created', 'Project created'), ('project_updated', 'Project updated'), ('project_completed', 'Project completed')], max_length=32)),
+                ('timestamp', models.DateTimeField(default=django.utils.timezone.now)),
+                ('title', models.CharField(max_length=512)),
+                ('description', models.CharField(blank=True, max_length=512)),
+                ('user_id', models.BigIntegerField(blank=True, null=True)),
+                ('project_id', models.BigIntegerField(blank=True, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-timestamp', '-id'], name='activity_timestamp_idx'), models.Index(fields=['project_id', 'event_type'], name='activity_project_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.1.6 on 2026-10-17 04:23
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_activity_event'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Notification',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('due_soon', 'Project due soon'), ('overdue', 'Project overdue'), ('phase_due_soon', 'Phase due soon')], max_length=32)),
+                ('phase_index', models.PositiveIntegerField(blank=True, null=True)),
+                ('title', models.CharField(max_length=255)),
+                ('message', models.CharField(max_length=512)),
+                ('due_at', models.DateTimeField()),
+                ('dedupe_key', models.CharField(max_length=128, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('read_at', models.DateTimeField(blank=True, null=True)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notifications', to='api.project')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notifications', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(condition=models.Q(('read_at__isnull', True)), fields=['user', '-created_at'], name='notification_unread_idx')],
+            },
+        ),
+    ]
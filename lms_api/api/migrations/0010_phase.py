@@ -0,0 +1,40 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """
+    First step of moving phases out of the JSON blob: keep the blob under a
+    temporary name and create the Phase table that takes over `phases`.
+    """
+
+    dependencies = [
+        ('api', '0009_notification'),
+    ]
+
+    operations = [
+        migrations.RenameField(model_name='project', old_name='phases', new_name='legacy_phases'),
+        migrations.CreateModel(
+            name='Phase',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('order', models.PositiveIntegerField(default=0)),
+                ('name', models.CharField(max_length=255)),
+                ('start_date', models.DateField(blank=True, null=True)),
+                ('end_date', models.DateField(blank=True, null=True)),
+                ('start_time', models.TimeField(blank=True, null=True)),
+                ('end_time', models.TimeField(blank=True, null=True)),
+                ('deadline', models.DateTimeField(blank=True, editable=False, null=True)),
+                ('comment', models.TextField(blank=True, default='')),
+                ('completed', models.BooleanField(default=False)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='phases', to='api.project')),
+            ],
+            options={
+                'ordering': ['order', 'id'],
+                'indexes': [
+                    models.Index(fields=['project', 'order'], name='phase_project_order_idx'),
+                    models.Index(fields=['completed', 'deadline'], name='phase_completed_deadline_idx'),
+                ],
+            },
+        ),
+    ]
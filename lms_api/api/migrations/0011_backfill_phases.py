@@ -0,0 +1,102 @@
+from datetime import datetime, time
+
+from django.db import migrations, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime, parse_time
+
+BATCH_SIZE = 500
+DEFAULT_END_TIME = time(23, 59)
+
+
+def _to_date(value):
+    if not value:
+        return None
+    try:
+        return parse_date(str(value).strip()[:10])
+    except ValueError:
+        return None
+
+
+def _to_time(value):
+    if not value:
+        return None
+    value = str(value).strip()
+    try:
+        if 'T' in value:
+            # Some clients sent full ISO datetimes for phase times
+            parsed = parse_datetime(value)
+            return parsed.time() if parsed else None
+        return parse_time(value)
+    except ValueError:
+        return None
+
+
+def backfill_phases(apps, schema_editor):
+    """
+    Turn each project's phases JSON list into Phase rows, in primary key
+    batches with one short transaction per batch. A project's phases are
+    written in one batch, so projects that already have phases were done by
+    an earlier, interrupted run and are skipped.
+    """
+    Project = apps.get_model('api', 'Project')
+    Phase = apps.get_model('api', 'Phase')
+    db_alias = schema_editor.connection.alias
+    last_pk = 0
+
+    while True:
+        batch = list(
+            Project.objects.using(db_alias)
+            .filter(pk__gt=last_pk)
+            .order_by('pk')
+            .values_list('pk', 'legacy_phases')[:BATCH_SIZE]
+        )
+        if not batch:
+            break
+
+        done = set(
+            Phase.objects.using(db_alias)
+            .filter(project_id__in=[project_id for project_id, _ in batch])
+            .values_list('project_id', flat=True)
+            .distinct()
+        )
+        phases = []
+        for project_id, legacy_phases in batch:
+            if project_id in done or not isinstance(legacy_phases, list):
+                continue
+            for order, data in enumerate(legacy_phases):
+                if not isinstance(data, dict):
+                    continue
+                end_date = _to_date(data.get('end_date'))
+                end_time = _to_time(data.get('end_time'))
+                phases.append(Phase(
+                    project_id=project_id,
+                    order=order,
+                    name=str(data.get('name') or f'Phase {order + 1}')[:255],
+                    start_date=_to_date(data.get('start_date')),
+                    end_date=end_date,
+                    start_time=_to_time(data.get('start_time')),
+                    end_time=end_time,
+                    deadline=(
+                        timezone.make_aware(datetime.combine(end_date, end_time or DEFAULT_END_TIME))
+                        if end_date else None
+                    ),
+                    comment=data.get('comment') or '',
+                    completed=bool(data.get('completed')),
+                ))
+
+        with transaction.atomic(using=db_alias):
+            Phase.objects.using(db_alias).bulk_create(phases)
+        last_pk = batch[-1][0]
+
+
+class Migration(migrations.Migration):
+    # Each batch commits on its own instead of wrapping the whole backfill
+    atomic = False
+
+    dependencies = [
+        ('api', '0010_phase'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_phases, migrations.RunPython.noop),
+    ]
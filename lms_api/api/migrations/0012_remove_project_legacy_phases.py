@@ -0,0 +1,12 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_backfill_phases'),
+    ]
+
+    operations = [
+        migrations.RemoveField(model_name='project', name='legacy_phases'),
+    ]
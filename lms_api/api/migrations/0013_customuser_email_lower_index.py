@@ -0,0 +1,19 @@
+# Generated by Django 5.1.6 on 2026-10-17 04:29
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_remove_project_legacy_phases'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='customuser',
+            index=models.Index(django.db.models.functions.text.Lower('email'), name='customuser_email_lower_idx'),
+        ),
+    ]
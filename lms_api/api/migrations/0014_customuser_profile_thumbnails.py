@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-17 04:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_customuser_email_lower_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='profile_thumbnails',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
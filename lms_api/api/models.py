@@ -1,11 +1,24 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.db.models.functions import Lower
 from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.utils import timezone
-from datetime import datetime, timedelta
+from datetime import datetime, time, timedelta
 from django.core.validators import FileExtensionValidator
 
+# Deadline time used for projects that have an end date but no end time
+DEFAULT_END_TIME = time(23, 59)
+
+
+def combine_deadline(instance, end_date, end_time):
+    """Combine an end date and time into an aware datetime (end of day if no time)"""
+    end_date = instance._meta.get_field('end_date').to_python(end_date)
+    if not end_date:
+        return None
+    end_time = instance._meta.get_field('end_time').to_python(end_time) or DEFAULT_END_TIME
+    return timezone.make_aware(datetime.combine(end_date, end_time))
+
 class CustomUser(AbstractUser):
     email = models.EmailField(unique=True, verbose_name="email address")
     first_name = models.CharField(max_length=30, blank=True)
@@ -18,6 +31,8 @@ class CustomUser(AbstractUser):
         validators=[FileExtensionValidator(allowed_extensions=['jpg', 'jpeg', 'png'])],
         help_text="Upload a profile picture (JPG/PNG)"
     )
+    # Resized WebP copies of profile_picture by size name (see api/images.py)
+    profile_thumbnails = models.JSONField(default=dict, blank=True)
     updated_at = models.DateTimeField(auto_now=True)  # Helpful for cache busting
 
     USERNAME_FIELD = 'email'  
@@ -26,41 +41,183 @@ class CustomUser(AbstractUser):
     class Meta:
         verbose_name = "User"
         verbose_name_plural = "Users"
+        indexes = [
+            # Serves the case-insensitive email lookup at login
+            models.Index(Lower('email'), name='customuser_email_lower_idx'),
+        ]
 
     def __str__(self):
         return self.username or self.email
 
-    def delete(self, *args, **kwargs):
-        """Delete the associated profile picture when user is deleted"""
-        if self.profile_picture:
-            storage, path = self.profile_picture.storage, self.profile_picture.path
-            super().delete(*args, **kwargs)
-            storage.delete(path)
-        else:
-            super().delete(*args, **kwargs)
-
 
 
 class Project(models.Model):
     title = models.CharField(max_length=255)
     description = models.TextField(blank=True, null=True)
     category = models.CharField(max_length=100, blank=True, null=True)  # Optional category field
-    start_date = models.CharField(max_length=255, blank=True, null=True)
-    end_date = models.CharField(max_length=255, blank=True, null=True)
-    start_time = models.CharField(max_length=255, blank=True, null=True)
-    end_time = models.CharField(max_length=255, blank=True, null=True)
-    phases = models.JSONField(default=dict)  # Store phases in list format
+    start_date = models.DateField(blank=True, null=True)
+    end_date = models.DateField(blank=True, null=True)
+    start_time = models.TimeField(blank=True, null=True)
+    end_time = models.TimeField(blank=True, null=True)
+    # end_date + end_time (end of day when no time is set), kept in sync on save
+    deadline = models.DateTimeField(blank=True, null=True, editable=False)
     completed = models.BooleanField(default=False)
-    completed_at = models.CharField(max_length=255, blank=True, null=True)
+    completed_at = models.DateTimeField(blank=True, null=True)
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='projects')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Serves the per-user keyset pagination on (-created_at, id)
+            models.Index(fields=['user', '-created_at', 'id'], name='project_user_created_idx'),
+            # Serves the max(updated_at) lookup behind the project list ETag
+            models.Index(fields=['user', 'updated_at'], name='project_user_updated_idx'),
+            # Serves the admin-wide keyset pagination
+            models.Index(fields=['-created_at', 'id'], name='project_created_idx'),
+            # Serve the time_frame / overdue filters and deadline lookups
+            models.Index(fields=['completed', 'end_date'], name='project_completed_end_idx'),
+            models.Index(fields=['user', 'end_date'], name='project_user_end_idx'),
+            models.Index(fields=['completed', 'deadline'], name='project_completed_deadline_idx'),
+        ]
+
     def clean(self):
         if self.start_date and self.end_date and self.start_date > self.end_date:
             raise ValidationError("End date cannot be before start date.")
         if self.start_time and self.end_time and self.start_time > self.end_time:
             raise ValidationError("End time cannot be before start time.")
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored completion state to detect completions on save
+        instance._loaded_completed = instance.__dict__.get('completed')
+        return instance
+
+    def save(self, *args, **kwargs):
+        self.deadline = self.compute_deadline()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'end_date', 'end_time'} & set(update_fields):
+            kwargs['update_fields'] = set(update_fields) | {'deadline'}
+        super().save(*args, **kwargs)
+
+    def compute_deadline(self):
+        return combine_deadline(self, self.end_date, self.end_time)
+
+    def __str__(self):
+        return self.title
+
+
+
+class Phase(models.Model):
+    """One step of a project, stored as its own row so it can be updated alone"""
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='phases')
+    order = models.PositiveIntegerField(default=0)
+    name = models.CharField(max_length=255)
+    start_date = models.DateField(blank=True, null=True)
+    end_date = models.DateField(blank=True, null=True)
+    start_time = models.TimeField(blank=True, null=True)
+    end_time = models.TimeField(blank=True, null=True)
+    # end_date + end_time (end of day when no time is set), kept in sync on save
+    deadline = models.DateTimeField(blank=True, null=True, editable=False)
+    comment = models.TextField(blank=True, default='')
+    completed = models.BooleanField(default=False)
+
+    class Meta:
+        ordering = ['order', 'id']
+        indexes = [
+            models.Index(fields=['project', 'order'], name='phase_project_order_idx'),
+            # Serves the phase due-soon lookups of the notification sweep
+            models.Index(fields=['completed', 'deadline'], name='phase_completed_deadline_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.deadline = self.compute_deadline()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'end_date', 'end_time'} & set(update_fields):
+            kwargs['update_fields'] = set(update_fields) | {'deadline'}
+        super().save(*args, **kwargs)
+
+    def compute_deadline(self):
+        return combine_deadline(self, self.end_date, self.end_time)
+
+    def __str__(self):
+        return self.name
+
+
+class ActivityEvent(models.Model):
+    """
+    Append-only log of user and project events shown in the admin activity feed.
+    Titles and descriptions are written once, so reading a page never joins
+    back to users or projects.
+    """
+    USER_SIGNUP = 'user_signup'
+    PROJECT_CREATED = 'project_created'
+    PROJECT_UPDATED = 'project_updated'
+    PROJECT_COMPLETED = 'project_completed'
+    EVENT_TYPES = [
+        (USER_SIGNUP, 'User signup'),
+        (PROJECT_CREATED, 'Project created'),
+        (PROJECT_UPDATED, 'Project updated'),
+        (PROJECT_COMPLETED, 'Project completed'),
+    ]
+
+    event_type = models.CharField(max_length=32, choices=EVENT_TYPES)
+    timestamp = models.DateTimeField(default=timezone.now)
+    title = models.CharField(max_length=512)
+    description = models.CharField(max_length=512, blank=True)
+    # Plain ids rather than foreign keys: history outlives deleted rows
+    user_id = models.BigIntegerField(blank=True, null=True)
+    project_id = models.BigIntegerField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            # Serves the keyset pagination on (timestamp desc, id desc)
+            models.Index(fields=['-timestamp', '-id'], name='activity_timestamp_idx'),
+            # Finds later "updated" events of a project when the feed coalesces them
+            models.Index(fields=['project_id', 'event_type'], name='activity_project_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.event_type}: {self.title}"
+
+
+
+class Notification(models.Model):
+    """
+    Deadline reminders precomputed by the notification sweep
+    (see api.notifications) so polling clients only read their unread rows.
+    """
+    DUE_SOON = 'due_soon'
+    OVERDUE = 'overdue'
+    PHASE_DUE_SOON = 'phase_due_soon'
+    KINDS = [
+        (DUE_SOON, 'Project due soon'),
+        (OVERDUE, 'Project overdue'),
+        (PHASE_DUE_SOON, 'Phase due soon'),
+    ]
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='notifications')
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='notifications')
+    kind = models.CharField(max_length=32, choices=KINDS)
+    phase_index = models.PositiveIntegerField(blank=True, null=True)
+    title = models.CharField(max_length=255)
+    message = models.CharField(max_length=512)
+    due_at = models.DateTimeField()
+    # project/kind/phase id/deadline, so a sweep never repeats a reminder but
+    # a rescheduled deadline gets a new one
+    dedupe_key = models.CharField(max_length=128, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    read_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['user', '-created_at'],
+                condition=models.Q(read_at__isnull=True),
+                name='notification_unread_idx',
+            ),
+        ]
+
     def __str__(self):
         return self.title
@@ -0,0 +1,116 @@
+"""
+Notification sweep.
+
+Run periodically (see the `sweep_notifications` command). Each sweep walks
+users in id batches and turns deadlines into Notification rows:
+
+* projects due within NOTIFICATION_DUE_SOON_HOURS,
+* projects that went overdue within NOTIFICATION_OVERDUE_LOOKBACK_DAYS,
+* unfinished phases of open projects due within the same due-soon window.
+
+Project and phase lookups go through their (completed, deadline) indexes.
+Rows carry a dedupe key and are inserted with ignore_conflicts, so running a
+sweep twice creates nothing new.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+from .models import Notification, Phase, Project
+
+logger = logging.getLogger(__name__)
+
+CustomUser = get_user_model()
+
+
+def _dedupe_key(project_id, kind, due_at, phase_id=None):
+    phase = '' if phase_id is None else phase_id
+    return f"{project_id}:{kind}:{phase}:{int(due_at.timestamp())}"
+
+
+def _project_notification(project, kind):
+    if kind == Notification.OVERDUE:
+        title = f'Project overdue: {project.title}'
+        message = f'"{project.title}" passed its deadline on {project.deadline:%Y-%m-%d %H:%M}'
+    else:
+        title = f'Project due soon: {project.title}'
+        message = f'"{project.title}" is due on {project.deadline:%Y-%m-%d %H:%M}'
+    return Notification(
+        user_id=project.user_id,
+        project_id=project.pk,
+        kind=kind,
+        title=title,
+        message=message,
+        due_at=project.deadline,
+        dedupe_key=_dedupe_key(project.pk, kind, project.deadline),
+    )
+
+
+def _phase_notification(phase):
+    name = phase.name or f'Phase {phase.order + 1}'
+    return Notification(
+        user_id=phase.project.user_id,
+        project_id=phase.project_id,
+        kind=Notification.PHASE_DUE_SOON,
+        phase_index=phase.order,
+        title=f'Phase due soon: {name}',
+        message=f'"{name}" of "{phase.project.title}" is due on {phase.deadline:%Y-%m-%d %H:%M}',
+        due_at=phase.deadline,
+        dedupe_key=_dedupe_key(phase.project_id, Notification.PHASE_DUE_SOON, phase.deadline, phase.pk),
+    )
+
+
+def sweep(now=None, batch_size=None):
+    """
+    Create any missing notifications. Returns the number of candidate rows
+    submitted; ones that already exist are skipped by the database.
+    """
+    now = now or timezone.now()
+    batch_size = batch_size or settings.NOTIFICATION_SWEEP_BATCH_SIZE
+    window_end = now + timedelta(hours=settings.NOTIFICATION_DUE_SOON_HOURS)
+    overdue_since = now - timedelta(days=settings.NOTIFICATION_OVERDUE_LOOKBACK_DAYS)
+    submitted = 0
+    last_user_id = 0
+
+    while True:
+        user_ids = list(
+            CustomUser.objects.filter(pk__gt=last_user_id)
+            .order_by('pk')
+            .values_list('pk', flat=True)[:batch_size]
+        )
+        if not user_ids:
+            break
+        last_user_id = user_ids[-1]
+
+        open_projects = Project.objects.filter(user_id__in=user_ids, completed=False)
+        notifications = []
+
+        # Project deadlines inside [overdue_since, window_end]: one indexed range
+        for project in open_projects.filter(
+            deadline__gt=overdue_since, deadline__lte=window_end
+        ).only('id', 'title', 'user_id', 'deadline'):
+            kind = Notification.OVERDUE if project.deadline <= now else Notification.DUE_SOON
+            notifications.append(_project_notification(project, kind))
+
+        # Unfinished phases of open projects, through the phase deadline index
+        for phase in Phase.objects.filter(
+            project__user_id__in=user_ids,
+            project__completed=False,
+            completed=False,
+            deadline__gt=now,
+            deadline__lte=window_end,
+        ).select_related('project').only(
+            'id', 'order', 'name', 'deadline', 'project_id',
+            'project__title', 'project__user_id'
+        ):
+            notifications.append(_phase_notification(phase))
+
+        if notifications:
+            Notification.objects.bulk_create(notifications, ignore_conflicts=True)
+            submitted += len(notifications)
+
+    logger.info(f"Notification sweep finished: {submitted} candidate notifications")
+    return submitted
@@ -0,0 +1,40 @@
+from rest_framework.pagination import CursorPagination
+
+
+class ProjectCursorPagination(CursorPagination):
+    """
+    Keyset pagination for a user's projects, always on so no response
+    carries more than max_page_size projects.
+    Pages are read with an indexed range scan on (created_at, id) instead of
+    OFFSET, so deep pages cost the same as the first one.
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = ('-created_at', 'id')
+
+
+class AdminProjectCursorPagination(CursorPagination):
+    """
+    Bounded keyset pagination for the admin project list.
+    Always on: admins can page through every project in the system.
+    Full-text searches are paged by relevance instead of creation date.
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = ('-created_at', 'id')
+    search_ordering = ('search_rank', 'id')
+
+    def get_ordering(self, request, queryset, view):
+        if 'search_rank' in queryset.query.annotations:
+            return self.search_ordering
+        return super().get_ordering(request, queryset, view)
+
+
+class ActivityCursorPagination(CursorPagination):
+    """Keyset pagination for the admin activity feed, newest first"""
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 50
+    ordering = ('-timestamp', '-id')
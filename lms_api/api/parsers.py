@@ -0,0 +1,39 @@
+"""
+JSON parsing with orjson.
+
+ORJSONParser reads the body once and decodes it with orjson. Bodies orjson
+rejects (syntax errors, NaN, lone surrogates) are decoded again by the
+standard library exactly as DRF's JSONParser would, so what is accepted and
+the error messages stay the same. The one difference is integers beyond 64
+bits, which orjson reads as floats; no field here accepts them either way.
+Bodies in a charset other than UTF-8 are left to JSONParser.
+"""
+import codecs
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.utils import json
+
+from .renderers import ORJSONRenderer, orjson
+
+
+class ORJSONParser(JSONParser):
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if orjson is None or codecs.lookup(encoding).name != 'utf-8':
+            return super().parse(stream, media_type, parser_context)
+
+        body = stream.read()
+        try:
+            return orjson.loads(body)
+        except orjson.JSONDecodeError:
+            pass
+        try:
+            parse_constant = json.strict_constant if self.strict else None
+            return json.loads(body.decode(encoding), parse_constant=parse_constant)
+        except ValueError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
@@ -0,0 +1,79 @@
+"""
+JSON rendering with orjson.
+
+Project lists are mostly nested phases and datetime strings, and the
+standard library encoder spends a visible share of each request on them.
+ORJSONRenderer produces the same bytes as DRF's JSONRenderer with orjson:
+- datetimes, dates and times are handed back to DRF's encoder, so they keep
+  its format (`Z` for UTC, no millisecond truncation);
+- Decimals and other non-native types go through the same encoder;
+- UUIDs, dicts, lists and str/int subclasses (ReturnDict, ErrorDetail) are
+  encoded natively, with the same result.
+Anything orjson refuses (non-string keys, integers over 64 bits, indented
+output, types DRF's encoder rejects) is rendered by JSONRenderer itself, so
+it behaves exactly as before. The differences are the spelling of floats
+below 1e-4 or from 1e16 up (`1e16` rather than `1e+16`), which parse to the
+same value. orjson writes NaN and infinity as null, so output containing null
+is checked for them and re-rendered by JSONRenderer, which raises ValueError
+as it always has (allow_nan=False).
+
+Without orjson installed this renderer and ORJSONParser behave like DRF's own.
+"""
+import math
+from decimal import Decimal
+
+from rest_framework.renderers import JSONRenderer
+
+from . import metrics
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+ORJSON_OPTIONS = (
+    orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+    if orjson else 0
+)
+
+
+def has_non_finite(data):
+    """Whether data holds a NaN or infinite float or Decimal anywhere"""
+    if isinstance(data, float):
+        return not math.isfinite(data)
+    if isinstance(data, Decimal):
+        return not data.is_finite()
+    if isinstance(data, dict):
+        return any(has_non_finite(value) for value in data.values())
+    if isinstance(data, (list, tuple)):
+        return any(has_non_finite(value) for value in data)
+    return False
+
+
+class ORJSONRenderer(JSONRenderer):
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        with metrics.rendering():
+            return self._render(data, accepted_media_type, renderer_context)
+
+    def _render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None or self.ensure_ascii or not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=self.encoder_class().default, option=ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Only output with a null can have lost a NaN or infinity
+        if b'null' in ret and has_non_finite(data):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Same escaping as JSONRenderer, to stay a strict javascript subset.
+        # Both characters start with 0xE2, which a single-byte scan rules
+        # out far faster than searching for the full sequences.
+        if b'\xe2' in ret:
+            ret = ret.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
+        return ret
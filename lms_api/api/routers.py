@@ -0,0 +1,94 @@
+"""
+Read replica routing.
+
+With REPLICA_DATABASE_URL set, views using ReplicaReadMixin run the queries
+of their GET requests against the `replica` alias. Authentication and
+permission checks still read the primary, and so does everything else:
+writes, transactions and every other view. Replica reads are also skipped
+for a user who wrote anything in the last REPLICA_PIN_SECONDS (see
+ReplicaPinMiddleware), so admins see their own changes right away. Other
+users' changes can show up as late as the replication lag, including in
+cached payloads such as the dashboard stats built during a replica read.
+
+The pin is kept in the Django cache, so every worker must see the same
+cache: with a process-local backend a user's next read could land on a
+worker that never saw the pin. The `api.E001` system check rejects that
+setup, and the router also keeps every read on the primary then.
+
+Without a replica configured the router does nothing.
+"""
+import contextvars
+
+from django.conf import settings
+from django.core import checks
+from django.core.cache import cache
+from django.db import connections
+from rest_framework.permissions import SAFE_METHODS
+
+from . import caching
+
+REPLICA = 'replica'
+PIN_KEY = 'replica_pin:{}'
+
+_read_from_replica = contextvars.ContextVar('read_from_replica', default=False)
+
+
+def replica_configured():
+    return REPLICA in settings.DATABASES and caching.is_shared()
+
+
+@checks.register(checks.Tags.database, checks.Tags.caches)
+def check_replica_cache(app_configs, **kwargs):
+    if REPLICA in settings.DATABASES and not caching.is_shared():
+        return [checks.Error(
+            "REPLICA_DATABASE_URL needs a cache shared by all workers for the read-your-writes pin.",
+            hint="Set CACHE_BACKEND to a shared backend, such as FileBasedCache, Redis or Memcached.",
+            id='api.E001',
+        )]
+    return []
+
+
+def pin_to_primary(user_id):
+    """Keep the user's reads on the primary for REPLICA_PIN_SECONDS"""
+    cache.set(PIN_KEY.format(user_id), True, settings.REPLICA_PIN_SECONDS)
+
+
+def is_pinned(user_id):
+    return cache.get(PIN_KEY.format(user_id)) is not None
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        if (_read_from_replica.get() and replica_configured()
+                and not connections['default'].in_atomic_block):
+            return REPLICA
+        return None
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica follows the primary's schema through replication
+        return False if db == REPLICA else None
+
+
+class ReplicaReadMixin:
+    """APIView mixin sending the view's GET queries to the replica"""
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if (request.method in SAFE_METHODS and replica_configured()
+                and not is_pinned(request.user.pk)):
+            self._replica_token = _read_from_replica.set(True)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        token = getattr(self, '_replica_token', None)
+        if token is not None:
+            _read_from_replica.reset(token)
+            self._replica_token = None
+        return super().finalize_response(request, response, *args, **kwargs)
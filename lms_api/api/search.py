@@ -0,0 +1,179 @@
+"""
+Full-text index for the admin project search.
+
+The index lives outside the ORM because each database has its own engine:
+SQLite uses an FTS5 virtual table and PostgreSQL a tsvector table with a GIN
+index. Every document covers a project's title, description and category plus
+the owner's email and names, so a search never has to scan the user join.
+Other backends have no index and callers fall back to `icontains` filters.
+"""
+import logging
+import re
+
+from django.db import connection
+from django.db.models import FloatField
+from django.db.models.expressions import RawSQL
+
+logger = logging.getLogger(__name__)
+
+SEARCH_TABLE = 'api_project_search'
+PROJECT_TABLE = 'api_project'
+USER_TABLE = 'api_customuser'
+MAX_SEARCH_TERMS = 8
+
+# Fields of CustomUser that are copied into the project documents
+INDEXED_USER_FIELDS = ('email', 'first_name', 'last_name')
+
+# Column weights: title, description, category, email, first_name, last_name
+SQLITE_BM25_WEIGHTS = '10.0, 1.0, 5.0, 2.0, 2.0, 2.0'
+
+
+def is_supported(conn=None):
+    return (conn or connection).vendor in ('sqlite', 'postgresql')
+
+
+def create_index(conn):
+    """Create the search table for the given connection's backend."""
+    with conn.cursor() as cursor:
+        if conn.vendor == 'sqlite':
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5("
+                "title, description, category, email, first_name, last_name, "
+                "tokenize = 'unicode61 remove_diacritics 2')"
+            )
+        elif conn.vendor == 'postgresql':
+            cursor.execute(
+                f"CREATE TABLE IF NOT EXISTS {SEARCH_TABLE} ("
+                f"project_id bigint PRIMARY KEY REFERENCES {PROJECT_TABLE}(id) "
+                "ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, "
+                "document tsvector NOT NULL)"
+            )
+            cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS {SEARCH_TABLE}_document_idx "
+                f"ON {SEARCH_TABLE} USING GIN (document)"
+            )
+
+
+def drop_index(conn):
+    if is_supported(conn):
+        with conn.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {SEARCH_TABLE}")
+
+
+def _reindex(conn, where='', params=()):
+    """Rewrite the documents of every project matching the `where` clause."""
+    if not is_supported(conn):
+        return
+    where_clause = f"WHERE {where}" if where else ''
+    with conn.cursor() as cursor:
+        if conn.vendor == 'sqlite':
+            cursor.execute(
+                f"DELETE FROM {SEARCH_TABLE} WHERE rowid IN "
+                f"(SELECT p.id FROM {PROJECT_TABLE} p {where_clause})",
+                params,
+            )
+            cursor.execute(
+                f"INSERT INTO {SEARCH_TABLE} "
+                "(rowid, title, description, category, email, first_name, last_name) "
+                "SELECT p.id, p.title, p.description, p.category, u.email, u.first_name, u.last_name "
+                f"FROM {PROJECT_TABLE} p JOIN {USER_TABLE} u ON u.id = p.user_id {where_clause}",
+                params,
+            )
+        else:
+            # Emails are split on punctuation so their parts match prefix queries
+            cursor.execute(
+                f"INSERT INTO {SEARCH_TABLE} (project_id, document) "
+                "SELECT p.id, "
+                "setweight(to_tsvector('simple', coalesce(p.title, '')), 'A') || "
+                "setweight(to_tsvector('simple', coalesce(p.category, '')), 'B') || "
+                "setweight(to_tsvector('simple', regexp_replace(u.email, '[@._+-]', ' ', 'g') "
+                "|| ' ' || u.first_name || ' ' || u.last_name), 'C') || "
+                "setweight(to_tsvector('simple', coalesce(p.description, '')), 'D') "
+                f"FROM {PROJECT_TABLE} p JOIN {USER_TABLE} u ON u.id = p.user_id {where_clause} "
+                "ON CONFLICT (project_id) DO UPDATE SET document = EXCLUDED.document",
+                params,
+            )
+
+
+def index_project(project_id, conn=None):
+    _reindex(conn or connection, 'p.id = %s', [project_id])
+
+
+def index_projects(project_ids, conn=None):
+    """Reindex several projects at once, e.g. after a bulk write that skipped signals"""
+    project_ids = list(project_ids)
+    if project_ids:
+        placeholders = ', '.join(['%s'] * len(project_ids))
+        _reindex(conn or connection, f'p.id IN ({placeholders})', project_ids)
+
+
+def index_user_projects(user_id, conn=None):
+    _reindex(conn or connection, 'p.user_id = %s', [user_id])
+
+
+def remove_project(project_id, conn=None):
+    conn = conn or connection
+    if not is_supported(conn):
+        return
+    key = 'rowid' if conn.vendor == 'sqlite' else 'project_id'
+    with conn.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {SEARCH_TABLE} WHERE {key} = %s", [project_id])
+
+
+def rebuild(conn=None):
+    """Drop and refill the whole index. Returns the number of indexed projects."""
+    conn = conn or connection
+    if not is_supported(conn):
+        return 0
+    with conn.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {SEARCH_TABLE}")
+    _reindex(conn)
+    with conn.cursor() as cursor:
+        cursor.execute(f"SELECT COUNT(*) FROM {SEARCH_TABLE}")
+        return cursor.fetchone()[0]
+
+
+def build_query(search, conn=None):
+    """
+    Turn free text into a prefix query for the backend, or None when the text
+    has no searchable terms. Every term must match (AND).
+    """
+    terms = re.findall(r'\w+', search.lower())[:MAX_SEARCH_TERMS]
+    if not terms:
+        return None
+    if (conn or connection).vendor == 'sqlite':
+        return ' '.join(f'"{term}"*' for term in terms)
+    return ' & '.join(f'{term}:*' for term in terms)
+
+
+def apply_search(queryset, search):
+    """
+    Restrict a Project queryset to full-text matches and annotate each row
+    with `search_rank` (lower is better). Returns None when the index cannot
+    serve the search, so the caller can fall back to substring filters.
+    """
+    if not is_supported():
+        return None
+    query = build_query(search)
+    if query is None:
+        return None
+
+    if connection.vendor == 'sqlite':
+        matches = f"SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s"
+        rank = (
+            f"SELECT bm25({SEARCH_TABLE}, {SQLITE_BM25_WEIGHTS}) FROM {SEARCH_TABLE} "
+            f"WHERE {SEARCH_TABLE} MATCH %s AND rowid = {PROJECT_TABLE}.id"
+        )
+    else:
+        matches = (
+            f"SELECT project_id FROM {SEARCH_TABLE} "
+            "WHERE document @@ to_tsquery('simple', %s)"
+        )
+        rank = (
+            f"SELECT -ts_rank(document, to_tsquery('simple', %s)) FROM {SEARCH_TABLE} "
+            f"WHERE project_id = {PROJECT_TABLE}.id"
+        )
+
+    return queryset.filter(id__in=RawSQL(matches, [query])).annotate(
+        search_rank=RawSQL(rank, [query], output_field=FloatField())
+    )
@@ -1,13 +1,25 @@
 import logging
+from datetime import datetime
 from django.utils import timezone
 from rest_framework import serializers
 from django.contrib.auth.password_validation import validate_password
 from django.contrib.auth import authenticate
-from .models import CustomUser, Project
+from django.db import transaction
+from django.db.models.functions import Lower
+from .authentication import invalidate_user
+from . import images
+from .caching import invalidate_dashboard_stats
+from .fieldsets import SparseFieldsMixin
+from .models import CustomUser, Notification, Phase, Project
 from django.core.files.storage import default_storage
 from django.core.exceptions import ValidationError
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from rest_framework_simplejwt.serializers import (
+    TokenObtainPairSerializer as BaseTokenObtainPairSerializer,
+    TokenRefreshSerializer as BaseTokenRefreshSerializer,
+)
+from .tokens import RefreshToken
 import os
 
 CustomUser = get_user_model()
@@ -22,8 +34,24 @@ class RegisterSerializer(serializers.ModelSerializer):
         fields = ['username', 'email', 'username', 'password', 'first_name', 'last_name']
 
     def create(self, validated_data):
-        user = CustomUser.objects.create_user(**validated_data)
-        return user
+        return create_user(validated_data)
+
+
+def create_user(validated_data):
+    """
+    `create_user()` for the user serializers. The async views hash the
+    password in api.hashing and pass it to `save(password_hash=...)`, so the
+    row is written without hashing again here.
+    """
+    password_hash = validated_data.pop('password_hash', None)
+    if password_hash is None:
+        return CustomUser.objects.create_user(**validated_data)
+    validated_data.pop('password', None)
+    validated_data['email'] = CustomUser.objects.normalize_email(validated_data.get('email'))
+    validated_data['username'] = CustomUser.normalize_username(validated_data['username'])
+    user = CustomUser(password=password_hash, **validated_data)
+    user.save()
+    return user
 
 
 class LoginSerializer(serializers.Serializer):
@@ -31,37 +59,40 @@ class LoginSerializer(serializers.Serializer):
     password = serializers.CharField(write_only=True)
 
     def validate(self, data):
-        email = data.get('email').lower()  # Normalize email to lowercase
-        password = data.get('password')
-
-        if not email or not password:
-            raise serializers.ValidationError('Both email and password are required')
-
-        # Get user by email (case-insensitive)
-        user = CustomUser.objects.filter(email__iexact=email).first()
-        
-        if not user:
-            logger.warning(f"Login attempt with non-existent email: {email}")
-            raise serializers.ValidationError('Invalid credentials')
-
-        # Check password directly (bypasses authentication backend)
-        if not user.check_password(password):
-            logger.warning(f"Invalid password for user: {user.email}")
-            raise serializers.ValidationError('Invalid credentials')
-
-        # Manual authentication (since we're bypassing the backend)
-        if not user.is_active:
-            user.is_active = True
-            user.save(update_fields=['is_active'])
-
-        user.last_login = timezone.now()
-        user.save(update_fields=['last_login'])
-
-        data['user'] = user
+        data['email'] = data['email'].lower()  # Normalize email to lowercase
         return data
 
+    @staticmethod
+    def get_user(email):
+        """
+        Get user by email (case-insensitive). Comparing LOWER(email) matches
+        the functional index, which `iexact` cannot use.
+        """
+        return CustomUser.objects.alias(email_lower=Lower('email')).filter(email_lower=email).first()
+
+    @staticmethod
+    def record_login(user, password_hash=None):
+        """
+        Manual authentication (since we're bypassing the backend).
+        Reactivation, last_login and any password hash upgrade go out as one UPDATE.
+        """
+        now = timezone.now()
+        first_login_today = user.last_login is None or user.last_login.date() != now.date()
+        changes = {'is_active': True, 'last_login': now}
+        if password_hash:
+            changes['password'] = password_hash
+        CustomUser.objects.filter(pk=user.pk).update(**changes)
+        for attr, value in changes.items():
+            setattr(user, attr, value)
+        invalidate_user(user.pk)
+        if first_login_today:
+            # update() sends no post_save; this moves the active-users counter
+            invalidate_dashboard_stats()
+
+
+class ProfileSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    field_columns = {'profile_picture_url': ('profile_picture', 'profile_thumbnails')}
 
-class ProfileSerializer(serializers.ModelSerializer):
     profile_picture = serializers.ImageField(
         required=False, 
         allow_null=True,
@@ -86,16 +117,17 @@ class ProfileSerializer(serializers.ModelSerializer):
 
     def get_profile_picture_url(self, obj):
         if obj.profile_picture:
+            url = images.picture_url(obj, self.context.get('profile_picture_size', 'full'))
             request = self.context.get('request')
             if request:
-                return request.build_absolute_uri(obj.profile_picture.url)
-            return f"{settings.BASE_URL}{obj.profile_picture.url}"
+                return request.build_absolute_uri(url)
+            return f"{settings.BASE_URL}{url}"
         return None
 
     def validate_profile_picture(self, value):
         if value:
-            # Validate file size (5MB limit)
-            max_size = 5 * 1024 * 1024  # 5MB
+            # Validate file size (5MB limit; also enforced while streaming, see api/uploads.py)
+            max_size = settings.PROFILE_PICTURE_MAX_SIZE
             if value.size > max_size:
                 raise ValidationError(f"Image file too large ( > {max_size//1024//1024}MB )")
             
@@ -120,36 +152,58 @@ class ProfileSerializer(serializers.ModelSerializer):
         # Handle profile picture
         profile_picture = validated_data.pop('profile_picture', None)
         
-        # If profile_picture is explicitly set to None, delete existing picture
+        # If profile_picture is explicitly set to None, remove the picture.
+        # Files may be shared (see api/storage.py), so the old ones are left
+        # for prune_media rather than deleted here.
         if profile_picture is None and 'profile_picture' in self.initial_data:
-            self._delete_profile_picture(instance)
             instance.profile_picture = None
+            instance.profile_thumbnails = {}
         elif profile_picture:
-            # Delete old picture if it exists
-            if instance.profile_picture:
-                self._delete_profile_picture(instance)
             instance.profile_picture = profile_picture
+            instance.profile_thumbnails = {}
         
         # Update other fields
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
             
         instance.save()
+        if profile_picture:
+            # Thumbnails are generated off the request path
+            images.schedule(instance.pk)
         return instance
 
-    def _delete_profile_picture(self, instance):
-        """Safely delete old profile picture from storage"""
-        if instance.profile_picture:
-            try:
-                if default_storage.exists(instance.profile_picture.name):
-                    default_storage.delete(instance.profile_picture.name)
-            except Exception as e:
-                # Log the error but don't fail the operation
-                print(f"Error deleting profile picture: {str(e)}")
-    
 
 
-class ProjectSerializer(serializers.ModelSerializer):
+class PhaseSerializer(serializers.ModelSerializer):
+    # Writable so a project update can address existing phases by id
+    id = serializers.IntegerField(required=False)
+
+    class Meta:
+        model = Phase
+        fields = [
+            'id', 'order', 'name', 'start_date', 'end_date',
+            'start_time', 'end_time', 'comment', 'completed'
+        ]
+        extra_kwargs = {
+            'order': {'required': False},
+            'start_time': {'format': '%H:%M'},
+            'end_time': {'format': '%H:%M'},
+        }
+
+    def create(self, validated_data):
+        validated_data.pop('id', None)
+        return super().create(validated_data)
+
+    def update(self, instance, validated_data):
+        validated_data.pop('id', None)
+        return super().update(instance, validated_data)
+
+
+class ProjectSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    field_relations = {'phases': ('phases',)}
+
+    phases = PhaseSerializer(many=True, required=False)
+
     class Meta:
         model = Project
         fields = [
@@ -159,18 +213,74 @@ class ProjectSerializer(serializers.ModelSerializer):
             'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at', 'user']
+        extra_kwargs = {
+            'start_time': {'format': '%H:%M'},
+            'end_time': {'format': '%H:%M'},
+        }
 
     def create(self, validated_data):
         # Automatically assign the user from request context
         validated_data['user'] = self.context['request'].user
-        return super().create(validated_data)
+        phases_data = validated_data.pop('phases', [])
+        # A project is saved with all of its phases or not at all
+        with transaction.atomic():
+            project = super().create(validated_data)
+            sync_phases(project, phases_data, existing=[])
+        return project
 
     def update(self, instance, validated_data):
+        phases_data = validated_data.pop('phases', None)
         # Update only the fields that were passed
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
-        instance.save()
+        with transaction.atomic():
+            instance.save()
+            if phases_data is not None:
+                sync_phases(instance, phases_data)
         return instance
+
+
+PHASE_WRITE_FIELDS = [
+    'order', 'name', 'start_date', 'end_date', 'start_time',
+    'end_time', 'deadline', 'comment', 'completed'
+]
+
+
+def sync_phases(project, phases_data, existing=None):
+    """
+    Make the project's phases match a full list sent by the client: entries
+    with a known id update that row, the rest are created, and phases left
+    out are deleted. Writes go out as one bulk query per kind of change.
+    """
+    if existing is None:
+        existing = project.phases.all()
+    existing = {phase.pk: phase for phase in existing}
+    to_create, to_update = [], []
+
+    for order, data in enumerate(phases_data):
+        data = dict(data)
+        phase_id = data.pop('id', None)
+        data['order'] = order  # The list position is the phase order
+        phase = existing.pop(phase_id, None) if phase_id is not None else None
+        if phase is None:
+            phase = Phase(project=project, **data)
+            to_create.append(phase)
+        else:
+            for attr, value in data.items():
+                setattr(phase, attr, value)
+            to_update.append(phase)
+        phase.deadline = phase.compute_deadline()
+
+    if existing:
+        Phase.objects.filter(pk__in=list(existing)).delete()
+    if to_update:
+        Phase.objects.bulk_update(to_update, PHASE_WRITE_FIELDS)
+    if to_create:
+        Phase.objects.bulk_create(to_create)
+
+    # Drop any prefetched phases so the response shows the new state
+    getattr(project, '_prefetched_objects_cache', {}).pop('phases', None)
+
     
 
 
@@ -196,8 +306,7 @@ class UserCreateSerializer(serializers.ModelSerializer):
         return value
 
     def create(self, validated_data):
-        user = CustomUser.objects.create_user(**validated_data)
-        return user
+        return create_user(validated_data)
     
 
 
@@ -224,15 +333,17 @@ class AdminUserDetailSerializer(serializers.ModelSerializer):
 
     def get_profile_picture_url(self, obj):
         if obj.profile_picture:
+            url = images.picture_url(obj, 'full')
             request = self.context.get('request')
             if request:
-                return request.build_absolute_uri(obj.profile_picture.url)
-            return obj.profile_picture.url
+                return request.build_absolute_uri(url)
+            return url
         return None
 
 
 
 class AdminProjectSerializer(serializers.ModelSerializer):
+    phases = PhaseSerializer(many=True, read_only=True)
     user_email = serializers.EmailField(source='user.email', read_only=True)
     user_full_name = serializers.SerializerMethodField()
     user_profile_picture = serializers.SerializerMethodField()
@@ -265,33 +376,33 @@ class AdminProjectSerializer(serializers.ModelSerializer):
             'updated_at'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at', 'user']
+        extra_kwargs = {
+            'start_time': {'format': '%H:%M'},
+            'end_time': {'format': '%H:%M'},
+        }
     
     def get_user_full_name(self, obj):
         return f"{obj.user.first_name} {obj.user.last_name}".strip() if obj.user else None
     
     def get_user_profile_picture(self, obj):
         if obj.user.profile_picture:
+            url = images.picture_url(obj.user, 'avatar')
             request = self.context.get('request')
             if request:
-                return request.build_absolute_uri(obj.user.profile_picture.url)
-            return obj.user.profile_picture.url
+                return request.build_absolute_uri(url)
+            return url
         return None
     
     def get_phases_count(self, obj):
-        return len(obj.phases) if obj.phases else 0
+        return len(obj.phases.all())
     
     def get_time_remaining(self, obj):
         if not obj.end_date or not obj.end_time or obj.completed:
             return None
             
-        try:
-            end_datetime = timezone.make_aware(
-                datetime.strptime(f"{obj.end_date} {obj.end_time}", "%Y-%m-%d %H:%M")
-            )
-            remaining = end_datetime - timezone.now()
-            return max(0, remaining.total_seconds())  # Returns seconds remaining
-        except:
-            return None
+        end_datetime = timezone.make_aware(datetime.combine(obj.end_date, obj.end_time))
+        remaining = end_datetime - timezone.now()
+        return max(0, remaining.total_seconds())  # Returns seconds remaining
     
     def get_is_active(self, obj):
         if obj.completed:
@@ -300,10 +411,180 @@ class AdminProjectSerializer(serializers.ModelSerializer):
         if not obj.start_date or not obj.start_time:
             return True
             
-        try:
-            start_datetime = timezone.make_aware(
-                datetime.strptime(f"{obj.start_date} {obj.start_time}", "%Y-%m-%d %H:%M")
-            )
-            return timezone.now() >= start_datetime
-        except:
-            return True
\ No newline at end of file
+        start_datetime = timezone.make_aware(datetime.combine(obj.start_date, obj.start_time))
+        return timezone.now() >= start_datetime
+
+
+class AdminProjectListSerializer(serializers.BaseSerializer):
+    """
+    Read-only AdminProjectSerializer for the admin project list, with the
+    same output. Rows are built as plain dicts rather than through a field
+    object per value, time_remaining comes from the stored deadline column,
+    start times are made aware once per distinct value and the per-user
+    fields are computed once per user. Takes `fields` like the serializers
+    using SparseFieldsMixin.
+    """
+    # Output fields in order, with the columns and relations each one reads
+    field_columns = {
+        'id': ('id',),
+        'title': ('title',),
+        'description': ('description',),
+        'category': ('category',),
+        'start_date': ('start_date',),
+        'end_date': ('end_date',),
+        'start_time': ('start_time',),
+        'end_time': ('end_time',),
+        'phases': (),
+        'completed': ('completed',),
+        'completed_at': ('completed_at',),
+        'user': ('user',),
+        'user_email': (),
+        'user_full_name': (),
+        'user_profile_picture': (),
+        'phases_count': (),
+        'time_remaining': ('end_date', 'end_time', 'completed', 'deadline'),
+        'is_active': ('completed', 'start_date', 'start_time'),
+        'created_at': ('created_at',),
+        'updated_at': ('updated_at',),
+    }
+    field_relations = {
+        'phases': ('phases',),
+        'phases_count': ('phases',),
+        'user_email': ('user',),
+        'user_full_name': ('user',),
+        'user_profile_picture': ('user',),
+    }
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.now = timezone.now()
+        self.current_timezone = timezone.get_current_timezone()
+        self.users = {}
+        self.starts = {}
+        getters = {
+            'id': lambda obj: obj.id,
+            'title': lambda obj: obj.title,
+            'description': lambda obj: obj.description,
+            'category': lambda obj: obj.category,
+            'start_date': lambda obj: self.format_date(obj.start_date),
+            'end_date': lambda obj: self.format_date(obj.end_date),
+            'start_time': lambda obj: self.format_time(obj.start_time),
+            'end_time': lambda obj: self.format_time(obj.end_time),
+            'phases': lambda obj: [self.phase_representation(phase) for phase in obj.phases.all()],
+            'completed': lambda obj: obj.completed,
+            'completed_at': lambda obj: self.format_datetime(obj.completed_at),
+            'user': lambda obj: obj.user_id,
+            'user_email': lambda obj: self.get_user_fields(obj.user)['user_email'],
+            'user_full_name': lambda obj: self.get_user_fields(obj.user)['user_full_name'],
+            'user_profile_picture': lambda obj: self.get_user_fields(obj.user)['user_profile_picture'],
+            'phases_count': lambda obj: len(obj.phases.all()),
+            'time_remaining': self.get_time_remaining,
+            'is_active': self.get_is_active,
+            'created_at': lambda obj: self.format_datetime(obj.created_at),
+            'updated_at': lambda obj: self.format_datetime(obj.updated_at),
+        }
+        self.getters = [
+            (name, getter) for name, getter in getters.items()
+            if fields is None or name in fields
+        ]
+
+    @classmethod
+    def readable_field_names(cls):
+        return list(cls.field_columns)
+
+    @classmethod
+    def field_sources(cls, names):
+        columns, relations = set(), set()
+        for name in names:
+            columns.update(cls.field_columns[name])
+            relations.update(cls.field_relations.get(name, ()))
+        return columns, relations
+
+    def to_representation(self, obj):
+        return {name: getter(obj) for name, getter in self.getters}
+
+    def phase_representation(self, phase):
+        return {
+            'id': phase.id,
+            'order': phase.order,
+            'name': phase.name,
+            'start_date': self.format_date(phase.start_date),
+            'end_date': self.format_date(phase.end_date),
+            'start_time': self.format_time(phase.start_time),
+            'end_time': self.format_time(phase.end_time),
+            'comment': phase.comment,
+            'completed': phase.completed,
+        }
+
+    def get_user_fields(self, user):
+        fields = self.users.get(user.pk)
+        if fields is None:
+            picture = None
+            if user.profile_picture:
+                picture = images.picture_url(user, 'avatar')
+                request = self.context.get('request')
+                if request:
+                    picture = request.build_absolute_uri(picture)
+            fields = self.users[user.pk] = {
+                'user_email': user.email,
+                'user_full_name': f"{user.first_name} {user.last_name}".strip(),
+                'user_profile_picture': picture,
+            }
+        return fields
+
+    def get_time_remaining(self, obj):
+        if not obj.end_date or not obj.end_time or obj.completed:
+            return None
+        # The deadline column holds the same aware end date and time
+        deadline = obj.deadline or timezone.make_aware(datetime.combine(obj.end_date, obj.end_time))
+        return max(0, (deadline - self.now).total_seconds())
+
+    def get_is_active(self, obj):
+        if obj.completed:
+            return False
+        if not obj.start_date or not obj.start_time:
+            return True
+        key = (obj.start_date, obj.start_time)
+        start = self.starts.get(key)
+        if start is None:
+            start = self.starts[key] = timezone.make_aware(datetime.combine(*key))
+        return self.now >= start
+
+    # Same formats as the fields of AdminProjectSerializer
+    @staticmethod
+    def format_date(value):
+        return value.isoformat() if value else None
+
+    @staticmethod
+    def format_time(value):
+        return f'{value.hour:02d}:{value.minute:02d}' if value is not None else None
+
+    def format_datetime(self, value):
+        if not value:
+            return None
+        value = value.astimezone(self.current_timezone).isoformat()
+        if value.endswith('+00:00'):
+            value = value[:-6] + 'Z'
+        return value
+
+
+
+class NotificationSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Notification
+        fields = [
+            'id', 'kind', 'project', 'phase_index', 'title',
+            'message', 'due_at', 'created_at', 'read_at'
+        ]
+        read_only_fields = fields
+
+
+
+class TokenRefreshSerializer(BaseTokenRefreshSerializer):
+    # Checks and records rotation through the in-memory revocation filter
+    token_class = RefreshToken
+
+
+class TokenObtainPairSerializer(BaseTokenObtainPairSerializer):
+    # Records the new refresh token through the write buffer when enabled
+    token_class = RefreshToken
@@ -0,0 +1,89 @@
+import logging
+
+from django.db import connections
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from . import activity, caching, search
+from .authentication import invalidate_user
+from .models import ActivityEvent, CustomUser, Project
+
+logger = logging.getLogger(__name__)
+
+
+@receiver(post_save, sender=Project)
+def index_saved_project(sender, instance, raw=False, using=None, **kwargs):
+    """Keep the project's full-text document in sync with its row"""
+    if raw:
+        return
+    search.index_project(instance.pk, conn=_connection(using))
+
+
+@receiver(post_delete, sender=Project)
+def unindex_deleted_project(sender, instance, using=None, **kwargs):
+    search.remove_project(instance.pk, conn=_connection(using))
+
+
+@receiver(post_save, sender=CustomUser)
+def reindex_user_projects(sender, instance, created=False, raw=False, update_fields=None, using=None, **kwargs):
+    """Owner email and names are part of every project document"""
+    if raw or created:
+        return
+    if update_fields is not None and not set(update_fields) & set(search.INDEXED_USER_FIELDS):
+        # e.g. the last_login update on every login
+        return
+    search.index_user_projects(instance.pk, conn=_connection(using))
+
+
+def _connection(using):
+    return connections[using or 'default']
+
+
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+@receiver(post_save, sender=Project)
+@receiver(post_delete, sender=Project)
+def invalidate_dashboard_stats(sender, raw=False, **kwargs):
+    """Every user or project change can move a dashboard counter"""
+    if raw:
+        return
+    caching.invalidate_dashboard_stats()
+
+
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+def invalidate_cached_user(sender, instance, raw=False, **kwargs):
+    """Authenticated requests must see profile, activation and password changes"""
+    if not raw:
+        invalidate_user(instance.pk)
+
+
+@receiver(post_save, sender=CustomUser)
+def record_signup(sender, instance, created=False, raw=False, **kwargs):
+    if created and not raw:
+        activity.signup_event(instance).save()
+
+
+@receiver(post_save, sender=Project)
+def record_project_activity(sender, instance, created=False, raw=False, **kwargs):
+    """
+    Append created/updated/completed events to the activity log. Views that
+    save projects load the owner with them, so reading the email here costs
+    no query.
+    """
+    if raw:
+        return
+    owner_email = instance.user.email
+    events = [activity.project_event(
+        instance,
+        ActivityEvent.PROJECT_CREATED if created else ActivityEvent.PROJECT_UPDATED,
+        owner_email,
+        timestamp=instance.created_at if created else instance.updated_at,
+    )]
+    if instance.completed and not getattr(instance, '_loaded_completed', False):
+        events.append(activity.project_event(
+            instance, ActivityEvent.PROJECT_COMPLETED, owner_email,
+            timestamp=instance.completed_at or instance.updated_at,
+        ))
+    instance._loaded_completed = instance.completed
+    ActivityEvent.objects.bulk_create(events)
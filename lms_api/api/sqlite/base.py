@@ -0,0 +1,133 @@
+"""
+SQLite backend for single-node deployments, enabled with SQLITE_TUNED.
+
+Plain SQLite fails concurrent writers with "database is locked": a
+transaction starts as a reader and cannot always upgrade to a writer, and
+the default journal blocks readers during writes. This backend:
+- sets WAL, busy_timeout, synchronous=NORMAL, mmap_size and cache_size on
+  every new connection (`configure_connection`, on connection_created);
+- starts transactions with BEGIN IMMEDIATE, so a transaction takes the
+  write lock up front and waits for it instead of failing mid-way;
+- passes writes of all threads in the process through one FIFO queue
+  (`write_queue`). A transaction holds its place from BEGIN to COMMIT or
+  ROLLBACK. A write outside a transaction holds it for that one statement.
+
+Under load, writers then wait their turn, for at most SQLITE_WRITE_TIMEOUT
+seconds in the queue and SQLITE_BUSY_TIMEOUT milliseconds for other
+processes, instead of failing. Keep transactions short: the whole process
+waits on one.
+"""
+import threading
+from collections import deque
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.db.backends.sqlite3 import base
+from django.db.utils import OperationalError
+from django.dispatch import receiver
+
+WRITE_STATEMENTS = ('INSERT', 'UPDATE', 'DELETE', 'REPLACE', 'CREATE', 'DROP', 'ALTER')
+
+
+class WriteQueue:
+    """A lock that hands itself to waiters in arrival order"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._held = False
+        self._waiters = deque()
+
+    def acquire(self, timeout):
+        with self._lock:
+            if not self._held:
+                self._held = True
+                return
+            turn = threading.Event()
+            self._waiters.append(turn)
+        if turn.wait(timeout):
+            return
+        with self._lock:
+            if turn in self._waiters:
+                self._waiters.remove(turn)
+                raise OperationalError("database is locked (timed out in the write queue)")
+        # Handed over just as the wait timed out
+
+    def release(self):
+        with self._lock:
+            if self._waiters:
+                # Ownership passes straight to the next writer
+                self._waiters.popleft().set()
+            else:
+                self._held = False
+
+
+write_queue = WriteQueue()
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.holds_write_queue = False
+        self.execute_wrappers.append(self._queue_write)
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        # OPTIONS['transaction_mode'] still wins when set
+        if self.transaction_mode is None:
+            self.transaction_mode = 'IMMEDIATE'
+        return params
+
+    def _start_transaction_under_autocommit(self):
+        self._enter_write_queue()
+        try:
+            super()._start_transaction_under_autocommit()
+        except Exception:
+            self._leave_write_queue()
+            raise
+
+    def _commit(self):
+        try:
+            return super()._commit()
+        finally:
+            self._leave_write_queue()
+
+    def _rollback(self):
+        try:
+            return super()._rollback()
+        finally:
+            self._leave_write_queue()
+
+    def _close(self):
+        try:
+            return super()._close()
+        finally:
+            self._leave_write_queue()
+
+    def _queue_write(self, execute, sql, params, many, context):
+        if self.holds_write_queue or not sql.lstrip()[:7].upper().startswith(WRITE_STATEMENTS):
+            return execute(sql, params, many, context)
+        self._enter_write_queue()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self._leave_write_queue()
+
+    def _enter_write_queue(self):
+        write_queue.acquire(settings.SQLITE_WRITE_TIMEOUT)
+        self.holds_write_queue = True
+
+    def _leave_write_queue(self):
+        if self.holds_write_queue:
+            self.holds_write_queue = False
+            write_queue.release()
+
+
+@receiver(connection_created, sender=DatabaseWrapper)
+def configure_connection(sender, connection, **kwargs):
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA journal_mode = WAL')
+        cursor.execute(f'PRAGMA busy_timeout = {int(settings.SQLITE_BUSY_TIMEOUT)}')
+        cursor.execute('PRAGMA synchronous = NORMAL')
+        cursor.execute(f'PRAGMA mmap_size = {int(settings.SQLITE_MMAP_SIZE)}')
+        cursor.execute(f'PRAGMA cache_size = {int(settings.SQLITE_CACHE_SIZE)}')
@@ -0,0 +1,76 @@
+"""
+Content-addressed media storage.
+
+Every saved file is named after the SHA-256 of its bytes, inside the
+directory its field asked for: `profile_pics/3f/3fa9...e1.jpg`. Saving the
+same bytes twice returns the existing name, so duplicates share one file.
+A name therefore never changes content, which lets MediaView serve these
+files as immutable.
+
+Because a file can be shared, nothing deletes one when a picture is
+replaced; the prune_media command removes files no row refers to.
+
+Files are written to a temporary name and renamed into place, so a reader or
+a second upload of the same bytes never sees a partly written file.
+"""
+import hashlib
+import os
+import re
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+
+HASHED_NAME = re.compile(r'(?:^|/)([0-9a-f]{2})/(\1[0-9a-f]{62})(?:\.[A-Za-z0-9]+)?$')
+
+
+def content_hash(name):
+    """The hash a content-addressed name was built from, or None for other names"""
+    match = HASHED_NAME.search(name)
+    return match.group(2) if match else None
+
+
+class ContentAddressedStorage(FileSystemStorage):
+
+    def _save(self, name, content):
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        digest = digest.hexdigest()
+
+        directory, filename = os.path.split(name)
+        extension = os.path.splitext(filename)[1].lower()
+        name = os.path.join(directory, digest[:2], f'{digest}{extension}').replace('\\', '/')
+        if self.exists(name):
+            return name
+
+        # Two uploads of the same bytes race for the same name; whichever
+        # rename lands last replaces an identical file
+        full_path = self.path(name)
+        directory = os.path.dirname(full_path)
+        if self.directory_permissions_mode is not None:
+            old_umask = os.umask(0o777 & ~self.directory_permissions_mode)
+            try:
+                os.makedirs(directory, self.directory_permissions_mode, exist_ok=True)
+            finally:
+                os.umask(old_umask)
+        else:
+            os.makedirs(directory, exist_ok=True)
+
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.upload-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in content.chunks():
+                    f.write(chunk)
+            if self.file_permissions_mode is not None:
+                os.chmod(temp_path, self.file_permissions_mode)
+            else:
+                # mkstemp creates 0600; give the file what a plain open() would
+                umask = os.umask(0)
+                os.umask(umask)
+                os.chmod(temp_path, 0o666 & ~umask)
+            os.replace(temp_path, full_path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return name
@@ -0,0 +1,182 @@
+"""
+In-process pub/sub behind the notification stream (Server-Sent Events).
+
+Each connected client owns a small asyncio queue keyed by its user id. A
+single tail task per process follows the Notification and ActivityEvent
+tables by id and fans new rows out to the queues of their owners, so rows
+written by other workers or by the notification sweep are delivered too,
+and an idle connection costs one queue and no queries of its own.
+
+The tail starts from the newest rows when the first client connects, before
+that client is subscribed, so everything committed after a client connected
+reaches it. Ids are handed out at insert but rows only become visible at
+commit, so on PostgreSQL a row can show up behind ids already read. Each poll
+therefore re-reads the last TAIL_OVERLAP ids and skips the rows it has
+delivered.
+
+EventSource cannot send an Authorization header, and an access token in the
+URL would end up in access logs. Clients instead exchange their token for a
+stream ticket (`issue_ticket()`): signed, valid for
+NOTIFICATION_STREAM_TICKET_MAX_AGE seconds, good for this endpoint only and
+accepted once.
+
+Must be served through ASGI (lms_api/asgi.py); the tail task runs on the
+server's event loop and stops when the last client disconnects.
+"""
+import asyncio
+import logging
+import secrets
+from collections import defaultdict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+
+from .models import ActivityEvent, Notification
+from .serializers import NotificationSerializer
+
+logger = logging.getLogger(__name__)
+
+# Events buffered per client before new ones are dropped; a client that
+# falls this far behind should reload its state anyway
+QUEUE_SIZE = 100
+# Rows read per table per poll
+POLL_BATCH_SIZE = 500
+# Ids re-read on every poll for rows that committed out of id order
+TAIL_OVERLAP = 100
+
+TICKET_SALT = 'api.streams.ticket'
+TICKET_USED_KEY = 'stream_ticket_used:{}'
+
+
+class Broker:
+    def __init__(self):
+        self._subscribers = defaultdict(set)
+        self._tail_task = None
+        self._start_lock = asyncio.Lock()
+        self._notifications = TableTail(Notification)
+        self._activities = TableTail(ActivityEvent)
+
+    async def subscribe(self, user_id):
+        async with self._start_lock:
+            if self._tail_task is None or self._tail_task.done():
+                # Start from the rows that exist now, so nothing committed
+                # after this client connected is skipped
+                await sync_to_async(self._start_tails)()
+                self._tail_task = asyncio.get_running_loop().create_task(self._tail())
+            queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+            self._subscribers[user_id].add(queue)
+        return queue
+
+    def unsubscribe(self, user_id, queue):
+        queues = self._subscribers.get(user_id)
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                del self._subscribers[user_id]
+
+    @property
+    def subscriber_count(self):
+        return sum(len(queues) for queues in self._subscribers.values())
+
+    def publish(self, user_id, event):
+        for queue in self._subscribers.get(user_id, ()):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                logger.warning(f"Dropping stream event for slow client of user {user_id}")
+
+    async def _tail(self):
+        """Poll both tables once per interval for the whole process"""
+        interval = settings.NOTIFICATION_STREAM_POLL_INTERVAL
+        while self._subscribers:
+            await asyncio.sleep(interval)
+            try:
+                connected = set(self._subscribers)
+                for user_id, event in await sync_to_async(self._fetch_new_events)(connected):
+                    self.publish(user_id, event)
+            except Exception:
+                logger.exception("Notification stream poll failed")
+
+    def _start_tails(self):
+        self._notifications.start()
+        self._activities.start()
+
+    def _fetch_new_events(self, connected):
+        # New rows per interval are few, so they are read in id order and
+        # matched against connected users here rather than in an IN (...) list
+        events = []
+
+        for notification in self._notifications.fetch():
+            if notification.user_id in connected:
+                events.append((notification.user_id, {
+                    'type': 'notification',
+                    'id': f'notification-{notification.pk}',
+                    'data': NotificationSerializer(notification).data,
+                }))
+
+        for activity in self._activities.fetch():
+            if activity.project_id is not None and activity.user_id in connected:
+                events.append((activity.user_id, {
+                    'type': 'project',
+                    'id': f'activity-{activity.pk}',
+                    'data': {
+                        'event': activity.event_type,
+                        'project_id': activity.project_id,
+                        'title': activity.title,
+                        'timestamp': activity.timestamp.isoformat(),
+                    },
+                }))
+        return events
+
+
+class TableTail:
+    """Follows one table by id, returning each row once"""
+
+    def __init__(self, model):
+        self.model = model
+        self.reset()
+
+    def reset(self):
+        self._last_id = None
+        self._seen = set()
+
+    def start(self):
+        """Skip every row that exists now"""
+        ids = list(self.model.objects.order_by('-id').values_list('id', flat=True)[:TAIL_OVERLAP])
+        self._last_id = ids[0] if ids else 0
+        self._seen = set(ids)
+
+    def fetch(self):
+        """Rows committed since the last call, in id order"""
+        rows = list(
+            self.model.objects.filter(id__gt=self._last_id - TAIL_OVERLAP).order_by('id')[:POLL_BATCH_SIZE]
+        )
+        new = [row for row in rows if row.pk not in self._seen]
+        if rows:
+            self._last_id = max(self._last_id, rows[-1].pk)
+        floor = self._last_id - TAIL_OVERLAP
+        self._seen = {pk for pk in self._seen if pk > floor}
+        self._seen.update(row.pk for row in new)
+        return new
+
+
+broker = Broker()
+
+
+def issue_ticket(user_id):
+    """A stream ticket for the user (see the module docstring)"""
+    return signing.dumps({'user': user_id, 'nonce': secrets.token_urlsafe(16)}, salt=TICKET_SALT)
+
+
+def redeem_ticket(ticket):
+    """The user id a ticket was issued to, or None if it is invalid, expired or used"""
+    max_age = settings.NOTIFICATION_STREAM_TICKET_MAX_AGE
+    try:
+        payload = signing.loads(ticket, salt=TICKET_SALT, max_age=max_age)
+    except signing.BadSignature:
+        return None
+    if not cache.add(TICKET_USED_KEY.format(payload['nonce']), True, max_age):
+        return None
+    return payload['user']
@@ -1,3 +1,968 @@
-from django.test import TestCase
+import asyncio
+import atexit
+import contextlib
+import os
+import shutil
+import tempfile
+import threading
+from datetime import date, time as dt_time, timedelta
+from io import BytesIO
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import DatabaseError, OperationalError, connection, connections, transaction
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from PIL import Image
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import AccessToken
+
+from . import benchmarks, caching, hashing, images, metrics, notifications, routers, search, streams
+from .authentication import user_cache
+from .middleware import MetricsMiddleware, ReplicaPinMiddleware
+from .models import ActivityEvent, CustomUser, Notification, Phase, Project
+from .pagination import ProjectCursorPagination
+from .parsers import ORJSONParser
+from .renderers import ORJSONRenderer
+from .serializers import AdminProjectListSerializer, AdminProjectSerializer, ProjectSerializer
+from .sqlite.base import DatabaseWrapper as TunedSQLiteWrapper, WriteQueue, write_queue
+from .storage import ContentAddressedStorage, content_hash
+from .streams import Broker, TableTail
+from .tokens import RefreshToken, RevocationFilter, TokenWriteBuffer, prune_expired, revocations
+from .views import MediaView
+
+# The local-memory backend, so the tests need no Redis server
+LOCAL_CACHE = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+}
+
+# A cache every worker would see, unlike LOCAL_CACHE
+SHARED_CACHE = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(tempfile.gettempdir(), 'lms-api-test-cache'),
+    }
+}
+
+
+def make_user(email='owner@example.com', **kwargs):
+    kwargs.setdefault('username', email.split('@')[0])
+    return CustomUser.objects.create_user(email=email, password='s3cret-pass', **kwargs)
+
+
+def make_project(user, **kwargs):
+    kwargs.setdefault('title', 'Project')
+    return Project.objects.create(user=user, **kwargs)
+
+
+def image_bytes(fmt='PNG', size=(64, 48)):
+    buffer = BytesIO()
+    Image.new('RGB', size, (200, 30, 30)).save(buffer, fmt)
+    return buffer.getvalue()
+
+
+@override_settings(
+    CACHES=LOCAL_CACHE,
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+)
+class APITestCase(TestCase):
+    """Clears the process-wide caches the API keeps between requests"""
+
+    def setUp(self):
+        cache.clear()
+        user_cache.clear()
+        revocations.reset()
+        self.user = make_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def admin_client(self):
+        admin = make_user('admin@example.com', is_staff=True)
+        client = APIClient()
+        client.force_authenticate(admin)
+        return client
+
+
+class ProjectListTests(APITestCase):
+
+    def test_unchanged_list_answers_304(self):
+        make_project(self.user)
+        response = self.client.get('/api/projects/')
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+
+        response = self.client.get('/api/projects/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_etag_changes_on_delete(self):
+        project = make_project(self.user)
+        make_project(self.user)
+        etag = self.client.get('/api/projects/')['ETag']
+        project.delete()
+        response = self.client.get('/api/projects/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['results']), 1)
+
+    def test_paginated_by_default_with_a_bounded_page_size(self):
+        for i in range(3):
+            make_project(self.user, title=f'P{i}')
+        data = self.client.get('/api/projects/').json()
+        self.assertEqual(len(data['results']), 3)
+        self.assertIsNone(data['next'])
+
+        with mock.patch.object(ProjectCursorPagination, 'max_page_size', 2):
+            data = self.client.get('/api/projects/', {'page_size': 1000}).json()
+        self.assertEqual(len(data['results']), 2)
+        self.assertIsNotNone(data['next'])
+
+    def test_cursor_pages_are_stable_under_inserts(self):
+        projects = [make_project(self.user, title=f'P{i}') for i in range(5)]
+        first = self.client.get('/api/projects/', {'page_size': 2}).json()
+        self.assertEqual(len(first['results']), 2)
+
+        # A new project sorts first and must not shift the following pages
+        make_project(self.user, title='Newest')
+        seen = [p['id'] for p in first['results']]
+        url = first['next']
+        while url:
+            page = self.client.get(url).json()
+            seen += [p['id'] for p in page['results']]
+            url = page['next']
+        self.assertEqual(sorted(seen), sorted(p.pk for p in projects))
+        self.assertEqual(len(seen), len(set(seen)))
+
+    def test_other_users_projects_are_hidden(self):
+        make_project(make_user('other@example.com'))
+        self.assertEqual(self.client.get('/api/projects/').json()['results'], [])
+
+
+class AdminProjectListTests(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.admin = self.admin_client()
+
+    def test_pages_through_every_project(self):
+        for i in range(5):
+            make_project(self.user, title=f'P{i}')
+        first = self.admin.get('/api/admin/projects/', {'page_size': 2}).json()
+        self.assertEqual(first['count'], 5)
+        self.assertEqual(len(first['projects']), 2)
+
+        ids = [p['id'] for p in first['projects']]
+        url = first['next']
+        while url:
+            page = self.admin.get(url).json()
+            ids += [p['id'] for p in page['projects']]
+            url = page['next']
+        self.assertEqual(len(set(ids)), 5)
+
+    def test_non_admin_is_refused(self):
+        self.assertEqual(self.client.get('/api/admin/projects/').status_code, 403)
+
+    def test_list_serializer_matches_detail_serializer(self):
+        user = make_user('ada@example.com', first_name='Ada', last_name='Lovelace')
+        project = make_project(
+            user, description='Notes', category='Research', start_date=date(2030, 1, 1),
+            end_date=date(2030, 2, 1), start_time=dt_time(9, 0), end_time=dt_time(17, 30),
+        )
+        Phase.objects.create(project=project, name='One', end_date=date(2030, 1, 10))
+        project = Project.objects.select_related('user').prefetch_related('phases').get(pk=project.pk)
+
+        fast = AdminProjectListSerializer([project], many=True).data[0]
+        full = AdminProjectSerializer(project).data
+        fast.pop('time_remaining')
+        full.pop('time_remaining')
+        self.assertEqual(dict(fast), dict(full))
+
+
+class SearchTests(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.admin = self.admin_client()
+
+    def search(self, text):
+        response = self.admin.get('/api/admin/projects/', {'search': text})
+        return [p['id'] for p in response.json()['projects']]
+
+    def test_matches_title_prefix_and_owner_email(self):
+        project = make_project(self.user, title='Quarterly budget review')
+        make_project(self.user, title='Something else')
+        self.assertEqual(self.search('budg'), [project.pk])
+        self.assertEqual(len(self.search('owner')), 2)
+
+    def test_index_follows_saves_and_deletes(self):
+        project = make_project(self.user, title='Alpha')
+        project.title = 'Omega'
+        project.save()
+        self.assertEqual(self.search('alpha'), [])
+        self.assertEqual(self.search('omega'), [project.pk])
+        project.delete()
+        self.assertEqual(self.search('omega'), [])
+
+    def test_rebuild_counts_every_project(self):
+        make_project(self.user)
+        make_project(self.user)
+        self.assertEqual(search.rebuild(), 2)
+
+
+class DeadlineTests(APITestCase):
+
+    def test_deadline_combines_end_date_and_time(self):
+        project = make_project(self.user, end_date=date(2030, 5, 1), end_time=dt_time(10, 30))
+        self.assertEqual(timezone.localtime(project.deadline).time(), dt_time(10, 30))
+        project.end_time = None
+        project.save(update_fields=['end_time'])
+        project.refresh_from_db()
+        self.assertEqual(timezone.localtime(project.deadline).time(), dt_time(23, 59))
+
+    def test_no_end_date_means_no_deadline(self):
+        self.assertIsNone(make_project(self.user).deadline)
+
+
+class DashboardStatsTests(APITestCase):
+
+    def stats(self, client):
+        return client.get('/api/admin/dashboard-stats/').json()['stats']
+
+    def test_counts_users_and_projects(self):
+        admin = self.admin_client()
+        make_project(self.user, completed=True)
+        make_project(self.user)
+        stats = self.stats(admin)
+        self.assertEqual(stats['total_users'], 2)
+        self.assertEqual(stats['total_projects'], 2)
+        self.assertEqual(stats['projects_completed'], 1)
+        self.assertEqual(stats['projects_in_progress'], 1)
+
+    def test_served_from_cache_until_invalidated(self):
+        admin = self.admin_client()
+        self.stats(admin)
+        with CaptureQueriesContext(connection) as queries:
+            self.stats(admin)
+        self.assertFalse(any('COUNT' in q['sql'] for q in queries.captured_queries))
+
+        make_project(self.user)
+        self.assertEqual(self.stats(admin)['total_projects'], 1)
+
+    def test_concurrent_recompute_serves_stale_value(self):
+        caching.get_or_compute('key', lambda: 'old', timeout=0)
+        cache.add('key:lock', True, 10)  # Another worker is recomputing
+        self.assertEqual(caching.get_or_compute('key', lambda: 'new', timeout=60), 'old')
+
+
+class ActivityFeedTests(APITestCase):
+
+    def feed(self):
+        client = self.admin_client()
+        return client.get('/api/admin/activities/').json()['activities']
+
+    def test_records_created_updated_and_completed(self):
+        project = make_project(self.user, title='Launch')
+        project.title = 'Launch v2'
+        project.save()
+        project.completed = True
+        project.completed_at = timezone.now()
+        project.save()
+
+        types = [item['type'] for item in self.feed() if item.get('project_id') == project.pk]
+        self.assertCountEqual(types, ['project_created', 'project_updated', 'project_completed'])
+
+    def test_keeps_one_update_event_per_project(self):
+        project = make_project(self.user)
+        for title in ('A', 'B', 'C'):
+            project.title = title
+            project.save()
+        # The log keeps every event; the feed shows the latest update only
+        updates = ActivityEvent.objects.filter(project_id=project.pk, event_type=ActivityEvent.PROJECT_UPDATED)
+        self.assertEqual(updates.count(), 3)
+        feed_updates = [item['title'] for item in self.feed()
+                        if item.get('project_id') == project.pk and item['type'] == 'project_updated']
+        self.assertEqual(feed_updates, ['Project updated: C'])
+
+    def test_update_view_reads_owner_without_extra_query(self):
+        project = make_project(self.user)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.patch(f'/api/projects/update/{project.pk}/', {'title': 'New'}, format='json')
+        user_reads = [q for q in queries.captured_queries if q['sql'].startswith('SELECT "api_customuser"')]
+        self.assertEqual(user_reads, [])
+
+
+class NotificationTests(APITestCase):
+
+    def test_sweep_creates_each_reminder_once(self):
+        soon = timezone.localtime() + timedelta(hours=2)
+        make_project(self.user, title='Due', end_date=soon.date(), end_time=soon.time().replace(microsecond=0))
+        notifications.sweep()
+        notifications.sweep()
+        self.assertEqual(Notification.objects.filter(kind=Notification.DUE_SOON).count(), 1)
+
+    def test_list_count_and_mark_read(self):
+        soon = timezone.localtime() + timedelta(hours=2)
+        make_project(self.user, end_date=soon.date(), end_time=soon.time().replace(microsecond=0))
+        notifications.sweep()
+
+        self.assertEqual(self.client.get('/api/notifications/unread-count/').json(), {'unread': 1})
+        self.assertEqual(len(self.client.get('/api/notifications/').json()), 1)
+        response = self.client.post('/api/notifications/', {'all': True}, format='json')
+        self.assertEqual(response.json(), {'marked_read': 1})
+        self.assertEqual(self.client.get('/api/notifications/unread-count/').json(), {'unread': 0})
+
+
+class StreamTests(APITestCase):
+
+    def make_event(self, **kwargs):
+        return ActivityEvent.objects.create(event_type=ActivityEvent.PROJECT_CREATED, title='x', **kwargs)
+
+    def test_tail_returns_each_row_once(self):
+        self.make_event()
+        tail = TableTail(ActivityEvent)
+        tail.start()
+        self.assertEqual(tail.fetch(), [])
+        event = self.make_event()
+        self.assertEqual(tail.fetch(), [event])
+        self.assertEqual(tail.fetch(), [])
+
+    def test_tail_picks_up_rows_committed_out_of_id_order(self):
+        tail = TableTail(ActivityEvent)
+        tail.start()
+        first = self.make_event()
+        higher = self.make_event(id=first.pk + 5)
+        self.assertEqual(tail.fetch(), [first, higher])
+        late = self.make_event(id=first.pk + 2)
+        self.assertEqual(tail.fetch(), [late])
+
+    def test_broker_delivers_to_connected_owner(self):
+        project = make_project(self.user)
+        broker = Broker()
+        broker._start_tails()
+        project.title = 'Renamed'
+        project.save()
+        events = broker._fetch_new_events({self.user.pk})
+        self.assertEqual([(user_id, event['data']['event']) for user_id, event in events],
+                         [(self.user.pk, ActivityEvent.PROJECT_UPDATED)])
+        self.assertEqual(broker._fetch_new_events({self.user.pk}), [])
+
+    def test_rows_written_before_the_first_poll_are_delivered(self):
+        project = make_project(self.user)
+        broker = Broker()
+
+        async def connect():
+            await broker.subscribe(self.user.pk)
+            broker._tail_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await broker._tail_task
+
+        async_to_sync(connect)()
+        project.title = 'Renamed'
+        project.save()
+        events = broker._fetch_new_events({self.user.pk})
+        self.assertEqual([event['data']['event'] for _, event in events], [ActivityEvent.PROJECT_UPDATED])
+
+    def test_ticket_is_accepted_once(self):
+        ticket = self.client.post('/api/notifications/stream/ticket/').json()['ticket']
+        self.assertEqual(streams.redeem_ticket(ticket), self.user.pk)
+        self.assertIsNone(streams.redeem_ticket(ticket))
+        self.assertIsNone(streams.redeem_ticket(ticket + 'x'))
+        with self.settings(NOTIFICATION_STREAM_TICKET_MAX_AGE=-1):
+            self.assertIsNone(streams.redeem_ticket(streams.issue_ticket(self.user.pk)))
+
+    def test_access_token_in_the_url_is_refused(self):
+        token = AccessToken.for_user(self.user)
+        response = APIClient().get('/api/notifications/stream/', {'token': str(token)})
+        self.assertEqual(response.status_code, 401)
+
+
+class PhaseTests(APITestCase):
+
+    def create_project(self):
+        response = self.client.post('/api/projects/create/', {
+            'title': 'Phased',
+            'phases': [{'name': 'One'}, {'name': 'Two'}],
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        return response.json()
+
+    def test_create_with_phases_in_order(self):
+        data = self.create_project()
+        self.assertEqual([(p['name'], p['order']) for p in data['phases']], [('One', 0), ('Two', 1)])
+
+    def test_single_phase_update_and_complete(self):
+        data = self.create_project()
+        phase_id = data['phases'][0]['id']
+        url = f"/api/projects/{data['id']}/phases/{phase_id}/"
+        self.assertEqual(self.client.patch(url, {'comment': 'Done soon'}, format='json').status_code, 200)
+        self.assertEqual(self.client.post(url + 'complete/', {}, format='json').status_code, 200)
+        phase = Phase.objects.get(pk=phase_id)
+        self.assertEqual((phase.comment, phase.completed), ('Done soon', True))
+
+    def test_full_list_update_keeps_ids_and_drops_missing(self):
+        data = self.create_project()
+        kept = data['phases'][1]
+        response = self.client.patch(f"/api/projects/update/{data['id']}/", {
+            'phases': [{'id': kept['id'], 'name': 'Two renamed'}, {'name': 'Three'}],
+        }, format='json')
+        phases = response.json()['phases']
+        self.assertEqual(phases[0]['id'], kept['id'])
+        self.assertEqual([p['name'] for p in phases], ['Two renamed', 'Three'])
+        self.assertEqual(Phase.objects.filter(project_id=data['id']).count(), 2)
+
+    def test_failed_phase_write_rolls_back_project_update(self):
+        project = make_project(self.user, title='Before')
+        request = RequestFactory().patch('/')
+        request.user = self.user
+        serializer = ProjectSerializer(project, data={'title': 'After', 'phases': [{'name': 'New'}]},
+                                       partial=True, context={'request': request})
+        self.assertTrue(serializer.is_valid())
+        with mock.patch.object(Phase.objects, 'bulk_create', side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                serializer.save()
+        project.refresh_from_db()
+        self.assertEqual(project.title, 'Before')
+
+
+class ProjectBatchTests(APITestCase):
+
+    def batch(self, body):
+        return self.client.post('/api/projects/batch/', body, format='json')
+
+    def test_applies_every_operation(self):
+        updated = make_project(self.user, title='Old')
+        deleted = make_project(self.user)
+        response = self.batch({'operations': [
+            {'op': 'create', 'data': {'title': 'New'}},
+            {'op': 'update', 'id': updated.pk, 'data': {'title': 'Changed'}},
+            {'op': 'delete', 'id': deleted.pk},
+        ]})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            sorted(Project.objects.values_list('title', flat=True)), ['Changed', 'New']
+        )
+
+    def test_invalid_operation_applies_nothing(self):
+        project = make_project(self.user, title='Old')
+        response = self.batch({'operations': [
+            {'op': 'create', 'data': {'title': 'New'}},
+            {'op': 'update', 'id': project.pk, 'data': {'title': 'Changed'}},
+            {'op': 'delete', 'id': 999999},
+        ]})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(list(Project.objects.values_list('title', flat=True)), ['Old'])
+
+    def test_failure_while_writing_rolls_back(self):
+        project = make_project(self.user)
+        with mock.patch('api.views.ProjectBatchView.apply_deletes', side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                self.batch({'operations': [
+                    {'op': 'create', 'data': {'title': 'New'}},
+                    {'op': 'delete', 'id': project.pk},
+                ]})
+        self.assertEqual(list(Project.objects.values_list('pk', flat=True)), [project.pk])
+
+    def test_body_that_is_not_an_object_is_rejected(self):
+        for body in ([{'op': 'create'}], 'operations', 3):
+            self.assertEqual(self.batch(body).status_code, 400)
+
+    def test_other_users_projects_are_not_found(self):
+        other = make_project(make_user('other@example.com'))
+        response = self.batch({'operations': [{'op': 'delete', 'id': other.pk}]})
+        self.assertEqual(response.status_code, 400)
+        self.assertTrue(Project.objects.filter(pk=other.pk).exists())
+
+
+class LoginTests(APITestCase):
+
+    def login(self, email, password='s3cret-pass'):
+        return APIClient().post('/api/login/', {'email': email, 'password': password}, format='json')
+
+    def test_case_insensitive_email_and_last_login(self):
+        response = self.login('Owner@Example.com')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('refresh', response.json())
+        self.user.refresh_from_db()
+        self.assertIsNotNone(self.user.last_login)
+
+    def test_wrong_password(self):
+        self.assertEqual(self.login('owner@example.com', 'nope').status_code, 400)
+
+    @override_settings(PASSWORD_HASHER_QUEUE_LIMIT=0)
+    def test_full_hasher_queue_answers_503(self):
+        response = self.login('owner@example.com')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], str(hashing.HasherBusy.wait))
+
+    def test_register(self):
+        response = APIClient().post('/api/register/', {
+            'username': 'newbie', 'email': 'newbie@example.com',
+            'password': 'An0ther-pass!', 'password2': 'An0ther-pass!',
+            'first_name': 'New', 'last_name': 'User',
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertTrue(CustomUser.objects.get(email='newbie@example.com').check_password('An0ther-pass!'))
+
+    def test_profile_password_change_goes_through_the_hasher_pool(self):
+        with mock.patch.object(hashing, 'make_password_sync', wraps=hashing.make_password_sync) as make:
+            response = self.client.put('/api/profile/', {'password': 'N3w-secret-pass'}, format='multipart')
+        self.assertEqual(response.status_code, 200, response.content)
+        make.assert_called_once_with('N3w-secret-pass')
+        self.assertEqual(self.login('owner@example.com', 'N3w-secret-pass').status_code, 200)
+
+
+class JWTUserCacheTests(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+
+    def user_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/notifications/unread-count/')
+        self.assertEqual(response.status_code, 200)
+        return [q for q in queries.captured_queries if 'FROM "api_customuser"' in q['sql']]
+
+    @override_settings(CACHES=SHARED_CACHE)
+    def test_cached_with_a_shared_cache(self):
+        cache.clear()
+        self.user_queries()
+        self.assertEqual(self.user_queries(), [])
+
+    @override_settings(CACHES=SHARED_CACHE)
+    def test_deactivation_is_seen_at_once(self):
+        cache.clear()
+        self.user_queries()
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get('/api/notifications/unread-count/').status_code, 401)
+
+    def test_uncached_with_a_process_local_cache(self):
+        self.user_queries()
+        self.assertEqual(len(self.user_queries()), 1)
+
+    def test_check_warns_about_a_process_local_cache(self):
+        self.assertEqual([message.id for message in caching.check_shared_cache(None)], ['api.W001'])
+        with self.settings(CACHES=SHARED_CACHE):
+            self.assertEqual(caching.check_shared_cache(None), [])
+
+
+@override_settings(CACHES=SHARED_CACHE, TOKEN_REVOCATION_SYNC_INTERVAL=60)
+class RevocationTests(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def test_blacklist_reaches_a_second_filter(self):
+        token = RefreshToken.for_user(self.user)
+        other_process = RevocationFilter()
+        self.assertFalse(other_process.might_be_revoked(token['jti']))
+        token.blacklist()
+        # The version bump makes the other filter sync before its interval
+        self.assertTrue(other_process.might_be_revoked(token['jti']))
+
+    def test_blacklisted_refresh_token_is_rejected(self):
+        token = RefreshToken.for_user(self.user)
+        token.blacklist()
+        revocations.reset()
+        response = APIClient().post('/api/token/refresh/', {'refresh': str(token)}, format='json')
+        self.assertEqual(response.status_code, 401)
+
+    @override_settings(TOKEN_REVOCATION_SYNC_INTERVAL=0, TOKEN_REVOCATION_SYNC_MARGIN=10)
+    def test_rows_committed_out_of_id_order_are_loaded(self):
+        def blacklist(row_id):
+            token = RefreshToken.for_user(self.user)
+            BlacklistedToken.objects.create(id=row_id, token=OutstandingToken.objects.get(jti=token['jti']))
+            return token['jti']
+
+        clock = [1000.0]
+        tick = lambda seconds: clock.__setitem__(0, clock[0] + seconds)
+        revoked = RevocationFilter()
+        with mock.patch('api.tokens.time.monotonic', lambda: clock[0]):
+            blacklist(10)
+            revoked.might_be_revoked('')
+            for _ in range(20):
+                tick(1)
+                revoked.might_be_revoked('')
+            blacklist(20)
+            tick(1)
+            revoked.might_be_revoked('')
+            # Id 15 was allocated before 20 but commits a few seconds later
+            tick(3)
+            late = blacklist(15)
+            tick(1)
+            self.assertTrue(revoked.might_be_revoked(late))
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_falls_back_to_the_database_without_a_shared_cache(self):
+        token = RefreshToken.for_user(self.user)
+        self.assertTrue(RevocationFilter().might_be_revoked(token['jti']))
+        token.check_blacklist()  # Not blacklisted: the database says so
+        token.blacklist()
+        with self.assertRaises(Exception):
+            RefreshToken(str(token))
+
+    def test_prune_deletes_expired_tokens_only(self):
+        live = RefreshToken.for_user(self.user)
+        expired = RefreshToken.for_user(self.user)
+        OutstandingToken.objects.filter(jti=expired['jti']).update(expires_at=timezone.now() - timedelta(days=1))
+        BlacklistedToken.objects.create(token=OutstandingToken.objects.get(jti=expired['jti']))
+        self.assertEqual(prune_expired(), 1)
+        self.assertEqual(list(OutstandingToken.objects.values_list('jti', flat=True)), [live['jti']])
+        self.assertFalse(BlacklistedToken.objects.exists())
+
+    def test_blacklisting_prunes_at_most_once_per_interval(self):
+        def expired_token():
+            token = RefreshToken.for_user(self.user)
+            OutstandingToken.objects.filter(jti=token['jti']).update(expires_at=timezone.now() - timedelta(days=1))
+            return token['jti']
+
+        first = expired_token()
+        RefreshToken.for_user(self.user).blacklist()
+        self.assertFalse(OutstandingToken.objects.filter(jti=first).exists())
+
+        second = expired_token()
+        RefreshToken.for_user(self.user).blacklist()
+        self.assertTrue(OutstandingToken.objects.filter(jti=second).exists())
+
+
+@override_settings(TOKEN_WRITE_BEHIND=True)
+class TokenWriteBehindTests(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        # Flushed by hand here rather than by the background thread
+        patcher = mock.patch('api.tokens.write_buffer', TokenWriteBuffer())
+        self.buffer = patcher.start()
+        self.addCleanup(patcher.stop)
+        run = mock.patch.object(TokenWriteBuffer, '_run')
+        run.start()
+        self.addCleanup(run.stop)
+
+    def test_records_are_written_on_flush(self):
+        token = RefreshToken.for_user(self.user)
+        self.assertFalse(OutstandingToken.objects.filter(jti=token['jti']).exists())
+        self.assertEqual(self.buffer.flush(), 1)
+        self.assertTrue(OutstandingToken.objects.filter(jti=token['jti']).exists())
+
+    def test_pending_revocation_is_enforced_before_flush(self):
+        token = RefreshToken.for_user(self.user)
+        token.blacklist()
+        with self.assertRaises(Exception):
+            RefreshToken(str(token))
+        self.buffer.flush()
+        self.assertTrue(BlacklistedToken.objects.filter(token__jti=token['jti']).exists())
+
+
+class MediaTestCase(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        overrides = self.settings(MEDIA_ROOT=media_root)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+
+class ProfilePictureTests(MediaTestCase):
+
+    def upload(self, content, name='me.png'):
+        return self.client.put(
+            '/api/profile/', {'profile_picture': SimpleUploadedFile(name, content)}, format='multipart'
+        )
+
+    def test_thumbnails_replace_the_original_in_urls(self):
+        self.user.profile_picture.save('me.png', ContentFile(image_bytes(size=(2000, 1000))))
+        thumbnails = images.process_profile_picture(self.user.pk)
+        self.assertEqual(set(thumbnails), set(images.SIZES))
+
+        self.user.refresh_from_db()
+        avatar = self.user.profile_picture.storage.open(thumbnails['avatar'])
+        with avatar, Image.open(avatar) as image:
+            self.assertEqual((image.format, max(image.size)), ('WEBP', images.SIZES['avatar']))
+        self.assertTrue(images.picture_url(self.user, 'list').endswith('.webp'))
+
+    def test_unsupported_type_is_rejected_while_streaming(self):
+        response = self.upload(b'%PDF-1.4 not an image', name='me.png')
+        self.assertEqual(response.status_code, 400)
+
+    @override_settings(PROFILE_PICTURE_MAX_SIZE=1024)
+    def test_oversized_upload_is_rejected(self):
+        response = self.upload(image_bytes(size=(400, 400)) + b'\0' * 4096)
+        self.assertEqual(response.status_code, 413)
+
+
+class MediaStorageTests(MediaTestCase):
+
+    def get(self, name, **headers):
+        # Called directly: the route only exists when MEDIA_SERVE_MODE is set
+        return MediaView.as_view()(RequestFactory().get(f'/media/{name}', **headers), path=name)
+
+    def test_same_bytes_share_one_name(self):
+        storage = ContentAddressedStorage()
+        first = storage.save('profile_pics/a.png', ContentFile(b'same'))
+        second = storage.save('profile_pics/b.png', ContentFile(b'same'))
+        self.assertEqual(first, second)
+        self.assertIsNotNone(content_hash(first))
+
+    def test_file_is_renamed_into_place(self):
+        storage = ContentAddressedStorage()
+        with mock.patch('api.storage.os.replace', side_effect=OSError):
+            with self.assertRaises(OSError):
+                storage.save('docs/a.txt', ContentFile(b'partial'))
+        name = storage.save('docs/a.txt', ContentFile(b'partial'))
+        self.assertEqual(os.listdir(os.path.dirname(storage.path(name))), [os.path.basename(name)])
+        with storage.open(name) as f:
+            self.assertEqual(f.read(), b'partial')
+
+    @override_settings(MEDIA_SERVE_MODE='django')
+    def test_hashed_files_are_immutable_and_revalidate(self):
+        name = ContentAddressedStorage().save('profile_pics/a.png', ContentFile(image_bytes()))
+        response = self.get(name)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('immutable', response['Cache-Control'])
+
+        response = self.get(name, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    @override_settings(MEDIA_SERVE_MODE='django')
+    def test_byte_ranges(self):
+        name = ContentAddressedStorage().save('docs/a.txt', ContentFile(b'0123456789'))
+        response = self.get(name, HTTP_RANGE='bytes=2-4')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b''.join(response.streaming_content), b'234')
+        response = self.get(name, HTTP_RANGE='bytes=50-')
+        self.assertEqual(response.status_code, 416)
+
+    @override_settings(MEDIA_SERVE_MODE='x-accel-redirect', MEDIA_ACCEL_PREFIX='/protected/')
+    def test_ranges_are_left_to_the_web_server(self):
+        name = ContentAddressedStorage().save('docs/a.txt', ContentFile(b'0123456789'))
+        response = self.get(name, HTTP_RANGE='bytes=2-4')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Accel-Redirect'], f'/protected/{name}')
+        self.assertEqual(response.content, b'')
+
+
+class JSONTests(SimpleTestCase):
+
+    def test_orjson_renderer_matches_json_renderer(self):
+        projects = benchmarks.sample_projects(50)
+        payloads = [
+            benchmarks.raw_values_payload(),
+            ProjectSerializer(projects, many=True).data,
+            AdminProjectSerializer(projects, many=True).data,
+        ]
+        for payload in payloads:
+            self.assertEqual(ORJSONRenderer().render(payload), JSONRenderer().render(payload))
+
+    def test_non_finite_floats_are_refused(self):
+        for value in (float('nan'), float('inf'), float('-inf')):
+            with self.assertRaises(ValueError):
+                ORJSONRenderer().render({'scores': [1.5, value]})
+        self.assertEqual(ORJSONRenderer().render({'score': None}), b'{"score":null}')
+
+    def test_orjson_parser_matches_json_parser(self):
+        body = JSONRenderer().render(benchmarks.raw_values_payload())
+        self.assertEqual(ORJSONParser().parse(BytesIO(body)), JSONParser().parse(BytesIO(body)))
+
+
+class SparseFieldsTests(APITestCase):
+
+    def test_fields_and_exclude(self):
+        make_project(self.user, title='Only')
+        project = self.client.get('/api/projects/', {'fields': 'id,title'}).json()['results'][0]
+        self.assertEqual(list(project), ['id', 'title'])
+        project = self.client.get('/api/projects/', {'exclude': 'phases,description'}).json()['results'][0]
+        self.assertNotIn('phases', project)
+        self.assertIn('title', project)
+
+    def test_unknown_field_is_400(self):
+        response = self.client.get('/api/projects/', {'fields': 'id,nope'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'fields': ['Unknown field: nope']})
+
+    def test_unselected_relations_are_not_loaded(self):
+        make_project(self.user)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get('/api/projects/', {'fields': 'id,title'})
+        self.assertFalse(any('api_phase' in q['sql'] for q in queries.captured_queries))
+
+
+class ReplicaRoutingTests(SimpleTestCase):
+    replica = {'default': {'ENGINE': 'django.db.backends.sqlite3'}, 'replica': {'ENGINE': 'django.db.backends.sqlite3'}}
+
+    def read_db(self):
+        token = routers._read_from_replica.set(True)
+        try:
+            return routers.ReplicaRouter().db_for_read(Project)
+        finally:
+            routers._read_from_replica.reset(token)
+
+    def test_primary_without_a_replica(self):
+        self.assertIsNone(self.read_db())
+
+    @override_settings(CACHES=SHARED_CACHE)
+    def test_replica_reads_need_a_shared_cache(self):
+        with self.settings(DATABASES=self.replica):
+            self.assertEqual(self.read_db(), routers.REPLICA)
+            self.assertEqual(routers.check_replica_cache(None), [])
+        with self.settings(DATABASES=self.replica, CACHES={'default': {
+                'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}):
+            self.assertIsNone(self.read_db())
+            self.assertEqual([error.id for error in routers.check_replica_cache(None)], ['api.E001'])
+
+    def test_pin_middleware_is_async_capable(self):
+        async def get_response(request):
+            return HttpResponse(status=201)
+
+        middleware = ReplicaPinMiddleware(get_response)
+        self.assertTrue(iscoroutinefunction(middleware))
+        request = RequestFactory().post('/')
+        request.user = mock.Mock(is_authenticated=True, pk=7)
+        with mock.patch('api.middleware.replica_configured', return_value=True), \
+                mock.patch('api.middleware.pin_to_primary') as pin:
+            asyncio.run(middleware(request))
+        pin.assert_called_once_with(7)
+
+
+class TunedSQLiteTests(SimpleTestCase):
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        settings_dict = dict(connections['default'].settings_dict, NAME=os.path.join(directory, 'db.sqlite3'))
+        self.db = connections['tuned'] = TunedSQLiteWrapper(settings_dict, alias='tuned')
+        self.addCleanup(connections.__delitem__, 'tuned')
+        self.addCleanup(self.db.close)
+        with self.db.cursor() as cursor:
+            cursor.execute('CREATE TABLE item (name TEXT)')
+
+    def count(self):
+        with self.db.cursor() as cursor:
+            cursor.execute('SELECT COUNT(*) FROM item')
+            return cursor.fetchone()[0]
+
+    def test_pragmas_and_immediate_transactions(self):
+        with self.db.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            self.assertEqual(cursor.fetchone()[0], 'wal')
+        self.assertEqual(self.db.transaction_mode, 'IMMEDIATE')
+
+    def test_rollback_releases_the_queue(self):
+        with self.assertRaises(ValueError):
+            with transaction.atomic(using='tuned'):
+                with self.db.cursor() as cursor:
+                    cursor.execute("INSERT INTO item VALUES ('a')")
+                self.assertTrue(self.db.holds_write_queue)
+                raise ValueError
+        self.assertFalse(self.db.holds_write_queue)
+        self.assertEqual(self.count(), 0)
+        write_queue.acquire(0)
+        write_queue.release()
+
+    @override_settings(SQLITE_WRITE_TIMEOUT=0.05)
+    def test_write_times_out_in_the_queue(self):
+        write_queue.acquire(1)
+        try:
+            with self.assertRaises(OperationalError):
+                with self.db.cursor() as cursor:
+                    cursor.execute("INSERT INTO item VALUES ('a')")
+        finally:
+            write_queue.release()
+        self.assertEqual(self.count(), 0)
+
+    def test_queue_hands_over_in_arrival_order(self):
+        queue = WriteQueue()
+        queue.acquire(1)
+        order = []
+
+        def writer(name):
+            queue.acquire(5)
+            order.append(name)
+            queue.release()
+
+        threads = []
+        for name in ('first', 'second', 'third'):
+            thread = threading.Thread(target=writer, args=(name,))
+            thread.start()
+            threads.append(thread)
+            while len(queue._waiters) < len(threads):
+                pass
+        queue.release()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(order, ['first', 'second', 'third'])
+
+
+class MetricsTests(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        registry = metrics.Registry()
+        patcher = mock.patch.object(metrics, 'registry', registry)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        # Flushing registers an exit hook, which would write to the real METRICS_DIR
+        self.addCleanup(atexit.unregister, registry.flush)
+
+    def test_records_route_queries_and_serialization(self):
+        make_project(self.user)
+        self.client.get('/api/projects/')
+        text = metrics.render()
+        self.assertIn('lms_requests_total{route="api/projects/",method="GET",status="200"} 1', text)
+        self.assertIn('lms_serialize_duration_seconds_count{route="api/projects/",method="GET"} 1', text)
+        histograms, _ = metrics.collect()
+        series = histograms[('db_queries', 'api/projects/', 'GET')]
+        self.assertGreater(series[-1], 0)
+
+    def test_metrics_endpoint_is_admin_only(self):
+        self.assertEqual(self.client.get('/api/admin/metrics/').status_code, 403)
+        response = self.admin_client().get('/api/admin/metrics/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('# TYPE lms_request_duration_seconds histogram', response.content.decode())
+
+    def test_workers_are_summed_from_their_files(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        with self.settings(METRICS_DIR=directory):
+            self.client.get('/api/projects/')
+            metrics.registry.flush()
+            # A file left by an earlier process that had the same pid
+            shutil.copy(
+                os.path.join(directory, f'{os.getpid()}-{metrics.STARTED_AT}.json'),
+                os.path.join(directory, f'{os.getpid()}-1.json'),
+            )
+            _, requests = metrics.collect()
+        self.assertEqual(requests[('api/projects/', 'GET', '200')], 2)
+
+    def test_files_of_stopped_workers_are_removed(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        with self.settings(METRICS_DIR=directory):
+            self.client.get('/api/projects/')
+            metrics.registry.flush()
+            stopped = os.path.join(directory, '4194305-1.json')
+            shutil.copy(os.path.join(directory, f'{os.getpid()}-{metrics.STARTED_AT}.json'), stopped)
+            with mock.patch('api.metrics.os.kill', side_effect=ProcessLookupError):
+                _, requests = metrics.collect()
+        self.assertEqual(requests[('api/projects/', 'GET', '200')], 1)
+        self.assertFalse(os.path.exists(stopped))
+
+    def test_middleware_is_async_capable(self):
+        async def get_response(request):
+            return HttpResponse(b'ok')
+
+        middleware = MetricsMiddleware(get_response)
+        self.assertTrue(iscoroutinefunction(middleware))
+        asyncio.run(middleware(RequestFactory().get('/')))
+        _, requests = metrics.collect()
+        self.assertEqual(requests, {('unresolved', 'GET', '200'): 1})
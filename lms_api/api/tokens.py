@@ -0,0 +1,304 @@
+"""
+Refresh tokens with an in-memory revocation check, and blacklist pruning.
+
+SimpleJWT checks the blacklist with a join query on every refresh, logout
+and password change. Here each process keeps the jtis of blacklisted,
+unexpired tokens in memory, and the database is only asked about tokens
+that set contains. The set is loaded once and then kept up to date:
+- Tokens blacklisted in this process are added at once.
+- Rows written by other processes are picked up on the next check after a
+  shared-cache version bump, or after TOKEN_REVOCATION_SYNC_INTERVAL seconds.
+  Ids are allocated at insert but rows become visible at commit, so each
+  sync re-reads every row whose id was allocated since TOKEN_REVOCATION_SYNC_MARGIN
+  seconds before the previous sync. A blacklist insert that takes longer
+  than that to commit could be missed.
+The version bump needs a cache shared by all workers (see
+`caching.is_shared()`), which settings require (Redis by default). With a
+process-local backend the set is not used and every check asks the
+database, as SimpleJWT does.
+
+With TOKEN_WRITE_BEHIND on, the OutstandingToken and BlacklistedToken
+inserts made by login, refresh and logout are buffered by `write_buffer`
+and written in one transaction every TOKEN_WRITE_FLUSH_INTERVAL seconds, or
+as soon as TOKEN_WRITE_BATCH_SIZE records are waiting. A revocation holds
+in the issuing process at once (the jti is in the revocation set and the
+pending buffer) and everywhere else once it has been flushed. Records still
+buffered when a process dies are lost: their tokens then behave as if they
+were never recorded, and a lost revocation lets that refresh token be used
+again until it expires.
+
+With rotation every refresh adds a blacklist row, so rows whose tokens have
+expired anyway are deleted as new ones come in: each blacklisting calls
+`maybe_prune()`, which deletes one batch of them at most every
+TOKEN_PRUNE_INTERVAL seconds across all workers. That keeps both tables the
+size of the live-token window without a scheduled job; the prune_tokens
+command clears a backlog in one go.
+"""
+import atexit
+import logging
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DatabaseError, transaction
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import BlacklistMixin, RefreshToken as BaseRefreshToken
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
+from . import caching
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = 'token_blacklist_version'
+PRUNE_KEY = 'token_prune_lock'
+# Seconds between sweeps of expired jtis out of the in-memory set
+EVICT_INTERVAL = 60
+
+
+class RevocationFilter:
+    def __init__(self):
+        self._revoked = {}  # jti -> expiry (epoch seconds)
+        self._watermarks = deque()  # (sync time, highest id read) of recent syncs
+        self._version = None
+        self._synced_at = None
+        self._evicted_at = 0
+        self._lock = threading.Lock()
+
+    def might_be_revoked(self, jti):
+        if not caching.is_shared():
+            # Other workers' blacklist writes would go unnoticed
+            return True
+        self._sync()
+        return jti in self._revoked
+
+    def add(self, jti, exp):
+        with self._lock:
+            self._revoked[jti] = exp
+        cache.set(VERSION_KEY, time.time_ns(), None)
+
+    def reset(self):
+        with self._lock:
+            self._revoked.clear()
+            self._watermarks.clear()
+            self._version = None
+            self._synced_at = None
+
+    def _sync(self):
+        version = cache.get(VERSION_KEY)
+        now = time.monotonic()
+        if (self._synced_at is not None and version == self._version
+                and now - self._synced_at < settings.TOKEN_REVOCATION_SYNC_INTERVAL):
+            return
+        with self._lock:
+            rows = BlacklistedToken.objects.filter(token__expires_at__gt=timezone.now())
+            floor = self._floor()
+            if floor is not None:
+                rows = rows.filter(id__gt=floor)
+            highest = floor or 0
+            for row_id, jti, expires_at in rows.values_list('id', 'token__jti', 'token__expires_at'):
+                self._revoked[jti] = expires_at.timestamp()
+                highest = max(highest, row_id)
+            if self._watermarks:
+                highest = max(highest, self._watermarks[-1][1])
+            self._watermarks.append((now, highest))
+            self._version = version
+            self._synced_at = now
+            if now - self._evicted_at >= EVICT_INTERVAL:
+                current = time.time()
+                self._revoked = {jti: exp for jti, exp in self._revoked.items() if exp > current}
+                self._evicted_at = now
+
+    def _floor(self):
+        """
+        The highest id read by the last sync that ran at least
+        TOKEN_REVOCATION_SYNC_MARGIN seconds before the previous one, or None
+        to read everything. Rows with ids above it may have committed since.
+        """
+        if self._synced_at is None:
+            return None
+        cutoff = self._synced_at - settings.TOKEN_REVOCATION_SYNC_MARGIN
+        while len(self._watermarks) > 1 and self._watermarks[1][0] <= cutoff:
+            self._watermarks.popleft()
+        if self._watermarks[0][0] <= cutoff:
+            return self._watermarks[0][1]
+        return None
+
+
+revocations = RevocationFilter()
+
+
+class TokenWriteBuffer:
+    def __init__(self):
+        self._outstanding = {}  # jti -> unsaved OutstandingToken
+        self._blacklisted = {}  # jti -> unsaved OutstandingToken to blacklist
+        self._in_flight = set()  # jtis of blacklist records being flushed
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def add_outstanding(self, record):
+        self._add(self._outstanding, record)
+
+    def add_blacklisted(self, record):
+        self._add(self._blacklisted, record)
+
+    def is_blacklist_pending(self, jti):
+        with self._lock:
+            return jti in self._blacklisted or jti in self._in_flight
+
+    def _add(self, records, record):
+        with self._lock:
+            records[record.jti] = record
+            size = len(self._outstanding) + len(self._blacklisted)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='token-write-buffer', daemon=True)
+                self._thread.start()
+                atexit.register(self.flush)
+        if size >= settings.TOKEN_WRITE_BATCH_SIZE:
+            self._wake.set()
+
+    def _run(self):
+        while True:
+            self._wake.wait(settings.TOKEN_WRITE_FLUSH_INTERVAL)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Token write buffer flush failed")
+
+    def flush(self):
+        """Write everything buffered in one transaction. Returns the number of records written."""
+        with self._lock:
+            outstanding, self._outstanding = self._outstanding, {}
+            blacklisted, self._blacklisted = self._blacklisted, {}
+            self._in_flight = set(blacklisted)
+        if not outstanding and not blacklisted:
+            return 0
+
+        try:
+            rows = list(outstanding.values()) + [
+                record for jti, record in blacklisted.items() if jti not in outstanding
+            ]
+            # Users deleted since the token was issued are left out, as
+            # SET_NULL would have done
+            user_ids = {row.user_id for row in rows if row.user_id is not None}
+            existing = set(get_user_model().objects.filter(pk__in=user_ids).values_list('pk', flat=True))
+            for row in rows:
+                if row.user_id not in existing:
+                    row.user_id = None
+
+            with transaction.atomic():
+                OutstandingToken.objects.bulk_create(rows, ignore_conflicts=True)
+                if blacklisted:
+                    token_ids = OutstandingToken.objects.filter(jti__in=list(blacklisted)).values_list('id', flat=True)
+                    BlacklistedToken.objects.bulk_create(
+                        [BlacklistedToken(token_id=token_id) for token_id in token_ids],
+                        ignore_conflicts=True,
+                    )
+        except Exception:
+            # Put the records back so the next flush retries them
+            with self._lock:
+                self._outstanding = {**outstanding, **self._outstanding}
+                self._blacklisted = {**blacklisted, **self._blacklisted}
+                self._in_flight = set()
+            raise
+
+        with self._lock:
+            self._in_flight = set()
+        if blacklisted:
+            # Let other processes pick up the new blacklist rows now
+            cache.set(VERSION_KEY, time.time_ns(), None)
+        return len(outstanding) + len(blacklisted)
+
+
+write_buffer = TokenWriteBuffer()
+
+
+class RefreshToken(BaseRefreshToken):
+
+    @classmethod
+    def for_user(cls, user):
+        if not settings.TOKEN_WRITE_BEHIND:
+            return super().for_user(user)
+        # Skip BlacklistMixin.for_user, which inserts the outstanding row now
+        token = super(BlacklistMixin, cls).for_user(user)
+        write_buffer.add_outstanding(token.outstanding_record(user_id=user.pk))
+        return token
+
+    def outstand(self):
+        if not settings.TOKEN_WRITE_BEHIND:
+            return super().outstand()
+        write_buffer.add_outstanding(self.outstanding_record())
+
+    def outstanding_record(self, user_id=None):
+        return OutstandingToken(
+            user_id=user_id or self.payload.get(api_settings.USER_ID_CLAIM),
+            jti=self.payload[api_settings.JTI_CLAIM],
+            token=str(self),
+            created_at=self.current_time,
+            expires_at=datetime_from_epoch(self.payload['exp']),
+        )
+
+    def check_blacklist(self):
+        jti = self.payload[api_settings.JTI_CLAIM]
+        if revocations.might_be_revoked(jti) and (
+            write_buffer.is_blacklist_pending(jti)
+            or BlacklistedToken.objects.filter(token__jti=jti).exists()
+        ):
+            raise TokenError(_("Token is blacklisted"))
+
+    def blacklist(self):
+        if settings.TOKEN_WRITE_BEHIND:
+            write_buffer.add_blacklisted(self.outstanding_record())
+            blacklisted = None
+        else:
+            blacklisted = super().blacklist()
+        revocations.add(self.payload[api_settings.JTI_CLAIM], self.payload['exp'])
+        maybe_prune()
+        return blacklisted
+
+
+def prune_expired(now=None, batch_size=None, max_batches=None):
+    """
+    Delete outstanding tokens that have expired, with their blacklist rows,
+    in batches. Returns the number of outstanding tokens deleted.
+    """
+    now = now or timezone.now()
+    batch_size = batch_size or settings.TOKEN_PRUNE_BATCH_SIZE
+    deleted = batches = 0
+    while max_batches is None or batches < max_batches:
+        batches += 1
+        ids = list(
+            OutstandingToken.objects.filter(expires_at__lte=now).values_list('id', flat=True)[:batch_size]
+        )
+        if not ids:
+            break
+        BlacklistedToken.objects.filter(token_id__in=ids).delete()
+        OutstandingToken.objects.filter(id__in=ids).delete()
+        deleted += len(ids)
+    logger.info(f"Pruned {deleted} expired outstanding tokens")
+    return deleted
+
+
+def maybe_prune():
+    """
+    Prune one batch of expired tokens if no worker has in the last
+    TOKEN_PRUNE_INTERVAL seconds. Returns the number deleted.
+    """
+    if not cache.add(PRUNE_KEY, True, settings.TOKEN_PRUNE_INTERVAL):
+        return 0
+    try:
+        # A savepoint when called inside a transaction, so a failure here leaves it usable
+        with transaction.atomic():
+            return prune_expired(max_batches=1)
+    except DatabaseError:
+        # Blacklisting has already happened; pruning waits for the next interval
+        logger.exception("Pruning expired tokens failed")
+        return 0
@@ -0,0 +1,54 @@
+"""
+Upload handler for profile pictures.
+
+Django's default handlers buffer uploads up to 2.5 MB in memory and only
+let the serializer look at a file once the whole body has arrived. This
+handler rejects a request before reading the body when its Content-Length
+is already too big. It checks the image signature on the first chunk,
+stops reading as soon as a file passes the size limit, and always spools
+to a temporary file, so memory per upload stays at one chunk.
+"""
+from django.conf import settings
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+
+# Leading bytes of the accepted image formats
+IMAGE_SIGNATURES = (
+    b'\xff\xd8\xff',          # JPEG
+    b'\x89PNG\r\n\x1a\n',     # PNG
+    b'GIF87a', b'GIF89a',     # GIF
+)
+# Room for the multipart boundaries and the other form fields
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+class UploadTooLarge(APIException):
+    status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    default_code = 'upload_too_large'
+
+    def __init__(self):
+        max_mb = settings.PROFILE_PICTURE_MAX_SIZE // 1024 // 1024
+        super().__init__({'profile_picture': [f"Image file too large ( > {max_mb}MB )"]})
+
+
+class ProfilePictureUploadHandler(TemporaryFileUploadHandler):
+
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):
+        if content_length > settings.PROFILE_PICTURE_MAX_SIZE + MULTIPART_OVERHEAD:
+            raise UploadTooLarge()
+        return super().handle_raw_input(input_data, META, content_length, boundary, encoding)
+
+    def receive_data_chunk(self, raw_data, start):
+        if start == 0 and not raw_data.startswith(IMAGE_SIGNATURES):
+            self.reject(ValidationError(
+                {'profile_picture': ["Unsupported file type. Supported: image/jpeg, image/png, image/gif"]}
+            ))
+        if start + len(raw_data) > settings.PROFILE_PICTURE_MAX_SIZE:
+            self.reject(UploadTooLarge())
+        return super().receive_data_chunk(raw_data, start)
+
+    def reject(self, exc):
+        # The parser does not clean up after errors other than StopUpload
+        self.upload_interrupted()
+        raise exc
@@ -1,6 +1,5 @@
-from django.urls import path
+from django.urls import path, re_path
 from django.conf import settings
-from django.conf.urls.static import static
 from .views import (
     AdminActivitiesView,
     AdminProjectListView,
@@ -8,11 +7,20 @@ from .views import (
     DashboardStatsView,
     # EmailUpdateView,
     LogoutView,
+    MediaView,
+    MetricsView,
+    NotificationCountView,
+    NotificationStreamView,
+    NotificationStreamTicketView,
     NotificationView,
+    PhaseCompleteView,
+    PhaseDetailView,
+    PhaseListView,
     ProfileSettingsView,
     ProjectDetailView,
     RegisterView,
     LoginView,
+    ProjectBatchView,
     ProjectCreateView,
     ProjectListView,
     ProjectUpdateView,
@@ -32,10 +40,17 @@ urlpatterns = [
     path('update-password/', UpdatePassword.as_view(), name='update-password'),
     path('projects/', ProjectListView.as_view(), name='project-list'),
     path('projects/create/', ProjectCreateView.as_view(), name='project-create'),
+    path('projects/batch/', ProjectBatchView.as_view(), name='project-batch'),
     path('projects/update/<int:project_id>/', ProjectUpdateView.as_view(), name='project-update'),
     path('projects/<int:project_id>/', ProjectDetailView.as_view(), name='project-detail'),
     path('projects/delete/<int:project_id>/', ProjectListView.as_view(), name='project-delete'),
+    path('projects/<int:project_id>/phases/', PhaseListView.as_view(), name='phase-list'),
+    path('projects/<int:project_id>/phases/<int:phase_id>/', PhaseDetailView.as_view(), name='phase-detail'),
+    path('projects/<int:project_id>/phases/<int:phase_id>/complete/', PhaseCompleteView.as_view(), name='phase-complete'),
     path('notifications/', NotificationView.as_view(), name='notifications'),
+    path('notifications/unread-count/', NotificationCountView.as_view(), name='notification-count'),
+    path('notifications/stream/', NotificationStreamView.as_view(), name='notification-stream'),
+    path('notifications/stream/ticket/', NotificationStreamTicketView.as_view(), name='notification-stream-ticket'),
     path('reward/', RewardView.as_view(), name='user-points'),
 
     #Admin urls
@@ -44,7 +59,14 @@ urlpatterns = [
     path('admin/user/<int:user_id>/', AdminUserDetailView.as_view(), name='admin-user-detail'),
     path('admin/dashboard-stats/', DashboardStatsView.as_view(), name='add-new-user'),
     path('admin/activities/', AdminActivitiesView.as_view(), name='admin-activities'),
+    path('admin/metrics/', MetricsView.as_view(), name='admin-metrics'),
 
     path('admin/projects/', AdminProjectListView.as_view(), name='project-list'),
     path('admin/projects/<int:project_id>/', AdminProjectDetailView.as_view(), name='project-detail'),
-] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
+]
+
+# Uploaded media, with caching headers and optional X-Accel-Redirect/X-Sendfile
+if settings.MEDIA_SERVE_MODE:
+    urlpatterns += [
+        re_path(rf"^{settings.MEDIA_URL.strip('/')}/(?P<path>.+)$", MediaView.as_view(), name='media'),
+    ]
\ No newline at end of file
@@ -3,12 +3,13 @@ from datetime import datetime, timedelta
 import logging
 from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework import generics
-from .serializers import LoginSerializer, ProfileSerializer, RegisterSerializer, ProjectSerializer, UserCreateSerializer, AdminUserDetailSerializer, AdminProjectSerializer
+from .serializers import LoginSerializer, ProfileSerializer, RegisterSerializer, ProjectSerializer, UserCreateSerializer, AdminUserDetailSerializer, AdminProjectSerializer, AdminProjectListSerializer, NotificationSerializer, PhaseSerializer, sync_phases
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.views import APIView
-from rest_framework_simplejwt.tokens import RefreshToken
-from .models import Project
+from .tokens import RefreshToken
+from .models import ActivityEvent, Notification, Phase, Project
+from .activity import latest_updates_only, project_event, to_feed_item
 from django.core.files.storage import default_storage
 from django.contrib.auth import get_user_model
 from rest_framework.permissions import IsAuthenticated, AllowAny, IsAdminUser
@@ -21,10 +22,41 @@ from django.utils.http import urlsafe_base64_encode
 from django.utils.encoding import force_bytes
 from django.core.exceptions import ValidationError
 from django.contrib.auth.password_validation import validate_password 
-from django.db.models import Q, F, Count, DateTimeField, Value
-from django.core.exceptions import PermissionDenied
-import uuid
+from django.db.models import Q, F, Count, Max, CharField, DateTimeField, Value
+from django.core.exceptions import PermissionDenied, SuspiciousFileOperation
+from django.utils._os import safe_join
+from .storage import content_hash
+from .uploads import ProfilePictureUploadHandler
+import hashlib
 from django.db.models.functions import Cast, Concat
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+from .pagination import ActivityCursorPagination, AdminProjectCursorPagination, ProjectCursorPagination
+from django.core.cache import cache
+from . import search as project_search
+from . import caching
+from . import streams
+from . import hashing
+from . import images
+from . import fieldsets
+from . import metrics
+from .async_views import AsyncAPIView
+from .routers import ReplicaReadMixin
+from .authentication import CachedJWTAuthentication, invalidate_user
+import asyncio
+import json
+import mimetypes
+import os
+import re
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.db.models import prefetch_related_objects
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import FileResponse, Http404, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.views import View
+from rest_framework.exceptions import APIException, AuthenticationFailed
+from rest_framework_simplejwt.exceptions import InvalidToken
 
 
 # Create a logger instance
@@ -32,29 +64,47 @@ logger = logging.getLogger(__name__)
 
 CustomUser = get_user_model()
 
-class RegisterView(generics.CreateAPIView):
+class RegisterView(AsyncAPIView):
     permission_classes = [AllowAny]
     serializer_class = RegisterSerializer
+
+    async def post(self, request, *args, **kwargs):
+        serializer = self.serializer_class(data=request.data, context={'request': request})
+        await sync_to_async(serializer.is_valid)(raise_exception=True)
+        password_hash = await hashing.make_password(serializer.validated_data['password'])
+        await sync_to_async(serializer.save)(password_hash=password_hash)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
     
 
-class LoginView(APIView):
+class LoginView(AsyncAPIView):
     permission_classes = [AllowAny]
 
-    def post(self, request):
+    async def post(self, request):
         serializer = LoginSerializer(data=request.data)
         
         if not serializer.is_valid():
             logger.error(f"Login validation errors: {serializer.errors}")
-            return Response(
-                {'error': 'Invalid input', 'details': serializer.errors},
-                status=status.HTTP_400_BAD_REQUEST
-            )
+            return self.invalid_input(serializer.errors)
+
+        email = serializer.validated_data['email']
+        password = serializer.validated_data['password']
+
+        user = await sync_to_async(LoginSerializer.get_user)(email)
+        if not user:
+            logger.warning(f"Login attempt with non-existent email: {email}")
+            return self.invalid_input({'non_field_errors': ['Invalid credentials']})
+
+        # Check password directly (bypasses authentication backend)
+        valid, password_hash = await hashing.verify_password(password, user.password)
+        if not valid:
+            logger.warning(f"Invalid password for user: {user.email}")
+            return self.invalid_input({'non_field_errors': ['Invalid credentials']})
 
         try:
-            user = serializer.validated_data['user']
-            refresh = RefreshToken.for_user(user)
+            await sync_to_async(LoginSerializer.record_login)(user, password_hash)
+            refresh = await sync_to_async(RefreshToken.for_user)(user)
             
-            profile_picture_url = user.profile_picture.url if user.profile_picture else None
+            profile_picture_url = images.picture_url(user, 'full')
             
             logger.info(f"User {user.username} logged in successfully")
 
@@ -80,6 +130,12 @@ class LoginView(APIView):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+    def invalid_input(self, errors):
+        return Response(
+            {'error': 'Invalid input', 'details': errors},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
 class LogoutView(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -90,13 +146,9 @@ class LogoutView(APIView):
                 logger.warning("Refresh token required for logout")
                 return Response({"error": "Refresh token required"}, status=status.HTTP_400_BAD_REQUEST)
             
-            try:
-                user = CustomUser.objects.get(email=request.user.email)
-            except CustomUser.DoesNotExist:
-                return Response({"error": "User not found"}, status=status.HTTP_404_NOT_FOUND)
-
-            user.is_active = False
-            user.save()
+            # request.user is already loaded; only is_active changes
+            CustomUser.objects.filter(pk=request.user.pk).update(is_active=False)
+            invalidate_user(request.user.pk)
 
             token = RefreshToken(refresh_token)
             token.blacklist()
@@ -109,25 +161,26 @@ class LogoutView(APIView):
 
 
 
-class UserCreateView(APIView):
+class UserCreateView(AsyncAPIView):
     permission_classes = [IsAuthenticated]
     
-    def post(self, request):
+    async def post(self, request):
         serializer = UserCreateSerializer(data=request.data)
-        if serializer.is_valid():
+        if await sync_to_async(serializer.is_valid)():
             try:
-                validate_password(serializer.validated_data['password'])
-                user = serializer.save()
-                return Response({
-                    'id': user.id,
-                    'username': user.username,
-                    'email': user.email,
-                    'first_name': user.first_name,
-                    'last_name': user.last_name,
-                    'is_superuser': user.is_superuser
-                }, status=status.HTTP_201_CREATED)
+                await sync_to_async(validate_password)(serializer.validated_data['password'])
             except ValidationError as e:
                 return Response({'password': e.messages}, status=status.HTTP_400_BAD_REQUEST)
+            password_hash = await hashing.make_password(serializer.validated_data['password'])
+            user = await sync_to_async(serializer.save)(password_hash=password_hash)
+            return Response({
+                'id': user.id,
+                'username': user.username,
+                'email': user.email,
+                'first_name': user.first_name,
+                'last_name': user.last_name,
+                'is_superuser': user.is_superuser
+            }, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
@@ -205,6 +258,11 @@ class AdminUserDetailView(APIView):
 class ProfileSettingsView(APIView):
     permission_classes = [IsAuthenticated]
     parser_classes = [MultiPartParser, FormParser]  # For file uploads
+
+    def initialize_request(self, request, *args, **kwargs):
+        # Check size and image type while the body streams in, spooling to disk
+        request.upload_handlers = [ProfilePictureUploadHandler(request)]
+        return super().initialize_request(request, *args, **kwargs)
     
     def get(self, request):
         """
@@ -236,16 +294,17 @@ class ProfileSettingsView(APIView):
         """
         try:
             user = request.user
-            data = request.data.copy()
+            # Form fields only: copying request.data would deep-copy the
+            # uploaded file, which cannot be done for files spooled to disk
+            data = request.POST.copy()
             
             
             # Handle profile picture operations
             if 'profile_picture' in request.FILES:
                 data['profile_picture'] = request.FILES['profile_picture']
             elif 'profile_picture' in data and data['profile_picture'] in ['null', '']:
-                # Handle profile picture removal
-                if user.profile_picture:
-                    self._delete_profile_picture(user)
+                # Handle profile picture removal; the file itself is left
+                # for prune_media since it may be shared
                 data['profile_picture'] = None
             
             serializer = ProfileSerializer(
@@ -267,7 +326,8 @@ class ProfileSettingsView(APIView):
                         {'password': 'Password must be at least 8 characters long'},
                         status=status.HTTP_400_BAD_REQUEST
                     )
-                user.set_password(password)
+                user.password = hashing.make_password_sync(password)
+                user._password = password  # What set_password() leaves for password_changed()
                 user.save()
                 logger.info(f"Password updated for user {user.username}")
             
@@ -276,6 +336,9 @@ class ProfileSettingsView(APIView):
             logger.info(f"Profile updated for user {user.username}")
             return Response(serializer.data)
             
+        except APIException:
+            # Rejected uploads (api/uploads.py) keep their own status
+            raise
         except ValidationError as e:
             logger.error(f"Profile update validation error: {str(e)}")
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
@@ -286,17 +349,6 @@ class ProfileSettingsView(APIView):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
-    def _delete_profile_picture(self, user):
-        """Safely delete old profile picture from storage"""
-        if user.profile_picture:
-            try:
-                if default_storage.exists(user.profile_picture.name):
-                    default_storage.delete(user.profile_picture.name)
-                    logger.info(f"Deleted old profile picture for user {user.username}")
-            except Exception as e:
-                logger.error(f"Error deleting profile picture: {str(e)}")
-                # Continue even if deletion fails
-
 
 
 
@@ -374,10 +426,10 @@ class ProfileSettingsView(APIView):
 
 
 
-class UpdatePassword(APIView):
+class UpdatePassword(AsyncAPIView):
     permission_classes = [IsAuthenticated]
 
-    def post(self, request, *args, **kwargs):
+    async def post(self, request, *args, **kwargs):
         user = request.user
         current_password = request.data.get('current_password')
         new_password = request.data.get('new_password')
@@ -398,7 +450,8 @@ class UpdatePassword(APIView):
             )
 
         # Verify current password
-        if not user.check_password(current_password):
+        valid, _ = await hashing.verify_password(current_password, user.password)
+        if not valid:
             return Response(
                 {'error': 'Current password is incorrect'},
                 status=status.HTTP_400_BAD_REQUEST
@@ -406,7 +459,7 @@ class UpdatePassword(APIView):
 
         # Validate new password meets requirements
         try:
-            validate_password(new_password, user)
+            await sync_to_async(validate_password)(new_password, user)
         except ValidationError as e:
             return Response(
                 {'error': e.messages},
@@ -414,17 +467,19 @@ class UpdatePassword(APIView):
             )
 
         # Set new password
-        user.set_password(new_password)
-        user.save()
+        user.password = await hashing.make_password(new_password)
+        user._password = new_password  # What set_password() leaves for password_changed()
+        await sync_to_async(user.save)()
 
         # Update session auth hash to prevent logout
-        update_session_auth_hash(request, user)
+        await sync_to_async(update_session_auth_hash)(request, user)
 
         # Optional: Invalidate existing tokens (JWT specific)
         try:
             refresh_token = request.data.get('refresh')
-            token = RefreshToken(refresh_token)
-            token.blacklist()
+            # Building the token checks the blacklist table
+            token = await sync_to_async(RefreshToken)(refresh_token)
+            await sync_to_async(token.blacklist)()
         except Exception:
             pass  # Token invalidation is optional
 
@@ -449,15 +504,258 @@ class ProjectCreateView(APIView):
 
 
 
+class ProjectBatchView(APIView):
+    """
+    Apply many project creates/updates/deletes in one request and one transaction
+    Payload:
+    {
+        "operations": [
+            {"op": "create", "data": {...project fields...}},
+            {"op": "update", "id": 5, "data": {...fields to change...}},
+            {"op": "delete", "id": 7}
+        ]
+    }
+    Either every operation is applied or none is. The response has one result
+    per operation, in request order.
+    """
+    permission_classes = [IsAuthenticated]
+    operations = ('create', 'update', 'delete')
+    completion_reward = 3
+
+    def post(self, request, *args, **kwargs):
+        # The body may be any JSON value, e.g. a bare list
+        operations = request.data.get('operations') if isinstance(request.data, dict) else None
+        max_operations = settings.PROJECT_BATCH_MAX_OPERATIONS
+        if not isinstance(operations, list) or not operations:
+            return Response({'error': 'operations must be a non-empty list'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(operations) > max_operations:
+            return Response(
+                {'error': f'At most {max_operations} operations are allowed per batch'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        results, creates, updates, deletes = self.validate_operations(request, operations)
+        if any('errors' in result for result in results):
+            logger.error(f"Project batch rejected for user {request.user.username}")
+            return Response({'status': 'error', 'results': results}, status=status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic():
+            created = self.apply_creates(request, creates)
+            updated, newly_completed = self.apply_updates(request, updates)
+            deleted_ids = self.apply_deletes(request, deletes)
+            if newly_completed:
+                CustomUser.objects.filter(pk=request.user.pk).update(
+                    reward=F('reward') + self.completion_reward * newly_completed
+                )
+                invalidate_user(request.user.pk)
+            self.record_side_effects(request, created, updated)
+
+        if newly_completed:
+            logger.info(f"Added {self.completion_reward * newly_completed} reward points to user {request.user.username}")
+
+        prefetch_related_objects(created + updated, 'phases')
+        for index, project in zip([index for index, _ in creates], created):
+            results[index].update({'status': status.HTTP_201_CREATED, 'project': ProjectSerializer(project).data})
+        for (index, _, _), project in zip(updates, updated):
+            results[index].update({'status': status.HTTP_200_OK, 'project': ProjectSerializer(project).data})
+        for index, project_id in deletes:
+            results[index]['status'] = status.HTTP_204_NO_CONTENT
+
+        logger.info(
+            f"Project batch by user {request.user.username}: {len(created)} created, "
+            f"{len(updated)} updated, {len(deleted_ids)} deleted"
+        )
+        return Response({'status': 'success', 'results': results}, status=status.HTTP_200_OK)
+
+    def validate_operations(self, request, operations):
+        results = [{'index': index} for index in range(len(operations))]
+        creates, update_ops, deletes = [], [], []
+        seen_ids = set()
+
+        for index, operation in enumerate(operations):
+            op = operation.get('op') if isinstance(operation, dict) else None
+            results[index]['op'] = op
+            if op not in self.operations:
+                results[index]['errors'] = {'op': f"Must be one of: {', '.join(self.operations)}"}
+                continue
+            if op == 'create':
+                creates.append((index, operation.get('data') or {}))
+                continue
+            project_id = operation.get('id')
+            if not isinstance(project_id, int) or isinstance(project_id, bool):
+                results[index]['errors'] = {'id': 'A project id is required'}
+                continue
+            if project_id in seen_ids:
+                results[index]['errors'] = {'id': 'Each project may appear only once per batch'}
+                continue
+            seen_ids.add(project_id)
+            results[index]['id'] = project_id
+            if op == 'update':
+                update_ops.append((index, project_id, operation.get('data') or {}))
+            else:
+                deletes.append((index, project_id))
+
+        # All creates validate together through the list serializer
+        if creates:
+            serializer = ProjectSerializer(data=[data for _, data in creates], many=True, context={'request': request})
+            if not serializer.is_valid():
+                for (index, _), errors in zip(creates, serializer.errors):
+                    if errors:
+                        results[index]['errors'] = errors
+            else:
+                creates = [(index, data) for (index, _), data in zip(creates, serializer.validated_data)]
+
+        # Projects to update or delete are fetched in one query
+        owned = Project.objects.filter(
+            user=request.user, id__in=[project_id for _, project_id, _ in update_ops] + [project_id for _, project_id in deletes]
+        ).prefetch_related('phases').in_bulk()
+
+        updates = []
+        for index, project_id, data in update_ops:
+            project = owned.get(project_id)
+            if project is None:
+                results[index]['errors'] = {'id': 'Project not found'}
+                continue
+            serializer = ProjectSerializer(project, data=data, partial=True, context={'request': request})
+            if serializer.is_valid():
+                updates.append((index, project, serializer.validated_data))
+            else:
+                results[index]['errors'] = serializer.errors
+
+        for index, project_id in deletes:
+            if project_id not in owned:
+                results[index]['errors'] = {'id': 'Project not found'}
+
+        return results, creates, updates, deletes
+
+    def apply_creates(self, request, creates):
+        projects, phases_data = [], []
+        for _, data in creates:
+            data = dict(data)
+            phases_data.append(data.pop('phases', []))
+            project = Project(user=request.user, **data)
+            # bulk_create skips save(), which keeps the deadline in sync
+            project.deadline = project.compute_deadline()
+            projects.append(project)
+        projects = Project.objects.bulk_create(projects)
+
+        phases = []
+        for project, project_phases in zip(projects, phases_data):
+            for order, phase_data in enumerate(project_phases):
+                phase_data = dict(phase_data)
+                phase_data.pop('id', None)
+                phase_data['order'] = order
+                phase = Phase(project=project, **phase_data)
+                phase.deadline = phase.compute_deadline()
+                phases.append(phase)
+        Phase.objects.bulk_create(phases)
+        return projects
+
+    def apply_updates(self, request, updates):
+        projects, fields, newly_completed = [], {'updated_at', 'deadline'}, 0
+        now = timezone.now()
+        for _, project, validated_data in updates:
+            validated_data = dict(validated_data)
+            phases_data = validated_data.pop('phases', None)
+            if validated_data.get('completed') and not project.completed:
+                newly_completed += 1
+                if 'completed_at' not in validated_data:
+                    validated_data['completed_at'] = now
+            for attr, value in validated_data.items():
+                setattr(project, attr, value)
+                fields.add(attr)
+            project.deadline = project.compute_deadline()
+            project.updated_at = now
+            if phases_data is not None:
+                sync_phases(project, phases_data)
+            projects.append(project)
+        if projects:
+            Project.objects.bulk_update(projects, sorted(fields))
+        return projects, newly_completed
+
+    def apply_deletes(self, request, deletes):
+        project_ids = [project_id for _, project_id in deletes]
+        if project_ids:
+            # A queryset delete still sends post_delete for every project
+            Project.objects.filter(user=request.user, id__in=project_ids).delete()
+        return project_ids
+
+    def record_side_effects(self, request, created, updated):
+        """Do what the post_save signals would have done for the bulk writes"""
+        events = []
+        for project in created:
+            events.append(project_event(project, ActivityEvent.PROJECT_CREATED, request.user.email, project.created_at))
+        for project in updated:
+            events.append(project_event(project, ActivityEvent.PROJECT_UPDATED, request.user.email, project.updated_at))
+            if project.completed and not getattr(project, '_loaded_completed', False):
+                events.append(project_event(
+                    project, ActivityEvent.PROJECT_COMPLETED, request.user.email,
+                    project.completed_at or project.updated_at,
+                ))
+            project._loaded_completed = project.completed
+        for project in created:
+            if project.completed:
+                events.append(project_event(
+                    project, ActivityEvent.PROJECT_COMPLETED, request.user.email,
+                    project.completed_at or project.created_at,
+                ))
+        ActivityEvent.objects.bulk_create(events)
+        project_search.index_projects([project.pk for project in created + updated])
+        caching.invalidate_dashboard_stats()
+
+
+
 class ProjectListView(APIView):
     permission_classes = [IsAuthenticated]
+    pagination_class = ProjectCursorPagination
 
     def get(self, request, *args, **kwargs):
-        projects = Project.objects.filter(user=request.user).order_by('-created_at')
-        logger.debug(f"Projects queryset for user {request.user.username}: {projects}")
-        serializer = ProjectSerializer(projects, many=True)
-        logger.debug(f"Serialized projects data: {serializer.data}")
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        # ?fields= / ?exclude= also trim the columns and relations loaded;
+        # created_at is always read for the cursor
+        fields, projects = fieldsets.select(
+            request, ProjectSerializer, Project.objects.filter(user=request.user), always=('created_at',)
+        )
+
+        # Validators come from one aggregate over the (user, updated_at) index,
+        # so an unchanged list is answered without serializing anything.
+        # Only the ETag is used to validate: max(updated_at) alone does not
+        # move when a project is deleted.
+        etag, last_modified = self.get_list_validators(request, projects)
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            logger.debug("Project list for user %s not modified", request.user.username)
+            response = not_modified
+        else:
+            paginator = self.pagination_class()
+            page = paginator.paginate_queryset(projects, request, view=self)
+            serializer = ProjectSerializer(page, many=True, fields=fields)
+            response = paginator.get_paginated_response(metrics.serialize(serializer))
+            logger.debug("Serialized %d projects for user %s", len(serializer.data), request.user.username)
+
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+        response['Cache-Control'] = 'private, no-cache'
+        patch_vary_headers(response, ['Authorization'])
+        return response
+
+    def get_list_validators(self, request, projects):
+        """
+        Build a weak ETag and Last-Modified value for the user's project list.
+        The ETag covers max(updated_at), the row count (so deletes are seen)
+        and the query string (so every page has its own tag).
+        """
+        summary = projects.aggregate(last_updated=Max('updated_at'), total=Count('id'))
+        last_updated = summary['last_updated']
+        fingerprint = '{}:{}:{}:{}'.format(
+            request.user.pk,
+            summary['total'],
+            last_updated.isoformat() if last_updated else '',
+            request.META.get('QUERY_STRING', ''),
+        )
+        etag = 'W/"{}"'.format(hashlib.md5(fingerprint.encode(), usedforsecurity=False).hexdigest())
+        last_modified = int(last_updated.timestamp()) if last_updated else None
+        return etag, last_modified
 
     def delete(self, request, project_id, *args, **kwargs):
         try:
@@ -475,9 +773,10 @@ class ProjectDetailView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request, project_id, *args, **kwargs):
+        fields, projects = fieldsets.select(request, ProjectSerializer, Project.objects.all())
         try:
-            project = Project.objects.get(id=project_id, user=request.user)
-            serializer = ProjectSerializer(project)
+            project = projects.get(id=project_id, user=request.user)
+            serializer = ProjectSerializer(project, fields=fields)
             logger.info(f"Project {project_id} retrieved by user {request.user.username}")
             return Response(serializer.data, status=status.HTTP_200_OK)
         except Project.DoesNotExist:
@@ -501,7 +800,7 @@ class ProjectUpdateView(APIView):
 
     def patch(self, request, project_id, *args, **kwargs):
         try:
-            project = Project.objects.get(id=project_id, user=request.user)
+            project = Project.objects.select_related('user').prefetch_related('phases').get(id=project_id, user=request.user)
             logger.debug(f"Fetched project for update: {project}")
         except Project.DoesNotExist:
             logger.error(f"Project {project_id} not found for user {request.user.username}")
@@ -524,17 +823,310 @@ class ProjectUpdateView(APIView):
 
 
 
+def touch_project(project_id):
+    """Bump updated_at so project list ETags see phase changes"""
+    Project.objects.filter(pk=project_id).update(updated_at=timezone.now())
+
+
+
+class PhaseListView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, project_id, *args, **kwargs):
+        if not Project.objects.filter(id=project_id, user=request.user).exists():
+            return Response({"error": "Project not found"}, status=status.HTTP_404_NOT_FOUND)
+        phases = Phase.objects.filter(project_id=project_id)
+        serializer = PhaseSerializer(phases, many=True)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+    def post(self, request, project_id, *args, **kwargs):
+        if not Project.objects.filter(id=project_id, user=request.user).exists():
+            return Response({"error": "Project not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        serializer = PhaseSerializer(data=request.data)
+        if not serializer.is_valid():
+            logger.error(f"Phase creation failed: {serializer.errors}")
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        order = serializer.validated_data.get('order')
+        if order is None:
+            # Append after the last phase
+            last = Phase.objects.filter(project_id=project_id).aggregate(last=Max('order'))['last']
+            order = 0 if last is None else last + 1
+        serializer.save(project_id=project_id, order=order)
+        touch_project(project_id)
+        logger.info(f"Phase added to project {project_id} by user {request.user.username}")
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+
+
+class PhaseDetailView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get_object(self, request, project_id, phase_id):
+        try:
+            return Phase.objects.get(id=phase_id, project_id=project_id, project__user=request.user)
+        except Phase.DoesNotExist:
+            return None
+
+    def patch(self, request, project_id, phase_id, *args, **kwargs):
+        phase = self.get_object(request, project_id, phase_id)
+        if phase is None:
+            return Response({"error": "Phase not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        serializer = PhaseSerializer(phase, data=request.data, partial=True)
+        if not serializer.is_valid():
+            logger.error(f"Phase update failed: {serializer.errors}")
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        serializer.save()
+        touch_project(project_id)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+    def delete(self, request, project_id, phase_id, *args, **kwargs):
+        deleted, _ = Phase.objects.filter(
+            id=phase_id, project_id=project_id, project__user=request.user
+        ).delete()
+        if not deleted:
+            return Response({"error": "Phase not found"}, status=status.HTTP_404_NOT_FOUND)
+        touch_project(project_id)
+        return Response({"message": "Phase deleted successfully"}, status=status.HTTP_204_NO_CONTENT)
+
+
+
+class PhaseCompleteView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, project_id, phase_id, *args, **kwargs):
+        """
+        Toggle one phase with a single UPDATE
+        Payload (optional): {"completed": false} to reopen it
+        """
+        completed = request.data.get('completed', True)
+        if not isinstance(completed, bool):
+            return Response({'completed': 'Must be true or false'}, status=status.HTTP_400_BAD_REQUEST)
+
+        updated = Phase.objects.filter(
+            id=phase_id, project_id=project_id, project__user=request.user
+        ).update(completed=completed)
+        if not updated:
+            return Response({"error": "Phase not found"}, status=status.HTTP_404_NOT_FOUND)
+        touch_project(project_id)
+        return Response({'id': phase_id, 'completed': completed}, status=status.HTTP_200_OK)
+
+
+
 class NotificationView(APIView):
     permission_classes = [IsAuthenticated]
+    max_notifications = 50
 
     def get(self, request):
-        notifications = []
-        projects = Project.objects.filter(user=request.user)
-        for project in projects:
-            notifications.extend(project.check_for_notifications())
+        """Unread notifications, newest first, read from the partial unread index"""
+        notifications = Notification.objects.filter(
+            user=request.user, read_at__isnull=True
+        ).order_by('-created_at')[:self.max_notifications]
+        serializer = NotificationSerializer(notifications, many=True)
         logger.info(f"Notifications retrieved for user {request.user.username}")
-        return Response(notifications, status=status.HTTP_200_OK)
+        return Response(metrics.serialize(serializer), status=status.HTTP_200_OK)
 
+    def post(self, request):
+        """
+        Mark notifications as read
+        Payload: {"ids": [1, 2]} or {"all": true}
+        """
+        unread = Notification.objects.filter(user=request.user, read_at__isnull=True)
+        if not request.data.get('all'):
+            ids = request.data.get('ids')
+            if not isinstance(ids, list):
+                return Response({'error': 'Provide a list of ids or "all": true'}, status=status.HTTP_400_BAD_REQUEST)
+            unread = unread.filter(id__in=ids)
+        marked = unread.update(read_at=timezone.now())
+        return Response({'marked_read': marked}, status=status.HTTP_200_OK)
+
+
+
+class NotificationCountView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        unread = Notification.objects.filter(user=request.user, read_at__isnull=True).count()
+        return Response({'unread': unread}, status=status.HTTP_200_OK)
+
+
+
+class NotificationStreamView(View):
+    """
+    Server-Sent Events stream of new notifications and project changes for
+    the authenticated user, fed by the in-process broker in api.streams.
+    Authenticate with the usual `Authorization: Bearer <access>` header, or
+    `?ticket=<ticket>` from NotificationStreamTicketView for EventSource
+    clients that cannot set headers. Only works when served through ASGI.
+    """
+
+    async def get(self, request):
+        user = await self.authenticate(request)
+        if user is None:
+            return JsonResponse({'detail': 'Authentication credentials were not provided or are invalid.'},
+                                status=status.HTTP_401_UNAUTHORIZED)
+
+        response = StreamingHttpResponse(self.event_stream(user.pk), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'  # Tell nginx not to buffer the stream
+        return response
+
+    async def authenticate(self, request):
+        authenticator = CachedJWTAuthentication()
+        header = authenticator.get_header(request)
+        if header is None:
+            ticket = request.GET.get('ticket')
+            user_id = await sync_to_async(streams.redeem_ticket)(ticket) if ticket else None
+            if user_id is None:
+                return None
+            return await CustomUser.objects.filter(pk=user_id, is_active=True).afirst()
+        raw_token = authenticator.get_raw_token(header)
+        if not raw_token:
+            return None
+        try:
+            validated_token = authenticator.get_validated_token(raw_token)
+            return await sync_to_async(authenticator.get_user)(validated_token)
+        except (InvalidToken, AuthenticationFailed):
+            return None
+
+    async def event_stream(self, user_id):
+        queue = await streams.broker.subscribe(user_id)
+        logger.info(f"Notification stream opened for user {user_id}")
+        try:
+            yield 'retry: 5000\n\n'
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=settings.NOTIFICATION_STREAM_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    # Comment line keeps proxies from closing an idle connection
+                    yield ': keepalive\n\n'
+                    continue
+                data = json.dumps(event['data'], cls=DjangoJSONEncoder)
+                yield f"id: {event['id']}\nevent: {event['type']}\ndata: {data}\n\n"
+        finally:
+            streams.broker.unsubscribe(user_id, queue)
+            logger.info(f"Notification stream closed for user {user_id}")
+
+
+class NotificationStreamTicketView(APIView):
+    """A short-lived, single-use ticket to open the notification stream with"""
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        return Response({
+            'ticket': streams.issue_ticket(request.user.pk),
+            'expires_in': settings.NOTIFICATION_STREAM_TICKET_MAX_AGE,
+        }, status=status.HTTP_200_OK)
+
+
+class MediaView(View):
+    """
+    Serve uploaded media. Content-addressed files (api/storage.py) never
+    change, so they are sent with a one-year immutable Cache-Control and
+    their hash as ETag; browsers and CDNs then stop asking for them. Older
+    files get a short max-age and an mtime/size ETag.
+
+    Only routed when MEDIA_SERVE_MODE is set, which selects how the body is
+    sent:
+    - 'django', meant for development: a FileResponse, which WSGI servers
+      with a sendfile file wrapper (e.g. gunicorn) send without copying
+      through Python. A single byte range is read and streamed in Python.
+    - 'x-accel-redirect' / 'x-sendfile': only headers are returned, for every
+      request including ranges, and nginx / Apache send the file or the range
+      from MEDIA_ACCEL_PREFIX.
+    """
+    immutable_max_age = 365 * 24 * 60 * 60
+    mutable_max_age = 60 * 60
+    range_re = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+    def get(self, request, path):
+        try:
+            full_path = safe_join(settings.MEDIA_ROOT, path)
+        except SuspiciousFileOperation:
+            raise Http404("File not found")
+        if not os.path.isfile(full_path):
+            raise Http404("File not found")
+
+        stat = os.stat(full_path)
+        digest = content_hash(path)
+        etag = f'"{digest}"' if digest else f'"{stat.st_size:x}-{int(stat.st_mtime):x}"'
+        max_age = self.immutable_max_age if digest else self.mutable_max_age
+
+        response = get_conditional_response(request, etag=etag, last_modified=int(stat.st_mtime))
+        if response is None:
+            response = self.file_response(request, path, full_path, stat.st_size)
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(stat.st_mtime)
+        response['Cache-Control'] = f'public, max-age={max_age}' + (', immutable' if digest else '')
+        return response
+
+    def file_response(self, request, path, full_path, size):
+        content_type = mimetypes.guess_type(full_path)[0] or 'application/octet-stream'
+        mode = settings.MEDIA_SERVE_MODE
+        if mode in ('x-accel-redirect', 'x-sendfile'):
+            response = HttpResponse(content_type=content_type)
+            if mode == 'x-accel-redirect':
+                response['X-Accel-Redirect'] = settings.MEDIA_ACCEL_PREFIX + path
+            else:
+                response['X-Sendfile'] = full_path
+            return response
+
+        byte_range = self.parse_range(request.headers.get('Range'), size)
+        if byte_range is False:
+            response = HttpResponse(status=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+
+        f = open(full_path, 'rb')
+        if byte_range is None:
+            response = FileResponse(f, content_type=content_type)
+        else:
+            start, end = byte_range
+            response = StreamingHttpResponse(
+                self.read_range(f, start, end - start + 1),
+                status=status.HTTP_206_PARTIAL_CONTENT, content_type=content_type,
+            )
+            response['Content-Length'] = str(end - start + 1)
+            response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Accept-Ranges'] = 'bytes'
+        return response
+
+    def parse_range(self, header, size):
+        """(start, end) for a single satisfiable range, None to send it all, False if unsatisfiable"""
+        if not header:
+            return None
+        match = self.range_re.match(header.strip())
+        if not match or match.groups() == ('', ''):
+            return None  # Multiple or malformed ranges: send the whole file
+        first, last = match.groups()
+        if first == '':
+            start, end = max(size - int(last), 0), size - 1  # Suffix range: the last N bytes
+        else:
+            start, end = int(first), min(int(last), size - 1) if last else size - 1
+        if start >= size or start > end:
+            return False
+        return start, end
+
+    def read_range(self, f, start, length, block_size=64 * 1024):
+        with f:
+            f.seek(start)
+            while length > 0:
+                chunk = f.read(min(block_size, length))
+                if not chunk:
+                    break
+                length -= len(chunk)
+                yield chunk
+
+
+
+class MetricsView(APIView):
+    """Per-route request metrics of all workers, in the Prometheus text format"""
+    permission_classes = [IsAuthenticated, IsAdminUser]
+
+    def get(self, request):
+        return HttpResponse(metrics.render(), content_type=metrics.CONTENT_TYPE)
 
 
 class RewardView(APIView):
@@ -547,121 +1139,25 @@ class RewardView(APIView):
     
 
 
-class DashboardStatsView(APIView):
+class DashboardStatsView(ReplicaReadMixin, APIView):
     permission_classes = [IsAuthenticated]
+
+    # Icon and title prefix per recent activity type
+    activity_types = {
+        'user_signup': ('person-add', 'New user'),
+        'project_created': ('document-text', 'New project'),
+    }
     
     def get(self, request):
         try:
-            today = timezone.now().date()
-            time_threshold = timezone.now() - timedelta(days=7)
-            
-            # Get basic stats
-            total_users = CustomUser.objects.count()
-            new_users_today = CustomUser.objects.filter(
-                date_joined__date=today
-            ).count()
-            active_users_today = CustomUser.objects.filter(
-                last_login__date=today
-            ).count()
-            total_projects = Project.objects.count()
-            
-            # Project status counts
-            projects_completed = Project.objects.filter(completed=True).count()
-            projects_in_progress = Project.objects.filter(completed=False).count()
-            
-            # Calculate completion metrics
-            projects_on_time = 0
-            projects_late = 0
-            on_time_percentage = 0
-            late_percentage = 0
-            
-            try:
-                # Get completed projects with valid dates
-                completed_projects = Project.objects.filter(
-                    completed=True,
-                    end_date__isnull=False,
-                    completed_at__isnull=False
-                )
-                
-                for project in completed_projects:
-                    try:
-                        # Handle case where end_time might be None or empty
-                        end_time_str = project.end_time or "23:59"  # Default to end of day
-                        
-                        # Create end datetime
-                        end_datetime = datetime.combine(
-                            project.end_date,
-                            datetime.strptime(end_time_str, "%H:%M").time()
-                        ).replace(tzinfo=timezone.utc)
-                        
-                        if project.completed_at <= end_datetime:
-                            projects_on_time += 1
-                        else:
-                            projects_late += 1
-                    except (ValueError, TypeError, AttributeError) as e:
-                        logger.error(f"Error processing project {project.id}: {str(e)}")
-                        continue
-                
-                # Calculate percentages based only on counted projects
-                total_counted = projects_on_time + projects_late
-                if total_counted > 0:
-                    on_time_percentage = round((projects_on_time / total_counted) * 100)
-                    late_percentage = round((projects_late / total_counted) * 100)
-                
-            except Exception as e:
-                logger.error(f"Error calculating completion metrics: {str(e)}")
-
-            # Daily visits - using active users as proxy
-            daily_visits = active_users_today
-
-            # Get recent activities
-            recent_users = CustomUser.objects.filter(
-                date_joined__gte=time_threshold
-            ).order_by('-date_joined')[:5]
-            
-            recent_projects = Project.objects.filter(
-                created_at__gte=time_threshold
-            ).order_by('-created_at')[:5]
-
-            # Format activities
-            activities = []
-            for user in recent_users:
-                activities.append({
-                    'type': 'user_signup',
-                    'title': f'New user: {user.email}',
-                    'timestamp': user.date_joined.isoformat(),
-                    'time_ago': self.get_time_ago(user.date_joined),
-                    'icon': 'person-add'
-                })
-            
-            for project in recent_projects:
-                activities.append({
-                    'type': 'project_created',
-                    'title': f'New project: {project.title}',
-                    'timestamp': project.created_at.isoformat(),
-                    'time_ago': self.get_time_ago(project.created_at),
-                    'icon': 'document-text'
-                })
-            
-            # Sort by timestamp (newest first)
-            activities.sort(key=lambda x: x['timestamp'], reverse=True)
-            
+            dashboard = caching.get_dashboard_stats(lambda: {
+                'stats': self.get_stats(),
+                'recent_activities': self.get_recent_activities(),
+            })
             return Response({
                 'status': 'success',
-                'stats': {
-                    'total_users': total_users,
-                    'new_users_today': new_users_today,
-                    'active_users_today': active_users_today,
-                    'total_projects': total_projects,
-                    'projects_completed': projects_completed,
-                    'projects_in_progress': projects_in_progress,
-                    'projects_on_time': projects_on_time,
-                    'projects_late': projects_late,
-                    'on_time_percentage': on_time_percentage,
-                    'late_percentage': late_percentage,
-                    'daily_visits': daily_visits,
-                },
-                'recent_activities': activities[:10]
+                'stats': dashboard['stats'],
+                'recent_activities': dashboard['recent_activities'],
             }, status=status.HTTP_200_OK)
             
         except Exception as e:
@@ -670,6 +1166,80 @@ class DashboardStatsView(APIView):
                 'status': 'error',
                 'message': 'Internal server error'
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    def get_stats(self):
+        """
+        All dashboard counters in one conditional-aggregation query.
+        Users are left-joined to their projects so a single pass covers both
+        tables: user counters use DISTINCT, project counters count join rows.
+        On-time/late compares completed_at to the stored deadline in SQL.
+        """
+        today = timezone.now().date()
+        finished = Q(projects__completed=True, projects__completed_at__isnull=False,
+                     projects__deadline__isnull=False)
+        totals = CustomUser.objects.aggregate(
+            total_users=Count('id', distinct=True),
+            new_users_today=Count('id', distinct=True, filter=Q(date_joined__date=today)),
+            active_users_today=Count('id', distinct=True, filter=Q(last_login__date=today)),
+            total_projects=Count('projects'),
+            projects_completed=Count('projects', filter=Q(projects__completed=True)),
+            projects_in_progress=Count('projects', filter=Q(projects__completed=False)),
+            projects_on_time=Count('projects', filter=finished & Q(projects__completed_at__lte=F('projects__deadline'))),
+            projects_late=Count('projects', filter=finished & Q(projects__completed_at__gt=F('projects__deadline'))),
+        )
+
+        # Calculate percentages based only on counted projects
+        on_time_percentage = 0
+        late_percentage = 0
+        total_counted = totals['projects_on_time'] + totals['projects_late']
+        if total_counted > 0:
+            on_time_percentage = round((totals['projects_on_time'] / total_counted) * 100)
+            late_percentage = round((totals['projects_late'] / total_counted) * 100)
+
+        return {
+            'total_users': totals['total_users'],
+            'new_users_today': totals['new_users_today'],
+            'active_users_today': totals['active_users_today'],
+            'total_projects': totals['total_projects'],
+            'projects_completed': totals['projects_completed'],
+            'projects_in_progress': totals['projects_in_progress'],
+            'projects_on_time': totals['projects_on_time'],
+            'projects_late': totals['projects_late'],
+            'on_time_percentage': on_time_percentage,
+            'late_percentage': late_percentage,
+            # Daily visits - using active users as proxy
+            'daily_visits': totals['active_users_today'],
+        }
+
+    def get_recent_activities(self, limit=10):
+        """Latest signups and project creations of the past week in one UNION query"""
+        time_threshold = timezone.now() - timedelta(days=7)
+        recent_users = CustomUser.objects.filter(
+            date_joined__gte=time_threshold
+        ).annotate(
+            kind=Value('user_signup', output_field=CharField()),
+            label=F('email'),
+            timestamp=F('date_joined'),
+        ).values_list('kind', 'label', 'timestamp')
+        recent_projects = Project.objects.filter(
+            created_at__gte=time_threshold
+        ).annotate(
+            kind=Value('project_created', output_field=CharField()),
+            label=F('title'),
+            timestamp=F('created_at'),
+        ).values_list('kind', 'label', 'timestamp')
+
+        activities = []
+        for kind, label, timestamp in recent_users.union(recent_projects, all=True).order_by('-timestamp')[:limit]:
+            icon, prefix = self.activity_types[kind]
+            activities.append({
+                'type': kind,
+                'title': f'{prefix}: {label}',
+                'timestamp': timestamp.isoformat(),
+                'time_ago': self.get_time_ago(timestamp),
+                'icon': icon
+            })
+        return activities
     
     def get_time_ago(self, timestamp):
         """Convert timestamp to human-readable time ago format"""
@@ -708,18 +1278,20 @@ class StandardResultsSetPagination(PageNumberPagination):
             'results': data
         })
 
-class AllUsersView(APIView):
+class AllUsersView(ReplicaReadMixin, APIView):
     permission_classes = [IsAuthenticated]
     pagination_class = StandardResultsSetPagination
     
     def get(self, request, **kwargs):
-        users = CustomUser.objects.all().order_by('-date_joined')
+        fields, users = fieldsets.select(request, ProfileSerializer, CustomUser.objects.all())
+        users = users.order_by('-date_joined')
+        context = {'profile_picture_size': 'list'}
         page = self.paginate_queryset(users)
         if page is not None:
-            serializer = ProfileSerializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
-        serializer = ProfileSerializer(users, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+            serializer = ProfileSerializer(page, many=True, context=context, fields=fields)
+            return self.get_paginated_response(metrics.serialize(serializer))
+        serializer = ProfileSerializer(users, many=True, context=context, fields=fields)
+        return Response(metrics.serialize(serializer), status=status.HTTP_200_OK)
     
     @property
     def paginator(self):
@@ -743,79 +1315,119 @@ class AllUsersView(APIView):
 
 
 
-class AdminProjectListView(APIView):
+class AdminProjectListView(ReplicaReadMixin, APIView):
     permission_classes = [IsAuthenticated, IsAdminUser]
-    
+    pagination_class = AdminProjectCursorPagination
+    filter_params = ('search', 'status', 'user_id', 'category', 'time_frame')
+    count_cache_timeout = 60  # seconds
+
     def get(self, request, *args, **kwargs):
         try:
-            # Get query parameters
-            search = request.query_params.get('search', '')
-            status_filter = request.query_params.get('status', 'all')
-            user_id = request.query_params.get('user_id')
-            category = request.query_params.get('category')
-            time_frame = request.query_params.get('time_frame')  # today, week, month, overdue
-            
-            # Base queryset - admin can see all projects
-            projects = Project.objects.select_related('user').all()
-            
-            # Filter by specific user if requested
-            if user_id:
-                projects = projects.filter(user__id=user_id)
-            
-            # Apply search filter
-            if search:
-                projects = projects.filter(
-                    Q(title__icontains=search) | 
-                    Q(description__icontains=search) |
-                    Q(category__icontains=search) |
-                    Q(user__email__icontains=search) |
-                    Q(user__first_name__icontains=search) |
-                    Q(user__last_name__icontains=search))
-            
-            # Apply category filter
-            if category:
-                projects = projects.filter(category__iexact=category)
-            
-            # Apply status filter
-            if status_filter == 'active':
-                projects = projects.filter(completed=False)
-            elif status_filter == 'completed':
-                projects = projects.filter(completed=True)
-            
-            # Apply time frame filters
-            if time_frame:
-                today = timezone.now().date()
-                if time_frame == 'today':
-                    projects = projects.filter(
-                        Q(start_date=today) | Q(end_date=today))
-                elif time_frame == 'week':
-                    next_week = today + timedelta(days=7)
-                    projects = projects.filter(
-                        end_date__range=[today, next_week])
-                elif time_frame == 'month':
-                    next_month = today + timedelta(days=30)
-                    projects = projects.filter(
-                        end_date__range=[today, next_month])
-                elif time_frame == 'overdue':
-                    projects = projects.filter(
-                        end_date__lt=today,
-                        completed=False)
-            
-            # Order by most recent
-            projects = projects.order_by('-created_at')
-            
-            serializer = AdminProjectSerializer(projects, many=True, context={'request': request})
+            fields, projects = fieldsets.select(
+                request, AdminProjectListSerializer, self.filter_queryset(request), always=('created_at',)
+            )
+
+            # Only one page of rows is read and serialized per request
+            paginator = self.pagination_class()
+            page = paginator.paginate_queryset(projects, request, view=self)
+            serializer = AdminProjectListSerializer(page, many=True, context={'request': request}, fields=fields)
             return Response({
                 'status': 'success',
-                'projects': serializer.data,
-                'count': projects.count()
+                'projects': metrics.serialize(serializer),
+                'count': self.get_total_count(request, projects),
+                'next': paginator.get_next_link(),
+                'previous': paginator.get_previous_link(),
             })
-            
+
+        except APIException:
+            raise
         except Exception as e:
             return Response(
                 {'status': 'error', 'message': str(e)},
                 status=status.HTTP_400_BAD_REQUEST
             )
+
+    def filter_queryset(self, request):
+        # Get query parameters
+        search = request.query_params.get('search', '')
+        status_filter = request.query_params.get('status', 'all')
+        user_id = request.query_params.get('user_id')
+        category = request.query_params.get('category')
+        time_frame = request.query_params.get('time_frame')  # today, week, month, overdue
+        
+        # Base queryset - admin can see all projects. The user and phases
+        # are loaded by fieldsets.select() when the response shows them.
+        projects = Project.objects.all()
+        
+        # Filter by specific user if requested
+        if user_id:
+            projects = projects.filter(user__id=user_id)
+        
+        # Apply search filter: ranked full-text match when the backend has
+        # an index, substring match otherwise
+        if search:
+            ranked = project_search.apply_search(projects, search)
+            if ranked is not None:
+                projects = ranked
+            else:
+                projects = projects.filter(
+                    Q(title__icontains=search) | 
+                    Q(description__icontains=search) |
+                    Q(category__icontains=search) |
+                    Q(user__email__icontains=search) |
+                    Q(user__first_name__icontains=search) |
+                    Q(user__last_name__icontains=search))
+        
+        # Apply category filter
+        if category:
+            projects = projects.filter(category__iexact=category)
+        
+        # Apply status filter
+        if status_filter == 'active':
+            projects = projects.filter(completed=False)
+        elif status_filter == 'completed':
+            projects = projects.filter(completed=True)
+        
+        # Apply time frame filters
+        if time_frame:
+            today = timezone.now().date()
+            if time_frame == 'today':
+                projects = projects.filter(
+                    Q(start_date=today) | Q(end_date=today))
+            elif time_frame == 'week':
+                next_week = today + timedelta(days=7)
+                projects = projects.filter(
+                    end_date__range=[today, next_week])
+            elif time_frame == 'month':
+                next_month = today + timedelta(days=30)
+                projects = projects.filter(
+                    end_date__range=[today, next_month])
+            elif time_frame == 'overdue':
+                projects = projects.filter(
+                    end_date__lt=today,
+                    completed=False)
+
+        return projects
+
+    def get_total_count(self, request, projects):
+        """
+        Total number of matching projects, cached per filter combination.
+        The COUNT only runs when the cached value for these filters expires,
+        so paging through results never re-counts the table.
+        """
+        filters = '&'.join(
+            f"{name}={request.query_params.get(name, '')}" for name in self.filter_params
+        )
+        if request.query_params.get('time_frame'):
+            # Relative time frames move with the calendar day
+            filters += f"&day={timezone.now().date().isoformat()}"
+        cache_key = 'admin_projects_count:' + hashlib.md5(filters.encode(), usedforsecurity=False).hexdigest()
+
+        total = cache.get(cache_key)
+        if total is None:
+            total = projects.count()
+            cache.set(cache_key, total, self.count_cache_timeout)
+        return total
         
 
 
@@ -824,7 +1436,7 @@ class AdminProjectDetailView(APIView):
     
     def get_object(self, project_id):
         try:
-            return Project.objects.select_related('user').get(id=project_id)
+            return Project.objects.select_related('user').prefetch_related('phases').get(id=project_id)
         except Project.DoesNotExist:
             return None
 
@@ -863,7 +1475,7 @@ class AdminProjectDetailView(APIView):
             # Handle completion status change
             if 'completed' in request.data:
                 if request.data['completed'] and not project.completed_at:
-                    project.completed_at = timezone.now().strftime("%Y-%m-%d %H:%M")
+                    project.completed_at = timezone.now()
                     project.save()
                 elif not request.data['completed']:
                     project.completed_at = None
@@ -894,8 +1506,10 @@ class AdminProjectDetailView(APIView):
 
 
 
-class AdminActivitiesView(APIView):
+class AdminActivitiesView(ReplicaReadMixin, APIView):
     permission_classes = [IsAuthenticated, IsAdminUser]
+    pagination_class = ActivityCursorPagination
+    history_days = 30
     
     def get(self, request):
         try:
@@ -909,107 +1523,35 @@ class AdminActivitiesView(APIView):
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
-            time_threshold = timezone.now() - timedelta(days=30)
-            activities = []
-            
-            # Helper function to safely get user info
-            def get_user_info(user):
-                return {
-                    'email': getattr(user, 'email', 'Unknown'),
-                    'full_name': getattr(user, 'get_full_name', lambda: 'Unknown')()
-                }
+            time_threshold = timezone.now() - timedelta(days=self.history_days)
+            events = latest_updates_only(ActivityEvent.objects.filter(timestamp__gte=time_threshold))
 
-            # User signups
-            try:
-                for user in CustomUser.objects.filter(date_joined__gte=time_threshold).order_by('-date_joined'):
-                    user_info = get_user_info(user)
-                    activities.append({
-                        'uuid': str(uuid.uuid4()),
-                        'id': f'user_{user.id}',
-                        'type': 'user_signup',
-                        'title': f'New user registered: {user_info["email"]}',
-                        'description': f"User {user_info['full_name']} joined the system",
-                        'timestamp': user.date_joined.isoformat(),
-                        'time_ago': self.get_time_ago(user.date_joined),
-                        'icon': 'person-add',
-                        'user_id': user.id
-                    })
-            except Exception as e:
-                logger.error(f"Error processing user activities: {str(e)}")
-
-            # Project creations
-            try:
-                for project in Project.objects.filter(created_at__gte=time_threshold).order_by('-created_at'):
-                    user_info = get_user_info(project.user)
-                    activities.append({
-                        'uuid': str(uuid.uuid4()),
-                        'id': f'project_{project.id}',
-                        'type': 'project_created',
-                        'title': f'New project created: {getattr(project, "title", "Untitled")}',
-                        'description': f"Created by {user_info['email']}",
-                        'timestamp': project.created_at.isoformat(),
-                        'time_ago': self.get_time_ago(project.created_at),
-                        'icon': 'folder',
-                        'project_id': project.id,
-                        'user_id': project.user.id
-                    })
-            except Exception as e:
-                logger.error(f"Error processing project creations: {str(e)}")
-
-            # Project updates
-            try:
-                for project in Project.objects.filter(updated_at__gte=time_threshold).exclude(updated_at=F('created_at')).order_by('-updated_at'):
-                    user_info = get_user_info(project.user)
-                    activities.append({
-                        'uuid': str(uuid.uuid4()),
-                        'id': f'project_{project.id}_update',
-                        'type': 'project_updated',
-                        'title': f'Project updated: {getattr(project, "title", "Untitled")}',
-                        'description': f"Updated by {user_info['email']}",
-                        'timestamp': project.updated_at.isoformat(),
-                        'time_ago': self.get_time_ago(project.updated_at),
-                        'icon': 'create',
-                        'project_id': project.id,
-                        'user_id': project.user.id
-                    })
-            except Exception as e:
-                logger.error(f"Error processing project updates: {str(e)}")
-
-            # Project completions
-            try:
-                for project in Project.objects.filter(completed_at__gte=time_threshold).order_by('-completed_at'):
-                    user_info = get_user_info(project.user)
-                    activities.append({
-                        'uuid': str(uuid.uuid4()),
-                        'id': f'project_{project.id}_complete',
-                        'type': 'project_completed',
-                        'title': f'Project completed: {getattr(project, "title", "Untitled")}',
-                        'description': f"Completed by {user_info['email']}",
-                        'timestamp': project.completed_at.isoformat(),
-                        'time_ago': self.get_time_ago(project.completed_at),
-                        'icon': 'checkmark-circle',
-                        'project_id': project.id,
-                        'user_id': project.user.id
-                    })
-            except Exception as e:
-                logger.error(f"Error processing project completions: {str(e)}")
-
-            # Sort all activities by timestamp (newest first)
-            activities.sort(key=lambda x: x['timestamp'], reverse=True)
-            
-            # Pagination
-            total_activities = len(activities)
-            start = (page - 1) * page_size
-            end = start + page_size
-            paginated_activities = activities[start:end]
+            paginator = self.pagination_class()
+            if paginator.cursor_query_param in request.query_params or page == 1:
+                # Range scan on (timestamp desc, id desc) that reads one page
+                page_events = paginator.paginate_queryset(events, request, view=self)
+                next_cursor = paginator.get_next_link()
+                has_more = paginator.has_next
+            else:
+                # Legacy page numbers from older app builds, still bounded by LIMIT
+                start = (page - 1) * page_size
+                page_events = list(events.order_by('-timestamp', '-id')[start:start + page_size + 1])
+                has_more = len(page_events) > page_size
+                page_events = page_events[:page_size]
+                next_cursor = None
+
+            activities = [
+                to_feed_item(event, self.get_time_ago(event.timestamp))
+                for event in page_events
+            ]
             
             return Response({
                 'status': 'success',
-                'activities': paginated_activities,
-                'total': total_activities,
+                'activities': activities,
                 'page': page,
                 'page_size': page_size,
-                'has_more': end < total_activities
+                'has_more': has_more,
+                'next': next_cursor,
             }, status=status.HTTP_200_OK)
             
         except Exception as e:
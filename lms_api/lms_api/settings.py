@@ -50,6 +50,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -59,6 +60,7 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
+    'api.middleware.ReplicaPinMiddleware',
 ]
 
 ROOT_URLCONF = 'lms_api.urls'
@@ -80,19 +82,96 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'lms_api.wsgi.application'
+# Serve with an ASGI server (e.g. `uvicorn lms_api.asgi:application`) for the notification stream
+ASGI_APPLICATION = 'lms_api.asgi.application'
 
 
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
+# DATABASE_URL selects the backend (the local SQLite file by default).
+# Connections are kept open for DATABASE_CONN_MAX_AGE seconds and checked
+# before being reused. Behind a transaction-mode pooler such as PgBouncer,
+# set DATABASE_DISABLE_SERVER_SIDE_CURSORS so .iterator() keeps working.
+DATABASE_CONN_MAX_AGE = config('DATABASE_CONN_MAX_AGE', default=60, cast=int)
+DATABASE_OPTIONS = {
+    'conn_max_age': DATABASE_CONN_MAX_AGE,
+    'conn_health_checks': True,
+    'disable_server_side_cursors': config('DATABASE_DISABLE_SERVER_SIDE_CURSORS', default=False, cast=bool),
+}
+
 DATABASES = {
-    # "default": dj_database_url.config(default=config("DATABASE_URL"))
+    'default': dj_database_url.parse(
+        config('DATABASE_URL', default=f"sqlite:///{BASE_DIR / 'db.sqlite3'}"),
+        **DATABASE_OPTIONS,
+    ),
+}
+
+# Optional read replica for the admin read endpoints (see api/routers.py).
+# Needs a shared CACHE_BACKEND. Tests read it from the default database.
+REPLICA_DATABASE_URL = config('REPLICA_DATABASE_URL', default='')
+if REPLICA_DATABASE_URL:
+    DATABASES['replica'] = dj_database_url.parse(
+        REPLICA_DATABASE_URL, test_options={'MIRROR': 'default'}, **DATABASE_OPTIONS,
+    )
+
+# Opt-in SQLite profile for single-node deployments: WAL and tuned pragmas,
+# BEGIN IMMEDIATE transactions and one write queue per process (see
+# api/sqlite/base.py). Only applies when the default database is SQLite.
+SQLITE_TUNED = config('SQLITE_TUNED', default=False, cast=bool)
+if SQLITE_TUNED and DATABASES['default']['ENGINE'] == 'django.db.backends.sqlite3':
+    DATABASES['default']['ENGINE'] = 'api.sqlite'
+SQLITE_BUSY_TIMEOUT = config('SQLITE_BUSY_TIMEOUT', default=5000, cast=int)  # milliseconds
+SQLITE_WRITE_TIMEOUT = config('SQLITE_WRITE_TIMEOUT', default=30, cast=int)  # seconds in the write queue
+SQLITE_MMAP_SIZE = config('SQLITE_MMAP_SIZE', default=256 * 1024 * 1024, cast=int)  # bytes
+SQLITE_CACHE_SIZE = config('SQLITE_CACHE_SIZE', default=-64000, cast=int)  # negative: KiB
+
+DATABASE_ROUTERS = ['api.routers.ReplicaRouter']
+# Seconds a user's reads stay on the primary after they write, so they see
+# their own changes despite replication lag
+REPLICA_PIN_SECONDS = config('REPLICA_PIN_SECONDS', default=10, cast=int)
+
+# Cache
+# Required: a cache every worker shares, Redis by default. Features that must
+# hear about changes made by other workers rely on it. With a process-local
+# backend (e.g. CACHE_BACKEND=django.core.cache.backends.locmem.LocMemCache
+# for local development) they fall back to reading the database every time,
+# and `manage.py check` warns.
+
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3', 
-    }        
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.redis.RedisCache'),
+        'LOCATION': config('CACHE_LOCATION', default='redis://127.0.0.1:6379/1'),
+    }
 }
 
+# Seconds the admin dashboard stats are served from cache before recomputing
+DASHBOARD_STATS_CACHE_TIMEOUT = config('DASHBOARD_STATS_CACHE_TIMEOUT', default=30, cast=int)
+
+# Maximum operations accepted by api/projects/batch/ in one request
+PROJECT_BATCH_MAX_OPERATIONS = config('PROJECT_BATCH_MAX_OPERATIONS', default=100, cast=int)
+
+# Notification sweep (python manage.py sweep_notifications)
+NOTIFICATION_DUE_SOON_HOURS = config('NOTIFICATION_DUE_SOON_HOURS', default=24, cast=int)
+NOTIFICATION_OVERDUE_LOOKBACK_DAYS = config('NOTIFICATION_OVERDUE_LOOKBACK_DAYS', default=7, cast=int)
+NOTIFICATION_SWEEP_BATCH_SIZE = config('NOTIFICATION_SWEEP_BATCH_SIZE', default=500, cast=int)
+
+# Server-Sent Events stream (api/notifications/stream/, ASGI only): seconds
+# between the per-process table polls, between keepalive comments, and for
+# which a stream ticket can be used
+NOTIFICATION_STREAM_POLL_INTERVAL = config('NOTIFICATION_STREAM_POLL_INTERVAL', default=2, cast=float)
+NOTIFICATION_STREAM_HEARTBEAT = config('NOTIFICATION_STREAM_HEARTBEAT', default=25, cast=float)
+NOTIFICATION_STREAM_TICKET_MAX_AGE = config('NOTIFICATION_STREAM_TICKET_MAX_AGE', default=30, cast=int)
+
+# Password hashing for the async auth views (api/hashing.py): worker threads
+# per process, and hashing calls allowed to wait before requests get a 503
+PASSWORD_HASHER_WORKERS = config('PASSWORD_HASHER_WORKERS', default=os.cpu_count() or 2, cast=int)
+PASSWORD_HASHER_QUEUE_LIMIT = config('PASSWORD_HASHER_QUEUE_LIMIT', default=32, cast=int)
+
+# Per-process cache of authenticated users (api/authentication.py)
+JWT_USER_CACHE_SIZE = config('JWT_USER_CACHE_SIZE', default=1024, cast=int)
+JWT_USER_CACHE_TTL = config('JWT_USER_CACHE_TTL', default=60, cast=int)
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -134,6 +213,23 @@ STATIC_URL = 'static/'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Uploads are stored under the hash of their content (api/storage.py)
+STORAGES = {
+    'default': {'BACKEND': 'api.storage.ContentAddressedStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+}
+
+# How media is served: '' (not by Django: the web server serves MEDIA_ROOT
+# at MEDIA_URL), 'django' (MediaView sends the file itself; the default with
+# DEBUG), 'x-accel-redirect' (MediaView sets the headers and nginx sends the
+# file from an internal location at MEDIA_ACCEL_PREFIX) or 'x-sendfile'
+# (the same with Apache mod_xsendfile)
+MEDIA_SERVE_MODE = config('MEDIA_SERVE_MODE', default='django' if DEBUG else '')
+MEDIA_ACCEL_PREFIX = config('MEDIA_ACCEL_PREFIX', default='/protected-media/')
+
+# Threads per process that generate profile picture thumbnails (api/images.py)
+IMAGE_WORKERS = config('IMAGE_WORKERS', default=2, cast=int)
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
@@ -145,7 +241,17 @@ AUTH_USER_MODEL = 'api.CustomUser'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.CachedJWTAuthentication',
+    ],
+    # orjson-backed JSON, same output as DRF's JSONRenderer / JSONParser
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'api.parsers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
     ],
 }
 
@@ -156,8 +262,26 @@ SIMPLE_JWT = {
     "BLACKLIST_AFTER_ROTATION": True,
     "AUTH_HEADER_TYPES": ("Bearer",),
     "TOKEN_BLACKLIST_ENABLED": True,
+    "TOKEN_OBTAIN_SERIALIZER": "api.serializers.TokenObtainPairSerializer",
+    "TOKEN_REFRESH_SERIALIZER": "api.serializers.TokenRefreshSerializer",
 }
 
+# Refresh token blacklist (api/tokens.py): longest a process trusts its
+# in-memory revocation set without syncing, longest a blacklist insert may
+# take to commit and still be picked up, expired rows deleted per batch, and
+# seconds between the batches pruned as tokens are blacklisted
+TOKEN_REVOCATION_SYNC_INTERVAL = config('TOKEN_REVOCATION_SYNC_INTERVAL', default=1, cast=float)
+TOKEN_REVOCATION_SYNC_MARGIN = config('TOKEN_REVOCATION_SYNC_MARGIN', default=10, cast=float)
+TOKEN_PRUNE_BATCH_SIZE = config('TOKEN_PRUNE_BATCH_SIZE', default=1000, cast=int)
+TOKEN_PRUNE_INTERVAL = config('TOKEN_PRUNE_INTERVAL', default=60, cast=int)
+
+# Write-behind for outstanding/blacklisted token inserts (api/tokens.py):
+# off by default; when on, buffered rows are written every FLUSH_INTERVAL
+# seconds or once BATCH_SIZE are waiting
+TOKEN_WRITE_BEHIND = config('TOKEN_WRITE_BEHIND', default=False, cast=bool)
+TOKEN_WRITE_FLUSH_INTERVAL = config('TOKEN_WRITE_FLUSH_INTERVAL', default=0.25, cast=float)
+TOKEN_WRITE_BATCH_SIZE = config('TOKEN_WRITE_BATCH_SIZE', default=200, cast=int)
+
 CORS_ALLOW_ALL_ORIGINS = True 
 
 CORS_ALLOW_HEADERS = [
@@ -230,9 +354,19 @@ LOGGING = {
 }
 
 
-DEFAULT_FILE_STORAGE = 'django.core.files.storage.FileSystemStorage'
 FILE_UPLOAD_PERMISSIONS = 0o644
 FILE_UPLOAD_DIRECTORY_PERMISSIONS = 0o755
 
 # Maximum upload size (10MB)
-DATA_UPLOAD_MAX_MEMORY_SIZE = 10485760
\ No newline at end of file
+DATA_UPLOAD_MAX_MEMORY_SIZE = 10485760
+
+# Largest accepted profile picture, checked while the upload streams in
+PROFILE_PICTURE_MAX_SIZE = 5 * 1024 * 1024
+
+
+# Request metrics (see api/metrics.py). By default each worker keeps its
+# metrics in memory, which is enough with a single worker. With several, set
+# METRICS_DIR to a directory every worker can write to (e.g. under /run or a
+# tmpfs) and the metrics endpoint sums the files there.
+METRICS_DIR = config('METRICS_DIR', default='')
+METRICS_FLUSH_INTERVAL = config('METRICS_FLUSH_INTERVAL', default=5, cast=int)  # seconds